@@ -0,0 +1,117 @@
+# ============================================================
+# 🏁 TESLABTC.KG — benchmarks/bench_analisis.py
+# ============================================================
+# Tiempos de los caminos calientes de /analyze, sin red:
+#   python -m benchmarks.bench_analisis                 # sólo medir
+#   python -m benchmarks.bench_analisis --guardar       # escribir baseline
+#   python -m benchmarks.bench_analisis --comparar      # comparar (exit 1 si hay regresión)
+# generar_analisis_premium se mide con precio y velas sintéticas
+# inyectados en _safe_get_price / _safe_get_klines.
+# ============================================================
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.medicion import main_cli, medir
+from benchmarks.sinteticos import TAMANOS, serie_ohlcv
+
+import utils.analisis_premium as analisis_premium
+from utils.estructura_utils import detectar_bos, detectar_ob, evaluar_estructura
+from utils.intelligent_formatter import construir_mensaje_operativo
+from utils.ob_detector import detectar_ob_valido
+from utils.setup_detector import validar_setup_tesla
+from utils.swings import detectar_swings
+from utils.velas import Velas
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline_analisis.json")
+
+
+def _casos_por_tamano(n: int) -> List[Tuple[str, Callable[[], Any]]]:
+    kl = serie_ohlcv(n, "5m", semilla=n)
+    casos = [
+        (f"evaluar_estructura[n={n}]", lambda: evaluar_estructura(kl)),
+        (f"_zigzag_pivots[n={n}]", lambda: analisis_premium._zigzag_pivots(kl, 12, 0.5, 2)),
+        (f"detectar_bos[n={n}]", lambda: detectar_bos(kl)),
+        (f"detectar_ob[n={n}]", lambda: detectar_ob(kl)),
+        (f"detectar_ob_valido[n={n}]", lambda: detectar_ob_valido(kl, "alcista")),
+        (f"detectar_swings[n={n}]", lambda: detectar_swings(kl)),
+    ]
+    # Klines dict con OHLC en texto (como la API REST de Binance, y lo que
+    # pasan live_monitor / analisis_free / confirmaciones): las funciones
+    # de ventana sólo deben convertir las velas que usan, no la serie entera
+    kl_txt = [{**k, **{c: str(k[c]) for c in ("open", "high", "low", "close", "volume")}} for k in kl]
+    casos += [
+        (f"evaluar_estructura[dict_txt,n={n}]", lambda: evaluar_estructura(kl_txt)),
+        (f"detectar_bos[dict_txt,n={n}]", lambda: detectar_bos(kl_txt)),
+        (f"detectar_ob[dict_txt,n={n}]", lambda: detectar_ob(kl_txt)),
+        (f"detectar_ob_valido[dict_txt,n={n}]", lambda: detectar_ob_valido(kl_txt, "alcista")),
+    ]
+    return casos
+
+
+def _premium_stub() -> Tuple[Callable[[], Any], Dict[str, Any]]:
+    """generar_analisis_premium con fuente de datos sintética (sin red)."""
+    datos = {
+        "4h": Velas.desde_klines(serie_ohlcv(400, "4h", semilla=4)),
+        "1h": Velas.desde_klines(serie_ohlcv(400, "1h", semilla=1)),
+        "5m": Velas.desde_klines(serie_ohlcv(300, "5m", semilla=5)),
+    }
+    precio = datos["5m"].close[-1]
+
+    async def _precio(symbol: str = "BTCUSDT"):
+        return precio, "Sintético"
+
+    async def _klines(symbol: str, interval: str = "15m", limit: int = 500):
+        return datos[interval][-limit:]
+
+    analisis_premium._safe_get_price = _precio
+    analisis_premium._safe_get_klines = _klines
+
+    loop = asyncio.new_event_loop()
+
+    def _correr():
+        return loop.run_until_complete(analisis_premium.generar_analisis_premium("BTCUSDT"))
+
+    return _correr, _correr()
+
+
+def ejecutar(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    tamanos = [int(t) for t in args.tamanos.split(",")] if args.tamanos else list(TAMANOS)
+
+    casos: List[Tuple[str, Callable[[], Any]]] = []
+    for n in tamanos:
+        casos.extend(_casos_por_tamano(n))
+
+    premium, payload = _premium_stub()
+    kl = serie_ohlcv(400, "5m", semilla=7)
+    precio = kl[-1]["close"]
+    bos = {"BOS": {"tipo": "alcista"}}
+    ob = {"tipo": "demanda", "zona": (precio * 0.99, precio * 1.0)}
+    liq = {"PDH": precio * 1.001, "PDL": precio * 0.98}
+    asia = {"ASIAN_HIGH": precio * 1.01, "ASIAN_LOW": precio * 0.999}
+    casos += [
+        ("validar_setup_tesla", lambda: validar_setup_tesla(
+            precio, "alcista", "alcista", bos, {}, ob, liq, asia)),
+        ("construir_mensaje_operativo", lambda: construir_mensaje_operativo(payload)),
+        ("generar_analisis_premium[stub]", premium),
+    ]
+
+    resultados: Dict[str, Dict[str, float]] = {}
+    for nombre, fn in casos:
+        if args.filtro and args.filtro not in nombre:
+            continue
+        r = medir(fn)
+        resultados[nombre] = r
+        print(f"{nombre:<48} {r['mediana_us']:>12.2f} µs  (min {r['min_us']:.2f}, x{r['llamadas']})")
+    return resultados
+
+
+def _configurar(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--tamanos", default="", help=f"Tamaños de serie, p. ej. 120,400 (default {TAMANOS})")
+
+
+if __name__ == "__main__":
+    main_cli("análisis", ejecutar, BASELINE, _configurar)
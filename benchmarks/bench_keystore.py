@@ -0,0 +1,82 @@
+# ============================================================
+# 🏁 TESLABTC.KG — benchmarks/bench_keystore.py
+# ============================================================
+# Keystore de claves Binance con N usuarios (default 10 000), en un
+# directorio temporal y con una clave maestra generada al vuelo:
+#   python -m benchmarks.bench_keystore                 # sólo medir
+#   python -m benchmarks.bench_keystore --guardar       # escribir baseline
+#   python -m benchmarks.bench_keystore --comparar      # comparar (exit 1 si hay regresión)
+# Casos: get_user_keys (acierto / fallo), set_user_keys (una fila
+# cifrada + commit) y el arranque (descifrar todo el almacén).
+# Requiere el paquete "cryptography".
+# ============================================================
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Dict
+
+from benchmarks.medicion import main_cli, medir
+
+from cryptography.fernet import Fernet
+
+from utils.keystore import Keystore
+from utils.token_store import AlmacenTokens
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline_keystore.json")
+
+
+def _poblar(ks: Keystore, n: int) -> None:
+    filas = {
+        str(1_000_000 + i): ks._cifrar({"api_key": f"K{i:060d}", "api_secret": f"S{i:060d}"})
+        for i in range(n)
+    }
+    ks.almacen.guardar_claves_cifradas(filas)
+
+
+def ejecutar(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    n = args.usuarios
+    clave = Fernet.generate_key()
+    resultados: Dict[str, Dict[str, float]] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        almacen = AlmacenTokens(os.path.join(tmp, "bench.db"))
+        _poblar(Keystore(almacen, clave), n)
+
+        t = time.perf_counter()
+        ks = Keystore(almacen, clave)
+        ks.obtener("0")
+        arranque_us = round((time.perf_counter() - t) * 1e6, 2)
+
+        rnd = random.Random(n)
+        ids = [1_000_000 + rnd.randrange(n) for _ in range(1024)]
+        pos = iter(range(1 << 62))
+        nuevos = iter(range(2_000_000, 1 << 62))
+        casos = [
+            (f"get_user_keys[acierto,n={n}]", lambda: ks.obtener(ids[next(pos) & 1023])),
+            (f"get_user_keys[fallo,n={n}]", lambda: ks.obtener(42)),
+            (f"set_user_keys[n={n}]", lambda: ks.guardar(next(nuevos), "K" * 64, "S" * 64)),
+        ]
+        # El arranque se mide una sola vez (descifra las n filas)
+        resultados[f"arranque_descifrar[n={n}]"] = {
+            "mediana_us": arranque_us, "min_us": arranque_us, "llamadas": 1,
+        }
+        for nombre, fn in casos:
+            resultados[nombre] = medir(fn)
+        almacen.cerrar()
+
+    resultados = {k: v for k, v in resultados.items() if args.filtro in k}
+    for nombre, r in resultados.items():
+        print(f"{nombre:<48} {r['mediana_us']:>12.2f} µs  (min {r['min_us']:.2f}, x{r['llamadas']})")
+    return resultados
+
+
+def _configurar(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--usuarios", type=int, default=10_000, help="Usuarios en el keystore (default 10000)")
+
+
+if __name__ == "__main__":
+    main_cli("keystore", ejecutar, BASELINE, _configurar)
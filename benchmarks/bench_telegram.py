@@ -0,0 +1,136 @@
+# ============================================================
+# 🏁 TESLABTC.KG — benchmarks/bench_telegram.py
+# ============================================================
+# Outbox de Telegram contra el Bot API falso (benchmarks/fake_telegram)
+# servido en el mismo proceso, con un ALMACEN temporal:
+#   python -m benchmarks.bench_telegram                 # sólo medir
+#   python -m benchmarks.bench_telegram --guardar       # escribir baseline
+#   python -m benchmarks.bench_telegram --comparar      # comparar (exit 1 si hay regresión)
+# Casos: encolar (coste que paga el monitor por alerta) y la entrega
+# completa de N alertas a C chats con 502 aleatorios, incluidas filas
+# persistidas de un arranque anterior, con los límites reales (30 msg/s
+# por bot, 1 msg/s por chat). Falla si queda algo sin entregar o si el
+# Bot API falso tuvo que responder 429.
+# ============================================================
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import time
+from typing import Dict
+
+import uvicorn
+
+from benchmarks.fake_telegram import FakeTelegram
+from benchmarks.medicion import main_cli, medir
+
+from utils.http_client import cerrar_cliente_http
+from utils.telegram_outbox import Outbox
+from utils.token_store import AlmacenTokens
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline_telegram.json")
+LEGADO = 50   # filas "de un arranque anterior" en la bandeja
+PLAZO_S = 120
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _alerta(i: int) -> Dict[str, str]:
+    return {"ts": "12:00:00", "msg": f"BTCUSDT 1h · ⚡ BOS alcista ({60_000 + i:,.2f})", "simbolo": "BTCUSDT"}
+
+
+async def _entrega(args: argparse.Namespace, almacen: AlmacenTokens) -> Dict[str, float]:
+    # Límites reales de Telegram: 30 msg/s por bot, 1 msg/s por chat
+    fake = FakeTelegram(limite_global=30, limite_chat=1, fallo=args.fallo)
+    puerto = _puerto_libre()
+    server = uvicorn.Server(uvicorn.Config(fake.app, host="127.0.0.1", port=puerto, log_level="warning"))
+    servidor = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    # Estado de un arranque anterior: chats suscritos, filas sin entregar
+    # (y filas de un chat ya dado de baja, que no deben enviarse)
+    for c in range(args.chats):
+        almacen.guardar_chat_telegram(f"{c}")
+    almacen.guardar_chat_telegram("bloqueado-1")     # el Bot API responde 403 → se descarta
+    almacen.encolar_telegram((f"{i % args.chats}", f"legado {i}") for i in range(LEGADO))
+    almacen.encolar_telegram(("baja-1", f"huérfana {i}") for i in range(5))
+    ob = Outbox(almacen, token="bench", api_base=f"http://127.0.0.1:{puerto}")
+
+    esperados = (args.chats + 1) * args.alertas + LEGADO
+    t = time.perf_counter()
+    worker = asyncio.create_task(ob.loop())
+    for i in range(args.alertas):
+        ob.encolar(_alerta(i))
+    limite = time.monotonic() + PLAZO_S
+    while ob.enviados + ob.descartados < esperados and time.monotonic() < limite:
+        await asyncio.sleep(0.01)
+    total_s = time.perf_counter() - t
+
+    worker.cancel()
+    server.should_exit = True
+    await servidor
+    await cerrar_cliente_http()
+
+    restantes = len(almacen.pendientes_telegram())
+    print(
+        f"📨 {ob.enviados} alertas en {ob.lotes} mensajes ({ob.enviados / max(ob.lotes, 1):.1f}/msg), "
+        f"{fake.peticiones} peticiones, {fake.limitadas}×429, {fake.fallidas}×502, "
+        f"{ob.reintentos} reintentos, {ob.descartados} descartadas, {restantes} filas pendientes, {total_s:.2f} s"
+    )
+    if restantes or ob.enviados + ob.descartados < esperados:
+        print("⛔ Quedaron alertas sin entregar")
+        sys.exit(1)
+    if "baja-1" in fake.recibidos:
+        print("⛔ Se entregaron alertas a un chat dado de baja")
+        sys.exit(1)
+    if fake.limitadas:
+        print("⛔ El outbox superó los límites de Telegram (429)")
+        sys.exit(1)
+    return {"mediana_us": round(total_s * 1e6, 2), "min_us": round(total_s * 1e6, 2), "llamadas": 1}
+
+
+def ejecutar(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    resultados: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # encolar: lo que paga live_monitor por alerta (sin worker ni red)
+        ob = Outbox(AlmacenTokens(os.path.join(tmp, "encolar.db")), token="bench")
+        for c in range(args.chats):
+            ob.suscribir(f"{c}")
+        alerta = _alerta(0)
+
+        def _encolar():
+            ob.encolar(alerta)
+            ob._nuevos.clear()
+
+        resultados[f"encolar[chats={args.chats}]"] = medir(_encolar)
+        ob.almacen.cerrar()
+
+        almacen = AlmacenTokens(os.path.join(tmp, "entrega.db"))
+        nombre = f"entrega_total[chats={args.chats},alertas={args.alertas},fallo={args.fallo}]"
+        resultados[nombre] = asyncio.run(_entrega(args, almacen))
+        almacen.cerrar()
+
+    resultados = {k: v for k, v in resultados.items() if args.filtro in k}
+    for nombre, r in resultados.items():
+        print(f"{nombre:<48} {r['mediana_us']:>12.2f} µs  (min {r['min_us']:.2f}, x{r['llamadas']})")
+    return resultados
+
+
+def _configurar(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--chats", type=int, default=100, help="Chats suscritos (default 100)")
+    p.add_argument("--alertas", type=int, default=45,
+                   help="Alertas del monitor (default 45: > MAX_LOTE → varios mensajes por chat)")
+    p.add_argument("--fallo", type=float, default=0.1, help="Fracción de 502 del Bot API falso")
+
+
+if __name__ == "__main__":
+    main_cli("telegram", ejecutar, BASELINE, _configurar)
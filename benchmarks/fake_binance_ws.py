@@ -0,0 +1,109 @@
+# ============================================================
+# 🧪 TESLABTC.KG — benchmarks/fake_binance_ws.py
+# ============================================================
+# Binance falso (WebSocket combined streams + REST de klines) para
+# probar utils/binance_ws sin red:
+#   - ws://127.0.0.1:<puerto>/stream: registra cada SUBSCRIBE y empuja
+#     mensajes kline / bookTicker con el formato de Binance
+#   - cortar(): cierra todas las conexiones (simula la caída de Binance)
+#   - descargar(): sustituto de la REST (/api/v3/klines) para el
+#     KlineStore; serie determinista por open_time, hasta la vela actual
+# Uso: ver benchmarks/verificar_binance_ws.py
+# ============================================================
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from websockets.asyncio.server import ServerConnection, serve
+
+from utils.kline_store import INTERVALO_MS
+
+
+def vela_sintetica(t: int) -> Dict[str, Any]:
+    """Vela determinista para un open_time (misma t → misma vela)."""
+    base = 60_000 + (t // 60_000) % 500
+    return {"open_time": t, "open": base, "high": base + 5.0, "low": base - 5.0, "close": base + 1.0, "volume": 1.0}
+
+
+class FakeBinanceWS:
+    def __init__(self):
+        self.conexiones = 0
+        self.suscripciones: List[List[str]] = []
+        self.descargas: List[Dict[str, Any]] = []
+        self._clientes: Set[ServerConnection] = set()
+        self._servidor = None
+        self.puerto: Optional[int] = None
+
+    # ---------- servidor ----------
+    async def iniciar(self) -> str:
+        self._servidor = await serve(self._atender, "127.0.0.1", 0)
+        self.puerto = next(iter(self._servidor.sockets)).getsockname()[1]
+        return f"ws://127.0.0.1:{self.puerto}"
+
+    async def detener(self) -> None:
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+
+    async def _atender(self, ws: ServerConnection) -> None:
+        if ws.request.path != "/stream":
+            await ws.close(1008, "ruta desconocida")
+            return
+        self.conexiones += 1
+        self._clientes.add(ws)
+        try:
+            async for raw in ws:
+                msg = json.loads(raw)
+                if msg.get("method") == "SUBSCRIBE":
+                    self.suscripciones.append(list(msg.get("params", [])))
+                    await ws.send(json.dumps({"result": None, "id": msg.get("id")}))
+        except Exception:
+            pass
+        finally:
+            self._clientes.discard(ws)
+
+    async def esperar_clientes(self, n: int = 1, plazo_s: float = 10.0) -> bool:
+        limite = time.monotonic() + plazo_s
+        while len(self._clientes) < n and time.monotonic() < limite:
+            await asyncio.sleep(0.01)
+        return len(self._clientes) >= n
+
+    async def _difundir(self, stream: str, data: Dict[str, Any]) -> None:
+        raw = json.dumps({"stream": stream, "data": data})
+        for ws in list(self._clientes):
+            await ws.send(raw)
+
+    async def cortar(self) -> None:
+        for ws in list(self._clientes):
+            await ws.close(1001, "going away")
+
+    # ---------- mensajes ----------
+    async def enviar_kline(self, simbolo: str, intervalo: str, vela: Dict[str, Any], cerrada: bool = False) -> None:
+        t = int(vela["open_time"])
+        k = {
+            "t": t, "T": t + INTERVALO_MS[intervalo] - 1, "s": simbolo, "i": intervalo,
+            "o": str(vela["open"]), "c": str(vela["close"]), "h": str(vela["high"]),
+            "l": str(vela["low"]), "v": str(vela["volume"]), "x": cerrada,
+        }
+        await self._difundir(
+            f"{simbolo.lower()}@kline_{intervalo}",
+            {"e": "kline", "E": int(time.time() * 1000), "s": simbolo, "k": k},
+        )
+
+    async def enviar_book(self, simbolo: str, bid: float, ask: float) -> None:
+        await self._difundir(
+            f"{simbolo.lower()}@bookTicker",
+            {"u": 1, "s": simbolo, "b": str(bid), "B": "1", "a": str(ask), "A": "1"},
+        )
+
+    # ---------- REST ----------
+    async def descargar(self, simbolo: str, intervalo: str, limite: int, desde: Optional[int]) -> List[Dict[str, Any]]:
+        """Firma del Descargador del KlineStore: velas hasta la actual (abierta)."""
+        self.descargas.append({"simbolo": simbolo, "intervalo": intervalo, "limite": limite, "desde": desde})
+        paso = INTERVALO_MS[intervalo]
+        actual = int(time.time() * 1000) // paso * paso
+        inicio = actual - (limite - 1) * paso if desde is None else desde // paso * paso
+        return [vela_sintetica(t) for t in range(inicio, actual + 1, paso)][:limite]
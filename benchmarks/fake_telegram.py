@@ -0,0 +1,109 @@
+# ============================================================
+# 🧪 TESLABTC.KG — benchmarks/fake_telegram.py
+# ============================================================
+# Bot API de Telegram falso para probar y medir utils/telegram_outbox
+# sin red ni bot real:
+#   - POST /bot<token>/sendMessage con límites como los de Telegram:
+#     más de `limite_global` msg/s del bot o `limite_chat` msg/s por
+#     chat → 429 con parameters.retry_after
+#   - fallo: fracción de 502 aleatorios; latencia: retardo por petición
+#   - chat_id que empieza por "bloqueado" → 403 (bot bloqueado)
+#   - GET /_recibidos: mensajes aceptados por chat y contadores
+# Uso manual:
+#   python -m benchmarks.fake_telegram --puerto 8081
+#   TELEGRAM_API_BASE=http://127.0.0.1:8081 TELEGRAM_BOT_TOKEN=x uvicorn main:app
+# ============================================================
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class FakeTelegram:
+    def __init__(
+        self,
+        limite_global: int = 30,
+        limite_chat: int = 1,
+        fallo: float = 0.0,
+        latencia_s: float = 0.0,
+        semilla: int = 7,
+    ):
+        self.limite_global = limite_global
+        self.limite_chat = limite_chat
+        self.fallo = fallo
+        self.latencia_s = latencia_s
+        self._rnd = random.Random(semilla)
+        self._ventanas: Dict[str, Deque[float]] = defaultdict(deque)
+        self.recibidos: Dict[str, List[str]] = defaultdict(list)
+        self.peticiones = 0
+        self.limitadas = 0
+        self.fallidas = 0
+        self.app = self._crear_app()
+
+    def _excede(self, clave: str, limite: int, ahora: float) -> bool:
+        """Ventana deslizante de 1 s."""
+        v = self._ventanas[clave]
+        while v and v[0] <= ahora - 1.0:
+            v.popleft()
+        return len(v) >= limite
+
+    def _crear_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/bot{token}/sendMessage")
+        async def send_message(token: str, request: Request):
+            self.peticiones += 1
+            datos = await request.json()
+            chat = str(datos.get("chat_id"))
+            if self.latencia_s:
+                await asyncio.sleep(self.latencia_s)
+            if chat.startswith("bloqueado"):
+                return JSONResponse(
+                    {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"}, 403
+                )
+            if self._rnd.random() < self.fallo:
+                self.fallidas += 1
+                return JSONResponse({"ok": False, "error_code": 502, "description": "Bad Gateway"}, 502)
+
+            ahora = time.monotonic()
+            if self._excede("", self.limite_global, ahora) or self._excede(chat, self.limite_chat, ahora):
+                self.limitadas += 1
+                return JSONResponse(
+                    {"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1",
+                     "parameters": {"retry_after": 1}},
+                    429,
+                )
+            self._ventanas[""].append(ahora)
+            self._ventanas[chat].append(ahora)
+            self.recibidos[chat].append(datos.get("text", ""))
+            return {"ok": True, "result": {"message_id": self.peticiones, "chat": {"id": chat}}}
+
+        @app.get("/_recibidos")
+        async def recibidos():
+            return {
+                "peticiones": self.peticiones,
+                "limitadas": self.limitadas,
+                "fallidas": self.fallidas,
+                "chats": {c: len(m) for c, m in self.recibidos.items()},
+            }
+
+        return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    p = argparse.ArgumentParser(description="Bot API de Telegram falso")
+    p.add_argument("--puerto", type=int, default=8081)
+    p.add_argument("--fallo", type=float, default=0.0, help="Fracción de respuestas 502")
+    p.add_argument("--latencia", type=float, default=0.0, help="Retardo por petición (s)")
+    args = p.parse_args()
+    fake = FakeTelegram(fallo=args.fallo, latencia_s=args.latencia)
+    uvicorn.run(fake.app, host="127.0.0.1", port=args.puerto, log_level="warning")
@@ -0,0 +1,121 @@
+# ============================================================
+# ⏱️ TESLABTC.KG — benchmarks/medicion.py
+# ============================================================
+# Utilidades comunes de los benchmarks:
+#   - medir(): calibra el nº de llamadas por ronda y devuelve la
+#     mediana / mínimo en microsegundos por llamada
+#   - baseline JSON (--guardar) y comparación (--comparar) con umbral;
+#     se compara el mínimo por llamada (lo menos sensible al ruido)
+#   - main_cli(): argumentos comunes de todos los bench_*.py
+# ============================================================
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict
+
+OBJETIVO_RONDA_S = 0.05
+RONDAS = 7
+UMBRAL_DEFAULT = 0.25  # +25 % sobre el baseline → regresión
+
+
+def medir(fn: Callable[[], Any], rondas: int = RONDAS) -> Dict[str, float]:
+    """Tiempo por llamada de fn() en µs (mediana y mínimo de varias rondas)."""
+    llamadas = 1
+    while True:
+        t = time.perf_counter()
+        for _ in range(llamadas):
+            fn()
+        dt = time.perf_counter() - t
+        if dt >= OBJETIVO_RONDA_S or llamadas >= 1 << 20:
+            break
+        llamadas *= 2
+
+    tiempos = []
+    for _ in range(rondas):
+        t = time.perf_counter()
+        for _ in range(llamadas):
+            fn()
+        tiempos.append((time.perf_counter() - t) / llamadas * 1e6)
+    return {
+        "mediana_us": round(statistics.median(tiempos), 2),
+        "min_us": round(min(tiempos), 2),
+        "llamadas": llamadas,
+    }
+
+
+def guardar_baseline(ruta: str, resultados: Dict[str, Dict[str, float]]) -> None:
+    datos = {
+        "python": platform.python_version(),
+        "maquina": platform.machine(),
+        "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "resultados": resultados,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(datos, f, indent=2, ensure_ascii=False, sort_keys=True)
+
+
+def comparar(
+    ruta: str, resultados: Dict[str, Dict[str, float]], umbral: float, filtro: str = ""
+) -> int:
+    """Imprime la comparación contra el baseline. Devuelve nº de regresiones."""
+    with open(ruta, encoding="utf-8") as f:
+        base = json.load(f)["resultados"]
+
+    regresiones = 0
+    print(f"\n{'caso':<48} {'base min µs':>12} {'min µs':>12} {'ratio':>7}")
+    for caso, actual in resultados.items():
+        previo = base.get(caso)
+        if not previo:
+            print(f"{caso:<48} {'—':>12} {actual['min_us']:>12.2f}   (nuevo)")
+            continue
+        ratio = actual["min_us"] / previo["min_us"] if previo["min_us"] else 1.0
+        marca = ""
+        if ratio > 1 + umbral:
+            marca = "  ⚠️ REGRESIÓN"
+            regresiones += 1
+        elif ratio < 1 - umbral:
+            marca = "  ✅ mejora"
+        print(f"{caso:<48} {previo['min_us']:>12.2f} {actual['min_us']:>12.2f} {ratio:>7.2f}{marca}")
+    for caso in sorted(base.keys() - resultados.keys()):
+        if filtro in caso:
+            print(f"{caso:<48} (ya no se mide)")
+    return regresiones
+
+
+def main_cli(
+    nombre: str,
+    ejecutar: Callable[[argparse.Namespace], Dict[str, Dict[str, float]]],
+    baseline_default: str,
+    configurar: Callable[[argparse.ArgumentParser], None] = lambda p: None,
+) -> None:
+    p = argparse.ArgumentParser(description=f"Benchmarks TESLABTC.KG — {nombre}")
+    p.add_argument("--guardar", action="store_true", help="Escribe el baseline JSON")
+    p.add_argument("--comparar", action="store_true", help="Compara contra el baseline")
+    p.add_argument("--baseline", default=baseline_default, help="Ruta del baseline JSON")
+    p.add_argument("--umbral", type=float, default=UMBRAL_DEFAULT,
+                   help="Tolerancia relativa antes de marcar regresión (0.25 = +25 %%)")
+    p.add_argument("--filtro", default="", help="Sólo casos cuyo nombre contenga este texto")
+    configurar(p)
+    args = p.parse_args()
+
+    resultados = ejecutar(args)
+
+    if args.guardar:
+        guardar_baseline(args.baseline, resultados)
+        print(f"\n💾 Baseline guardado en {args.baseline}")
+    if args.comparar:
+        if not os.path.exists(args.baseline):
+            print(f"\n⛔ No existe el baseline {args.baseline} (ejecuta con --guardar)")
+            sys.exit(2)
+        regresiones = comparar(args.baseline, resultados, args.umbral, args.filtro)
+        if regresiones:
+            print(f"\n⚠️ {regresiones} regresión(es) por encima de +{args.umbral:.0%}")
+            sys.exit(1)
+        print("\n✅ Sin regresiones")
@@ -0,0 +1,51 @@
+# ============================================================
+# 🎲 TESLABTC.KG — benchmarks/sinteticos.py
+# ============================================================
+# Series OHLCV sintéticas y deterministas (misma semilla → mismas
+# velas) para medir sin red. Alterna regímenes de tendencia alcista,
+# bajista y rango para que la lógica estructural recorra todas sus
+# ramas.
+# ============================================================
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, List
+
+from utils.kline_store import INTERVALO_MS
+
+INICIO_MS = 1_704_067_200_000  # 2024-01-01 00:00 UTC
+TAMANOS = (120, 400, 1000, 5000)
+
+
+def serie_ohlcv(
+    n: int,
+    intervalo: str = "5m",
+    semilla: int = 1,
+    precio_inicial: float = 60_000.0,
+) -> List[Dict[str, Any]]:
+    """n velas en formato kline dict (open_time en ms, alineado al intervalo)."""
+    rnd = random.Random(f"{semilla}:{intervalo}:{n}")
+    paso = INTERVALO_MS[intervalo]
+    vol = 0.0015 * (paso / INTERVALO_MS["5m"]) ** 0.5
+
+    velas: List[Dict[str, Any]] = []
+    precio = precio_inicial
+    deriva = 0.0
+    for i in range(n):
+        if i % 150 == 0:
+            # Nuevo régimen: tendencia alcista, bajista o rango
+            deriva = rnd.choice((vol * 0.35, -vol * 0.35, 0.0))
+        o = precio
+        c = o * (1 + deriva + rnd.gauss(0, vol))
+        h = max(o, c) * (1 + abs(rnd.gauss(0, vol * 0.5)))
+        l = min(o, c) * (1 - abs(rnd.gauss(0, vol * 0.5)))
+        velas.append({
+            "open_time": INICIO_MS + i * paso,
+            "open": round(o, 2),
+            "high": round(h, 2),
+            "low": round(l, 2),
+            "close": round(c, 2),
+            "volume": round(rnd.uniform(5, 500), 3),
+        })
+        precio = c
+    return velas
@@ -0,0 +1,123 @@
+# ============================================================
+# ✅ TESLABTC.KG — benchmarks/verificar_binance_ws.py
+# ============================================================
+# Verificación de utils/binance_ws contra el Binance falso
+# (benchmarks/fake_binance_ws), sin red:
+#   python -m benchmarks.verificar_binance_ws        # exit 1 si algo falla
+# Recorre: suscripción + relleno inicial por REST, precio bookTicker,
+# vela en vivo, hueco → relleno incremental, caída → reconexión con
+# re-suscripción y relleno, y vela cerrada tras reconectar.
+# ============================================================
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from typing import Callable, List, Tuple
+
+import utils.binance_ws as binance_ws
+from benchmarks.fake_binance_ws import FakeBinanceWS, vela_sintetica
+from utils.kline_store import INTERVALO_MS, KlineStore
+
+SIMBOLO = "BTCUSDT"
+INTERVALO = "1m"
+PASO = INTERVALO_MS[INTERVALO]
+PLAZO_S = 10.0
+
+
+async def _esperar(cond: Callable[[], bool], plazo_s: float = PLAZO_S) -> bool:
+    limite = time.monotonic() + plazo_s
+    while not cond():
+        if time.monotonic() > limite:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+async def verificar() -> List[Tuple[str, bool]]:
+    fake = FakeBinanceWS()
+    binance_ws.BINANCE_WS_BASE = await fake.iniciar()
+    binance_ws.WS_SIMBOLOS = [SIMBOLO]
+    binance_ws.WS_INTERVALOS = [INTERVALO]
+    store = KlineStore(fake.descargar)
+    streams = [f"{SIMBOLO.lower()}@bookTicker", f"{SIMBOLO.lower()}@kline_{INTERVALO}"]
+    res: List[Tuple[str, bool]] = []
+
+    tarea = asyncio.create_task(binance_ws.ingesta_binance_loop(store))
+    try:
+        # 1) Conexión, SUBSCRIBE y relleno inicial por REST
+        ok = await fake.esperar_clientes(1) and await _esperar(
+            lambda: binance_ws.estado_ws()["conectado"] and bool(store.velas(SIMBOLO, INTERVALO))
+        )
+        res.append(("suscripción inicial", ok and fake.suscripciones == [streams]))
+        actual = int(time.time() * 1000) // PASO * PASO
+        res.append(("relleno inicial hasta la vela actual",
+                    store.velas(SIMBOLO, INTERVALO)[-1]["open_time"] >= actual))
+
+        # 2) bookTicker → precio en memoria (mid)
+        await fake.enviar_book(SIMBOLO, 100.0, 102.0)
+        res.append(("precio bookTicker", await _esperar(lambda: binance_ws.precio_en_vivo(SIMBOLO) == 101.0)))
+
+        # 3) Vela en vivo sobre el buffer
+        ultima = store.velas(SIMBOLO, INTERVALO)[-1]
+        await fake.enviar_kline(SIMBOLO, INTERVALO, {**ultima, "close": 12_345.0})
+        res.append(("vela en vivo", await _esperar(
+            lambda: store.velas(SIMBOLO, INTERVALO)[-1]["close"] == 12_345.0)))
+
+        # 4) Hueco: faltan 3 velas en el buffer → relleno incremental por REST
+        buf = store._buffers[(SIMBOLO, INTERVALO)]
+        perdidas = [buf.pop() for _ in range(3)][::-1]
+        descargas = len(fake.descargas)
+        await fake.enviar_kline(SIMBOLO, INTERVALO, {**perdidas[-1], "close": 54_321.0})
+        rellenado = await _esperar(
+            lambda: len(fake.descargas) > descargas
+            and [v["open_time"] for v in store.velas(SIMBOLO, INTERVALO)[-3:]]
+            == [v["open_time"] for v in perdidas]
+        )
+        res.append(("hueco → relleno REST incremental",
+                    rellenado and fake.descargas[descargas]["desde"] == buf[-4]["open_time"]))
+
+        # 5) Caída → sin precio en vivo, reconexión, re-suscripción y relleno
+        descargas = len(fake.descargas)
+        await fake.cortar()
+        caido = await _esperar(lambda: not binance_ws.estado_ws()["conectado"])
+        res.append(("caída detectada (precio en vivo anulado)",
+                    caido and binance_ws.precio_en_vivo(SIMBOLO) is None))
+        ok = await _esperar(
+            lambda: fake.conexiones == 2 and binance_ws.estado_ws()["conectado"]
+            and len(fake.descargas) > descargas
+        )
+        res.append(("reconexión + re-suscripción + relleno",
+                    ok and fake.suscripciones == [streams, streams]
+                    and binance_ws.estado_ws()["reconexiones"] == 1))
+
+        # 6) Tras reconectar: vela cerrada y nueva vela contigua
+        ultima = store.velas(SIMBOLO, INTERVALO)[-1]
+        siguiente = vela_sintetica(ultima["open_time"] + PASO)
+        await fake.enviar_kline(SIMBOLO, INTERVALO, ultima, cerrada=True)
+        await fake.enviar_kline(SIMBOLO, INTERVALO, siguiente)
+        res.append(("vela cerrada + siguiente tras reconectar", await _esperar(
+            lambda: store.velas(SIMBOLO, INTERVALO)[-1]["open_time"] == siguiente["open_time"])))
+        res.append(("sin errores de mensaje",
+                    not str(binance_ws.estado_ws()["ultimo_error"] or "").startswith("Mensaje")))
+    finally:
+        binance_ws.detener_ingesta()
+        tarea.cancel()
+        try:
+            await tarea
+        except asyncio.CancelledError:
+            pass
+        await fake.detener()
+    return res
+
+
+def main() -> None:
+    res = asyncio.run(verificar())
+    for nombre, ok in res:
+        print(f"{'✅' if ok else '⛔'} {nombre}")
+    if not all(ok for _, ok in res):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
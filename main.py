@@ -5,28 +5,56 @@
 # Compatible con intelligent_formatter v5.8 PRO FINAL
 # ============================================================
 
-VERSION_TESLA = "v5.3.1 PRO REAL MARKET"
+from utils.config_tesla import VERSION_TESLA
 
 print(f"🧠 TESLABTC.KG — {VERSION_TESLA}")
 
 import asyncio
+import json
+import os
 import random
+import time
 from datetime import datetime, timedelta, timezone
-from fastapi import FastAPI, Query, Request
+from fastapi import FastAPI, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 
 # ============================================================
 # 🧩 Imports Core
 # ============================================================
 from utils.price_utils import (
     obtener_precio,
-    obtener_klines_binance,
     sesion_ny_activa,
-    BINANCE_STATUS,
+    KLINE_STORE,
 )
-from utils.estructura_utils import evaluar_estructura
-from utils.live_monitor import live_monitor_loop, stop_monitor, get_alerts
+from utils.circuit_breaker import CERRADO, estado_breakers
+from utils.binance_ws import (
+    WS_HABILITADO,
+    WS_SIMBOLOS,
+    ingesta_binance_loop,
+    detener_ingesta,
+    estado_ws,
+)
+from utils.analisis_free import analizar_free
+from utils.live_monitor import MONITOR_SIMBOLOS, live_monitor_loop, stop_monitor, get_alerts
+from utils.http_client import iniciar_cliente_http, cerrar_cliente_http
+from utils.kline_archive import ARCHIVO, ARCHIVO_HABILITADO, archivar_loop
+from utils.backtest import backtest_premium
+from utils.fanout import en_pool
+from utils.stream_hub import HUB, TIPOS
+from utils.telegram_outbox import OUTBOX
+from utils.metricas import (
+    PETICIONES,
+    exportar,
+    gauge,
+    iniciar_etapas,
+    monitor_lag_loop,
+    registrar_colector,
+    server_timing,
+)
+from utils.token_store import ALMACEN
 from utils.token_utils import (
+    barrido_vencimientos_loop,
     generar_token,
     validar_token,
     liberar_token,
@@ -34,12 +62,16 @@ from utils.token_utils import (
 )
 
 # Nuevo analizador premium (v5.3.1)
-from utils.analisis_premium import generar_analisis_premium
+from utils.analisis_premium import (
+    obtener_analisis_premium,
+    estado_coalescencia,
+    refresco_premium_loop,
+    CACHE_PREMIUM,
+)
 
 # Formatter unificado
 from utils.intelligent_formatter import (
     construir_mensaje_operativo,
-    construir_mensaje_free,
     construir_contexto_detallado,
 )
 from conceptos_tesla import listar_conceptos, obtener_concepto
@@ -51,6 +83,45 @@ app = FastAPI(title="TESLABTC.KG", description="API TESLABTC.KG", version="5.3.1
 app.add_middleware(GZipMiddleware, minimum_size=600)
 TZ_COL = timezone(timedelta(hours=-5))
 
+
+# ============================================================
+# ⏱️ SERVER-TIMING + DURACIÓN POR RUTA
+# ============================================================
+@app.middleware("http")
+async def medir_peticion(request: Request, call_next):
+    etapas = iniciar_etapas()
+    t = time.perf_counter()
+    response = await call_next(request)
+    total = time.perf_counter() - t
+    # En respuestas en streaming sólo constan las etapas ya terminadas al enviar cabeceras
+    response.headers["Server-Timing"] = server_timing(etapas, total)
+    ruta = request.scope.get("route")
+    PETICIONES.observar(total, getattr(ruta, "path", "otra"), str(response.status_code))
+    return response
+
+
+def _metricas_estado() -> list:
+    cache = CACHE_PREMIUM.estado()
+    vuelos = estado_coalescencia()
+    breakers = estado_breakers()
+    return [
+        *gauge("teslabtc_cache_premium", "Cache premium: hits, misses y entradas",
+               {k: cache[k] for k in ("hits", "misses", "entradas")}, "tipo"),
+        *gauge("teslabtc_cache_premium_hit_ratio", "Proporción de hits del cache premium",
+               {"": cache["hit_ratio"]}),
+        *gauge("teslabtc_coalescencia", "Cálculos premium ejecutados, compartidos y en curso",
+               vuelos, "tipo"),
+        *gauge("teslabtc_upstream_abierto", "1 si el circuit breaker del upstream no está cerrado",
+               {n: b["estado"] != CERRADO for n, b in breakers.items()}, "fuente"),
+        *gauge("teslabtc_stream", "Clientes SSE/WebSocket, eventos publicados y descartados",
+               HUB.estado(), "tipo"),
+        *gauge("teslabtc_telegram", "Outbox de Telegram: pendientes, enviados, reintentos, descartados",
+               {k: v for k, v in OUTBOX.estado().items() if k != "activo"}, "tipo"),
+    ]
+
+
+registrar_colector(_metricas_estado)
+
 # ============================================================
 # ✨ FRASES MOTIVACIONALES (REFLEXIONES)
 # ============================================================
@@ -77,7 +148,7 @@ async def analizar(simbolo: str = "BTCUSDT", token: str | None = Query(None)):
     )
 
     # 💰 Obtener precio
-    precio_data = obtener_precio(simbolo)
+    precio_data = await obtener_precio(simbolo)
     precio = precio_data.get("precio", 0)
     fuente = precio_data.get("fuente", "Desconocida")
     precio_str = f"{precio:,.2f} USD" if precio else "⚙️ No disponible"
@@ -88,28 +159,7 @@ async def analizar(simbolo: str = "BTCUSDT", token: str | None = Query(None)):
     # ============================================================
     if nivel_usuario.lower() == "free":
         try:
-            h4 = obtener_klines_binance(simbolo, "4h", 120)
-            h1 = obtener_klines_binance(simbolo, "1h", 120)
-            m15 = obtener_klines_binance(simbolo, "15m", 120)
-
-            estructura = {
-                "H4 (macro)": evaluar_estructura(h4),
-                "H1 (intradía)": evaluar_estructura(h1),
-                "M15 (reacción)": evaluar_estructura(m15),
-            }
-
-            body_free = {
-                "fecha": fecha,
-                "nivel_usuario": "Free",
-                "sesión": sesion,
-                "activo": simbolo,
-                "precio_actual": precio_str,
-                "fuente_precio": fuente,
-                "estructura_detectada": estructura,
-                "conexion_binance": BINANCE_STATUS,
-            }
-
-            body_free["mensaje_formateado"] = construir_mensaje_free(body_free)
+            body_free = await analizar_free(simbolo, precio_data)
             return {"🧠 TESLABTC.KG": body_free}
 
         except Exception as e:
@@ -119,7 +169,7 @@ async def analizar(simbolo: str = "BTCUSDT", token: str | None = Query(None)):
     # 🧩 PREMIUM VERSION — análisis completo
     # ============================================================
     try:
-        analisis_premium = generar_analisis_premium(simbolo)
+        analisis_premium = await obtener_analisis_premium(simbolo)
         data = analisis_premium.get("🧠 TESLABTC.KG", analisis_premium)
 
         # Si no devuelve nada útil
@@ -149,6 +199,205 @@ async def analizar(simbolo: str = "BTCUSDT", token: str | None = Query(None)):
 
         fallback_body["mensaje_formateado"] = construir_mensaje_operativo(fallback_body)
         return {"🧠 TESLABTC.KG": fallback_body}
+# ============================================================
+# 📚 ENDPOINT LOTE — /analyze/batch
+# ============================================================
+# Varios símbolos en una sola llamada. Cada símbolo se calcula en
+# paralelo (descargas compartidas vía KLINE_STORE / cache / coalescencia)
+# y se devuelve en cuanto termina, una línea JSON por símbolo (NDJSON).
+# Sólo símbolos conocidos (SIMBOLOS_LOTE) y, sin token válido, como
+# mucho MAX_LOTE_SIN_TOKEN: cada símbolo nuevo cuesta descargas y memoria.
+MAX_SIMBOLOS_LOTE = 20
+MAX_LOTE_SIN_TOKEN = 2
+SIMBOLOS_LOTE = {
+    s.strip().upper()
+    for s in os.getenv("TESLABTC_LOTE_SIMBOLOS", ",".join([*WS_SIMBOLOS, *MONITOR_SIMBOLOS])).split(",")
+    if s.strip()
+}
+
+
+async def _analisis_simbolo(simbolo: str, premium: bool) -> dict:
+    try:
+        if not premium:
+            return {"simbolo": simbolo, "🧠 TESLABTC.KG": await analizar_free(simbolo)}
+        data = await obtener_analisis_premium(simbolo)
+        if not data.get("mensaje_formateado"):
+            data["mensaje_formateado"] = construir_mensaje_operativo(data)
+        return {"simbolo": simbolo, "🧠 TESLABTC.KG": data}
+    except Exception as e:
+        return {"simbolo": simbolo, "error": f"❌ Error en {simbolo}: {e}"}
+
+
+@app.get("/analyze/batch", tags=["TESLABTC Premium"])
+async def analizar_lote(
+    simbolos: str = Query("BTCUSDT", description="Lista separada por comas: BTCUSDT,ETHUSDT,..."),
+    token: str | None = Query(None),
+):
+    auth = validar_token(token) if token else None
+    valido = bool(auth and auth.get("estado") == "✅")
+    premium = valido and auth.get("nivel", "Free").lower() != "free"
+
+    # Sin duplicados, respetando el orden pedido
+    lista = list(dict.fromkeys(s.strip().upper() for s in simbolos.split(",") if s.strip()))
+    if not lista or len(lista) > MAX_SIMBOLOS_LOTE:
+        return {"error": f"❌ Envía entre 1 y {MAX_SIMBOLOS_LOTE} símbolos."}
+    desconocidos = [s for s in lista if s not in SIMBOLOS_LOTE]
+    if desconocidos:
+        return {"error": f"❌ Símbolos no soportados: {', '.join(desconocidos)}. Disponibles: {', '.join(sorted(SIMBOLOS_LOTE))}."}
+    if not valido and len(lista) > MAX_LOTE_SIN_TOKEN:
+        return {"error": f"⛔ Sin token válido el lote admite como mucho {MAX_LOTE_SIN_TOKEN} símbolos."}
+
+    async def _stream():
+        tareas = [asyncio.create_task(_analisis_simbolo(s, premium)) for s in lista]
+        try:
+            for terminada in asyncio.as_completed(tareas):
+                linea = await terminada
+                yield json.dumps(linea, ensure_ascii=False, default=str) + "\n"
+        finally:
+            for t in tareas:
+                t.cancel()
+
+    # Content-Encoding identity: GZip no debe acumular las líneas
+    return StreamingResponse(
+        _stream(),
+        media_type="application/x-ndjson",
+        headers={"Content-Encoding": "identity"},
+    )
+
+
+# ============================================================
+# 📣 STREAM — /stream/sse y /stream/ws
+# ============================================================
+# Empujan alertas del monitor y payloads premium nuevos en cuanto se
+# calculan (utils/stream_hub). Filtros: simbolos, intervalos, tipos
+# (alerta,premium). Token obligatorio; "premium" sólo con nivel Premium.
+# El token se revalida cada REVALIDAR_TOKEN_S con la conexión abierta:
+# si baja a Free deja de recibir "premium"; si vence o se revoca, se cierra.
+LATIDO_STREAM_S = 15.0
+REVALIDAR_TOKEN_S = 15.0
+
+
+def _lista(valor: str | None) -> list:
+    return [v for v in (valor or "").split(",") if v.strip()]
+
+
+def _acceso(token: str | None) -> list | None:
+    """Tipos de evento que el token puede recibir; None si no es válido."""
+    auth = validar_token(token) if token else None
+    if not auth or auth.get("estado") != "✅":
+        return None
+    premium = auth.get("nivel", "Free").lower() != "free"
+    return [t for t in TIPOS if premium or t != "premium"]
+
+
+def _suscribir(token: str | None, simbolos: list, intervalos: list, tipos: list):
+    """Suscripción en el HUB, o None si el token no da acceso a lo pedido."""
+    acceso = _acceso(token)
+    pedidos = [t for t in tipos if t in (acceso or ())] if tipos else acceso
+    if not pedidos:
+        return None
+    return HUB.suscribir(simbolos, intervalos, pedidos, permitidos=acceso)
+
+
+def _revalidar(sub, token: str | None) -> bool:
+    """
+    Re-aplica el acceso actual del token (vencido, revocado, Premium → Free).
+    False si ya no puede recibir nada: el llamador cierra la conexión.
+    """
+    acceso = _acceso(token)
+    if not acceso:
+        return False
+    sub.restringir(acceso)
+    return bool(sub.tipos)
+
+
+@app.get("/stream/sse", tags=["Stream"])
+async def stream_sse(
+    token: str | None = Query(None),
+    simbolos: str | None = Query(None, description="BTCUSDT,ETHUSDT (vacío = todos)"),
+    intervalos: str | None = Query(None, description="1h,4h (vacío = todos)"),
+    tipos: str | None = Query(None, description="alerta,premium (vacío = los permitidos)"),
+):
+    sub = _suscribir(token, _lista(simbolos), _lista(intervalos), _lista(tipos))
+    if sub is None:
+        return JSONResponse({"estado": "⛔", "mensaje": "Token inválido o sin acceso a esos eventos"}, 401)
+
+    async def _eventos():
+        try:
+            yield ": conectado\n\n"
+            revision = time.monotonic() + REVALIDAR_TOKEN_S
+            while True:
+                if time.monotonic() >= revision:
+                    if not _revalidar(sub, token):
+                        yield 'event: fin\ndata: {"motivo": "token"}\n\n'
+                        return
+                    revision = time.monotonic() + REVALIDAR_TOKEN_S
+                evento = await sub.siguiente(LATIDO_STREAM_S)
+                if evento is None:
+                    yield ": ping\n\n"
+                    continue
+                datos = json.dumps(evento, ensure_ascii=False, default=str)
+                seq = f"id: {evento['seq']}\n" if "seq" in evento else ""
+                yield f"{seq}event: {evento['tipo']}\ndata: {datos}\n\n"
+        finally:
+            HUB.cancelar(sub)
+
+    # Content-Encoding identity: GZip no debe acumular los eventos
+    return StreamingResponse(
+        _eventos(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Content-Encoding": "identity",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@app.websocket("/stream/ws")
+async def stream_ws(websocket: WebSocket):
+    """
+    Mismos parámetros que /stream/sse en la query. El cliente puede
+    cambiar filtros enviando {"simbolos": [...], "intervalos": [...], "tipos": [...]}.
+    """
+    q = websocket.query_params
+    token = q.get("token")
+    sub = _suscribir(token, _lista(q.get("simbolos")), _lista(q.get("intervalos")), _lista(q.get("tipos")))
+    if sub is None:
+        await websocket.close(code=4401)
+        return
+    await websocket.accept()
+
+    async def _filtros():
+        while True:
+            msg = await websocket.receive_json()
+            if isinstance(msg, dict):
+                # filtrar() nunca sale de los tipos que permite el token
+                sub.filtrar(msg.get("simbolos"), msg.get("intervalos"), msg.get("tipos"))
+
+    lector = asyncio.create_task(_filtros())
+    try:
+        revision = time.monotonic() + REVALIDAR_TOKEN_S
+        while True:
+            if time.monotonic() >= revision:
+                if not _revalidar(sub, token):
+                    await websocket.close(code=4401)
+                    break
+                revision = time.monotonic() + REVALIDAR_TOKEN_S
+            # El lector termina con WebSocketDisconnect: no esperar al latido
+            proximo = asyncio.ensure_future(sub.siguiente(LATIDO_STREAM_S))
+            await asyncio.wait({proximo, lector}, return_when=asyncio.FIRST_COMPLETED)
+            if lector.done():
+                proximo.cancel()
+                break
+            await websocket.send_json(proximo.result() or {"tipo": "ping"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        lector.cancel()
+        HUB.cancelar(sub)
+
+
 # ============================================================
 # 🧠 ENDPOINT CONTEXTO — /contexto
 # ============================================================
@@ -175,7 +424,7 @@ async def obtener_contexto(
         }
 
     # Reutilizamos el mismo análisis premium
-    analisis_premium = generar_analisis_premium(simbolo)
+    analisis_premium = await obtener_analisis_premium(simbolo)
     data = analisis_premium.get("🧠 TESLABTC.KG", analisis_premium)
 
     # Aseguramos que tenga estructura básica
@@ -249,29 +498,114 @@ async def admin_liberar_token(data: dict):
     return liberar_token(token)
 
 
+@app.post("/admin/cache/invalidar", tags=["Admin"])
+async def admin_invalidar_cache(data: dict):
+    token_admin = data.get("token_admin")
+    if token_admin != "admin-teslabtc-kg":
+        return {"estado": "⛔", "mensaje": "Token administrativo inválido"}
+    simbolo = data.get("simbolo")
+    borradas = CACHE_PREMIUM.invalidar(simbolo)
+    return {"estado": "✅", "mensaje": f"Cache premium invalidada ({borradas} entradas)"}
+
+
+@app.post("/admin/backtest", tags=["Admin"])
+async def admin_backtest(data: dict):
+    """Backtest de los escenarios premium sobre el archivo local (M5/H1/H4)."""
+    token_admin = data.get("token_admin")
+    if token_admin != "admin-teslabtc-kg":
+        return {"estado": "⛔", "mensaje": "Token administrativo inválido"}
+    simbolo = str(data.get("simbolo", "BTCUSDT")).upper()
+    desde, hasta = data.get("desde_ms"), data.get("hasta_ms")
+
+    def _leer():
+        return (
+            ARCHIVO.rango(simbolo, "5m", desde, hasta),
+            ARCHIVO.rango(simbolo, "1h", None, hasta),
+            ARCHIVO.rango(simbolo, "4h", None, hasta),
+        )
+
+    # mmap / makedirs fuera del event loop; sin /app/data → error claro
+    try:
+        m5, h1, h4 = await asyncio.to_thread(_leer)
+    except OSError as e:
+        return {"estado": "❌", "mensaje": f"Archivo de velas no disponible: {e}"}
+    if not len(m5):
+        return {"estado": "⚙️", "mensaje": f"Sin velas M5 archivadas para {simbolo}"}
+    res = await en_pool(backtest_premium, m5, h1, h4)
+    return {"estado": "✅", "simbolo": simbolo, **res}
+
+
+@app.post("/admin/telegram/suscribir", tags=["Admin"])
+async def admin_telegram_suscribir(data: dict):
+    """Alta/cambio de un chat para las alertas del monitor (simbolos vacío = todos)."""
+    if data.get("token_admin") != "admin-teslabtc-kg":
+        return {"estado": "⛔", "mensaje": "Token administrativo inválido"}
+    chat_id = data.get("chat_id")
+    if not chat_id:
+        return {"estado": "❌", "mensaje": "Falta chat_id"}
+    OUTBOX.suscribir(chat_id, data.get("simbolos"))
+    return {"estado": "✅", "mensaje": f"Chat {chat_id} suscrito", "telegram": OUTBOX.estado()}
+
+
+@app.post("/admin/telegram/cancelar", tags=["Admin"])
+async def admin_telegram_cancelar(data: dict):
+    if data.get("token_admin") != "admin-teslabtc-kg":
+        return {"estado": "⛔", "mensaje": "Token administrativo inválido"}
+    OUTBOX.cancelar(data.get("chat_id"))
+    return {"estado": "✅", "mensaje": f"Chat {data.get('chat_id')} eliminado"}
+
+
 @app.get("/health", tags=["Estado"])
 async def health_check():
     return {
         "status": "✅ OK",
         "servicio": "TESLABTC.KG",
-        "conexion_binance": BINANCE_STATUS,
+        "upstreams": estado_breakers(),
+        "binance_ws": estado_ws(),
+        "coalescencia": estado_coalescencia(),
+        "cache_premium": CACHE_PREMIUM.estado(),
+        "stream": HUB.estado(),
+        "telegram": OUTBOX.estado(),
+        "archivo_klines": ARCHIVO.estado(),
         "timestamp": datetime.now(TZ_COL).strftime("%Y-%m-%d %H:%M:%S"),
     }
 
 
+@app.get("/metrics", tags=["Estado"], response_class=PlainTextResponse)
+async def metrics():
+    """Métricas en formato de texto Prometheus."""
+    return PlainTextResponse(exportar(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.on_event("startup")
 async def startup_event():
-    asyncio.create_task(live_monitor_loop())
+    await iniciar_cliente_http()
+    app.state.lag_loop = asyncio.create_task(monitor_lag_loop())
+    app.state.vencimientos = asyncio.create_task(barrido_vencimientos_loop())
+    app.state.monitor = asyncio.create_task(live_monitor_loop())
+    app.state.refresco_premium = asyncio.create_task(refresco_premium_loop())
+    app.state.telegram = asyncio.create_task(OUTBOX.loop())
+    if WS_HABILITADO:
+        app.state.ingesta_ws = asyncio.create_task(ingesta_binance_loop(KLINE_STORE))
+    if ARCHIVO_HABILITADO:
+        app.state.archivo = asyncio.create_task(archivar_loop(KLINE_STORE, ARCHIVO))
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     stop_monitor()
+    detener_ingesta()
+    for nombre in ("ingesta_ws", "archivo", "lag_loop", "vencimientos", "monitor", "refresco_premium", "telegram"):
+        tarea = getattr(app.state, nombre, None)
+        if tarea:
+            tarea.cancel()
+    await cerrar_cliente_http()
+    ALMACEN.cerrar()
 
 
 @app.get("/monitor/status", tags=["Monitor"])
-async def monitor_status():
-    return get_alerts()
+async def monitor_status(desde: int = Query(0, description="Sólo alertas con seq mayor")):
+    return get_alerts(desde)
 
 
 @app.get("/monitor/stop", tags=["Monitor"])
@@ -289,9 +623,9 @@ async def home():
 # 🔁 ALIAS COMPATIBILIDAD (para BOT antiguo)
 # ============================================================
 @app.get("/analisis/premium", tags=["Compatibilidad"])
-async def analisis_premium_alias():
+async def analisis_premium_alias(simbolo: str = "BTCUSDT"):
     try:
-        analisis = generar_analisis_premium("BTCUSDT")
+        analisis = await obtener_analisis_premium(simbolo)
         return {"🧠 TESLABTC.KG": analisis}
     except Exception as e:
         return {"error": f"❌ Error en alias /analisis/premium: {e}"}
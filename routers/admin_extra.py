@@ -5,7 +5,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, constr
 import os, json
-from utils.token_utils import TOKENS, _save_tokens, liberar_token
+from utils.token_utils import liberar_usuario
 
 router = APIRouter(prefix="/admin", tags=["Admin Extra"])
 
@@ -54,10 +54,6 @@ class DeleteUserIn(BaseModel):
 @router.post("/delete_user")
 def delete_user(payload: DeleteUserIn):
     user_id = str(payload.user_id)
-    encontrados = [t for t, d in TOKENS.items() if d["usuario"] == user_id]
-    if not encontrados:
+    if not liberar_usuario(user_id):
         raise HTTPException(status_code=404, detail="Usuario no encontrado o sin token activo.")
-    for t in encontrados:
-        liberar_token(t)
-    _save_tokens()
     return {"estado": "✅", "mensaje": f"Usuario {user_id} y tokens eliminados correctamente."}
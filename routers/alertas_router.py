@@ -4,8 +4,8 @@ from utils.price_utils import obtener_precio
 router = APIRouter()
 
 @router.get("/precio/{simbolo}", tags=["Alertas"])
-def get_precio(simbolo: str):
-    precio = obtener_precio(simbolo)
+async def get_precio(simbolo: str):
+    precio = await obtener_precio(simbolo)
     if precio == 0.0:
         return {"simbolo": simbolo.upper(), "precio": "⚙️ No disponible (sin lectura en vivo)"}
     return {"simbolo": simbolo.upper(), "precio": precio}
@@ -4,7 +4,7 @@
 from __future__ import annotations
 from fastapi import APIRouter, Request
 from datetime import datetime, timezone, timedelta
-from utils.analisis_premium import generar_analisis_premium
+from utils.analisis_premium import obtener_analisis_premium
 from utils.intelligent_formatter import construir_mensaje_free
 
 router = APIRouter(prefix="/analizar", tags=["TESLABTC"])
@@ -28,7 +28,8 @@ async def analizar(request: Request):
     is_premium = bool(token)
 
     if is_premium:
-        payload = generar_analisis_premium("BTCUSDT")
+        simbolo = request.query_params.get("simbolo", "BTCUSDT")
+        payload = await obtener_analisis_premium(simbolo)
         return {"🧠 TESLABTC.KG": payload}
     else:
         free = _analisis_free_stub()
@@ -4,7 +4,7 @@
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from utils.token_utils import TOKENS, _save_tokens
+from utils.token_utils import liberar_usuario
 
 router = APIRouter(prefix="/auth", tags=["Auth Extra"])
 
@@ -14,10 +14,6 @@ class LogoutIn(BaseModel):
 @router.post("/logout")
 def logout(payload: LogoutIn):
     user_id = str(payload.user_id)
-    encontrados = [t for t, d in TOKENS.items() if d["usuario"] == user_id]
-    if not encontrados:
+    if not liberar_usuario(user_id):
         raise HTTPException(status_code=404, detail="Usuario no encontrado o sin sesión activa.")
-    for t in encontrados:
-        TOKENS.pop(t, None)
-    _save_tokens()
     return {"estado": "✅", "mensaje": f"Sesión de {user_id} cerrada correctamente."}
@@ -7,12 +7,12 @@ from utils.price_utils import (
 router = APIRouter()
 
 @router.get("/", tags=["TESLABTC"])  # ← ruta raíz
-def confirmaciones_teslabtc():
+async def confirmaciones_teslabtc():
     """Validaciones PA pura TESLABTC.KG"""
     ahora_col = datetime.now(TZ_COL)
-    precio = obtener_precio("BTCUSDT")
-    velas_h1 = obtener_klines_binance("BTCUSDT", "1h", 120)
-    velas_m15 = obtener_klines_binance("BTCUSDT", "15m", 120)
+    precio = await obtener_precio("BTCUSDT")
+    velas_h1 = await obtener_klines_binance("BTCUSDT", "1h", 120)
+    velas_m15 = await obtener_klines_binance("BTCUSDT", "15m", 120)
 
     estructura = detectar_estructura(velas_h1 or [])
     sesion = "✅ Activa" if sesion_ny_activa() else "❌ Fuera de sesión"
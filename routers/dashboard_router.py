@@ -14,13 +14,13 @@ from datetime import datetime
 router = APIRouter()
 
 @router.get("/", tags=["Dashboard TESLABTC"])  # ← ruta raíz
-def dashboard_teslabtc():
+async def dashboard_teslabtc():
     """Panel analítico general TESLABTC.KG"""
     ahora = datetime.now(TZ_COL)
     fecha = ahora.strftime("%Y-%m-%d %H:%M:%S")
 
-    precio = obtener_precio("BTCUSDT")
-    pd = _pdh_pdl("BTCUSDT")
+    precio = await obtener_precio("BTCUSDT")
+    pd = await _pdh_pdl("BTCUSDT")
 
     return {
         "dashboard": {
@@ -0,0 +1,90 @@
+# ============================================================
+# 🧊 TESLABTC.KG — utils/analisis_cache.py
+# ============================================================
+# Cache del payload premium por símbolo:
+#   - Cada entrada vence en el próximo cierre de vela M5 posterior al
+#     INICIO del cálculo (no al momento de guardarlo)
+#   - Entre cierres puede parchear "precio_actual" con el precio en vivo
+#   - Invalidación explícita (por símbolo o total)
+#   - Como mucho MAX_ENTRADAS símbolos: se expulsa el menos usado (LRU)
+#   - Contadores hit/miss para /health
+# ============================================================
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+M5_MS = 5 * 60_000
+MAX_ENTRADAS = 64
+
+
+class AnalisisCache:
+    def __init__(
+        self,
+        intervalo_ms: int = M5_MS,
+        precio_vivo: Optional[Callable[[str], Optional[float]]] = None,
+        max_entradas: int = MAX_ENTRADAS,
+    ):
+        self.intervalo_ms = intervalo_ms
+        self.precio_vivo = precio_vivo
+        self.max_entradas = max_entradas
+        # dict en orden de uso: el primero es el menos usado
+        self._entradas: Dict[str, Tuple[Dict[str, Any], int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _proximo_cierre(self, ahora_ms: int) -> int:
+        return (ahora_ms // self.intervalo_ms + 1) * self.intervalo_ms
+
+    def obtener(self, simbolo: str, parchear_precio: bool = True) -> Optional[Dict[str, Any]]:
+        simbolo = simbolo.upper()
+        entrada = self._entradas.get(simbolo)
+        ahora_ms = int(time.time() * 1000)
+        if entrada is None or ahora_ms >= entrada[1]:
+            self._entradas.pop(simbolo, None)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entradas[simbolo] = self._entradas.pop(simbolo)   # al final: usado hace poco
+        payload = dict(entrada[0])
+        if parchear_precio and self.precio_vivo:
+            precio = self.precio_vivo(simbolo)
+            if precio is not None:
+                payload["precio_actual"] = f"{precio:,.2f} USD"
+                payload["fuente_precio"] = "Binance (WS)"
+        return payload
+
+    def guardar(self, simbolo: str, payload: Dict[str, Any], desde_ms: Optional[int] = None) -> bool:
+        """
+        `desde_ms`: cuándo empezó el cálculo (sus datos son de ese momento).
+        Vence en el cierre de M5 siguiente a ESE instante: un cálculo que
+        cruzó un cierre ya nace viejo y no se guarda. Devuelve si se guardó.
+        """
+        simbolo = simbolo.upper()
+        ahora_ms = int(time.time() * 1000)
+        vence = self._proximo_cierre(ahora_ms if desde_ms is None else min(desde_ms, ahora_ms))
+        self._entradas.pop(simbolo, None)
+        if vence <= ahora_ms:
+            return False
+        self._entradas[simbolo] = (payload, vence)
+        while len(self._entradas) > self.max_entradas:
+            self._entradas.pop(next(iter(self._entradas)))
+        return True
+
+    def invalidar(self, simbolo: Optional[str] = None) -> int:
+        """Borra un símbolo (o todo si simbolo es None). Devuelve cuántas entradas se borraron."""
+        if simbolo is None:
+            n = len(self._entradas)
+            self._entradas.clear()
+            return n
+        return 1 if self._entradas.pop(simbolo.upper(), None) is not None else 0
+
+    def estado(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entradas": len(self._entradas),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -2,14 +2,17 @@
 # 🧠 TESLABTC.KG — Análisis Estructural Real (Multi-TF)
 # ============================================================
 
-from utils.price_utils import obtener_klines_binance
+from utils.price_utils import obtener_klines_binance, obtener_datos_sesion_colombia
+from utils.fanout import reunir_con_plazo
 from utils.estructura_utils import detectar_bos, detectar_ob
 from datetime import datetime
 
+PLAZO_FETCH_S = 10.0  # plazo común para todas las descargas multi-TF
+
 # ============================================================
 # FUNCIÓN PRINCIPAL
 # ============================================================
-def analizar_estructura_general(simbolo="BTCUSDT"):
+async def analizar_estructura_general(simbolo="BTCUSDT"):
     """
     Analiza estructura D / H4 / H1 + confirma zonas, liquidez y contexto macro.
     Devuelve dict con:
@@ -17,15 +20,24 @@ def analizar_estructura_general(simbolo="BTCUSDT"):
     - zonas
     - confirmaciones
     - contexto_general
+    - debug (tiempos de descarga por temporalidad)
     """
 
     # ===============================
     # 📊 DATOS MULTITF
     # ===============================
-    kl_d = obtener_klines_binance(simbolo, "1d", 300)
-    kl_h4 = obtener_klines_binance(simbolo, "4h", 300)
-    kl_h1 = obtener_klines_binance(simbolo, "1h", 300)
-    kl_m5 = obtener_klines_binance(simbolo, "5m", 300)
+    datos, tiempos_ms = await reunir_con_plazo(
+        {
+            "D": obtener_klines_binance(simbolo, "1d", 300),
+            "H4": obtener_klines_binance(simbolo, "4h", 300),
+            "H1": obtener_klines_binance(simbolo, "1h", 300),
+            "M5": obtener_klines_binance(simbolo, "5m", 300),
+            "sesion": obtener_datos_sesion_colombia(simbolo),
+        },
+        PLAZO_FETCH_S,
+        por_defecto={"D": [], "H4": [], "H1": [], "M5": [], "sesion": {}},
+    )
+    kl_d, kl_h4, kl_h1, kl_m5 = datos["D"], datos["H4"], datos["H1"], datos["M5"]
 
     # ===============================
     # 🧭 ESTRUCTURA BÁSICA
@@ -66,8 +78,7 @@ def analizar_estructura_general(simbolo="BTCUSDT"):
     # ===============================
     # 📍 ZONAS — Ajustadas a horario Colombia (7PM–7PM y 5PM–2AM)
     # ===============================
-    from utils.price_utils import obtener_datos_sesion_colombia
-    pd = obtener_datos_sesion_colombia(simbolo)
+    pd = datos["sesion"]
 
     zonas = {
         "PDH": pd.get("PDH"),
@@ -144,4 +155,5 @@ def analizar_estructura_general(simbolo="BTCUSDT"):
         "zonas": zonas,
         "confirmaciones": confs,
         "contexto_general": contexto,
+        "debug": {"tiempos_fetch_ms": tiempos_ms, "plazo_fetch_s": PLAZO_FETCH_S},
     }
@@ -1,10 +1,22 @@
 # ============================================================
 # 📊 analisis_free.py — TESLABTC.KG (versión Free reducida)
 # Mantiene mensaje resumido y claves mínimas para tu bot.
+# analizar_free(): versión real (H4/H1/M15) usada por /analyze y /analyze/batch
 # ============================================================
 
-from datetime import datetime
-from utils.price_utils import sesion_ny_activa
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from utils.price_utils import (
+    sesion_ny_activa, obtener_precio, obtener_klines_binance, estado_binance
+)
+from utils.estructura_utils import evaluar_estructura
+from utils.fanout import en_pool
+from utils.intelligent_formatter import construir_mensaje_free
+from utils.metricas import etapa, medir_etapa
+
+TZ_COL = timezone(timedelta(hours=-5))
 
 def _fmt_usd(x: float) -> str:
     try:
@@ -43,3 +55,52 @@ def generar_analisis_free(precio_actual: float) -> dict:
         "escenario_1": "🔒 Desbloquea con Premium",
         "escenario_2": "🔒 Desbloquea con Premium",
     }
+
+
+@medir_etapa("estructura")
+def _estructura_free(h4, h1, m15) -> Dict[str, Any]:
+    return {
+        "H4 (macro)": evaluar_estructura(h4),
+        "H1 (intradía)": evaluar_estructura(h1),
+        "M15 (reacción)": evaluar_estructura(m15),
+    }
+
+
+async def analizar_free(
+    simbolo: str = "BTCUSDT", precio_data: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Estructura resumida H4/H1/M15 para usuarios Free.
+    Descarga velas (y precio si no viene) en paralelo; la estructura
+    se calcula en el pool de workers.
+    """
+    fecha = datetime.now(TZ_COL).strftime("%d/%m/%Y %H:%M:%S")
+    descargas = [
+        obtener_klines_binance(simbolo, "4h", 120),
+        obtener_klines_binance(simbolo, "1h", 120),
+        obtener_klines_binance(simbolo, "15m", 120),
+    ]
+    if precio_data is None:
+        descargas.append(obtener_precio(simbolo))
+    with etapa("fetch"):
+        h4, h1, m15, *resto = await asyncio.gather(*descargas)
+    if resto:
+        precio_data = resto[0]
+
+    precio = precio_data.get("precio", 0)
+    fuente = precio_data.get("fuente", "Desconocida")
+    precio_str = f"{precio:,.2f} USD" if precio else "⚙️ No disponible"
+    sesion = "✅ Activa (Sesión NY)" if sesion_ny_activa() else "❌ Cerrada (Fuera de NY)"
+
+    body_free = {
+        "fecha": fecha,
+        "nivel_usuario": "Free",
+        "sesión": sesion,
+        "activo": simbolo,
+        "precio_actual": precio_str,
+        "fuente_precio": fuente,
+        "estructura_detectada": await en_pool(_estructura_free, h4, h1, m15),
+        "conexion_binance": estado_binance(),
+    }
+    body_free["mensaje_formateado"] = construir_mensaje_free(body_free)
+    return body_free
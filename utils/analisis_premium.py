@@ -1,4 +1,3 @@
-from main import VERSION_TESLA
 # ============================================================
 # 🧠 TESLABTC.KG — Análisis Premium (v5.3.1 PRO REAL MARKET)
 # ============================================================
@@ -9,14 +8,35 @@ from main import VERSION_TESLA
 #   - Sin PDH/PDL/Asia aquí; solo acción del precio y premium
 # ============================================================
 
-import requests
+import asyncio
+import os
 import random
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
 import pytz  # por compatibilidad, aunque no se use directamente
 
+from utils.config_tesla import VERSION_TESLA
+
 from utils.estructura_utils import detectar_bos, evaluar_estructura
+from utils.http_client import http_get
+from utils.price_utils import KLINE_STORE
+from utils.binance_ws import WS_SIMBOLOS, precio_en_vivo
+from utils.single_flight import SingleFlight
+from utils.analisis_cache import M5_MS, AnalisisCache
+from utils.fanout import en_pool, reunir_con_plazo
+from utils.metricas import etapa
+from utils.stream_hub import HUB
+from utils.velas import Velas, a_velas
+from utils.pivotes import indices_pivote
+from utils.zigzag import ZigZag
+from utils.escenarios_premium import (
+    poi_fibo_band as _poi_fibo_band,
+    niveles_scalping,
+    niveles_swing,
+    bos_a_favor,
+)
 
 
 # ------------------------------
@@ -25,6 +45,8 @@ from utils.estructura_utils import detectar_bos, evaluar_estructura
 TZ_COL = timezone(timedelta(hours=-5))
 BINANCE_REST_BASE = "https://api.binance.com"
 UA = {"User-Agent": "teslabtc-kg/5.3.1"}
+PLAZO_FETCH_S = 8.0  # plazo común para precio + velas H4/H1/M5
+VELAS_VACIAS = Velas.desde_klines([])
 
 # ============================================================
 # 🧠 Reflexiones TESLABTC
@@ -43,9 +65,12 @@ REFLEXIONES = [
 # ------------------------------------------------------------
 # 🔹 Utilidades base (precio + klines)
 # ------------------------------------------------------------
-def _safe_get_price(symbol: str = "BTCUSDT") -> Tuple[Optional[float], str]:
+async def _safe_get_price(symbol: str = "BTCUSDT") -> Tuple[Optional[float], str]:
+    vivo = precio_en_vivo(symbol)
+    if vivo is not None:
+        return vivo, "Binance (WS)"
     try:
-        r = requests.get(
+        r = await http_get(
             f"{BINANCE_REST_BASE}/api/v3/ticker/price",
             params={"symbol": symbol},
             headers=UA,
@@ -58,57 +83,39 @@ def _safe_get_price(symbol: str = "BTCUSDT") -> Tuple[Optional[float], str]:
         return None, f"Error precio: {e}"
 
 
-def _safe_get_klines(
+async def _safe_get_klines(
     symbol: str, interval: str = "15m", limit: int = 500
-) -> List[Dict[str, Any]]:
+) -> Velas:
+    """Velas (columnar) desde el KLINE_STORE compartido (refresco incremental)."""
     try:
-        r = requests.get(
-            f"{BINANCE_REST_BASE}/api/v3/klines",
-            params={"symbol": symbol, "interval": interval, "limit": limit},
-            headers=UA,
-            timeout=8,
-        )
-        r.raise_for_status()
-        data = r.json()
-        return [
-            {
-                "open_time": datetime.utcfromtimestamp(k[0] / 1000.0),
-                "open": float(k[1]),
-                "high": float(k[2]),
-                "low": float(k[3]),
-                "close": float(k[4]),
-                "vol": float(k[5]),
-            }
-            for k in data
-        ]
+        data = await KLINE_STORE.obtener(symbol, interval, limit)
+        return Velas.desde_klines(data)
     except Exception:
-        return []
+        return Velas.desde_klines([])
 
 
 # ------------------------------------------------------------
 # 🔹 Pivotes ZigZag y tendencia
 # ------------------------------------------------------------
-def _pivotes(kl: List[Dict[str, Any]], look: int = 2) -> Tuple[List[int], List[int]]:
+def _pivotes(kl, look: int = 2) -> Tuple[List[int], List[int]]:
+    """Pivotes estrictos a ambos lados (motor O(n) de utils/pivotes)."""
     if not kl or len(kl) < (look * 2 + 1):
         return [], []
-    hi_idx: List[int] = []
-    lo_idx: List[int] = []
-    for i in range(look, len(kl) - look):
-        h = kl[i]["high"]
-        l = kl[i]["low"]
-        if all(h > kl[i - j]["high"] for j in range(1, look + 1)) and all(
-            h > kl[i + j]["high"] for j in range(1, look + 1)
-        ):
-            hi_idx.append(i)
-        if all(l < kl[i - j]["low"] for j in range(1, look + 1)) and all(
-            l < kl[i + j]["low"] for j in range(1, look + 1)
-        ):
-            lo_idx.append(i)
-    return hi_idx, lo_idx
+    v = a_velas(kl)
+    return indices_pivote(v.high, v.low, look, izq_estricto=True, der_estricto=True)
+
+
+def _zigzag(kl, depth: int, deviation: float, backstep: int) -> Optional[ZigZag]:
+    """ZigZag en streaming sobre las velas; None si no hay historial suficiente."""
+    if not kl or len(kl) < (depth * 2 + 5):
+        return None
+    zz = ZigZag(depth=depth, deviation=deviation, backstep=backstep)
+    zz.consumir(a_velas(kl))
+    return zz
 
 
 def _zigzag_pivots(
-    kl: List[Dict[str, Any]],
+    kl,
     depth: int = 12,
     deviation: float = 5.0,
     backstep: int = 2,
@@ -116,140 +123,27 @@ def _zigzag_pivots(
     if not kl or len(kl) < (depth * 2 + 5):
         return []
 
-    hi_idx, lo_idx = _pivotes(kl, look=depth)
-
-    cands: List[Tuple[int, str, float]] = []
-    for i in hi_idx:
-        cands.append((i, "H", float(kl[i]["high"])))
-    for i in lo_idx:
-        cands.append((i, "L", float(kl[i]["low"])))
-
-    cands.sort(key=lambda x: x[0])
-
+    zz = ZigZag(depth=depth, deviation=deviation, backstep=backstep)
     pivots: List[Tuple[int, str, float]] = []
-    for i, t, p in cands:
-        if not pivots:
-            pivots.append((i, t, p))
-            continue
-
-        li, lt, lp = pivots[-1]
-
-        # mismo tipo de pivote
-        if t == lt:
-            if (i - li) <= backstep:
-                if (t == "H" and p > lp) or (t == "L" and p < lp):
-                    pivots[-1] = (i, t, p)
-            else:
-                if (t == "H" and p > lp) or (t == "L" and p < lp):
-                    pivots[-1] = (i, t, p)
-            continue
-
-        # pivote opuesto con desviación mínima
-        if lp != 0:
-            move_pct = abs((p - lp) / lp) * 100.0
-        else:
-            move_pct = 999.0
-
-        if move_pct >= deviation:
-            pivots.append((i, t, p))
-
+    for evento, piv in zz.consumir(a_velas(kl)):
+        if evento == "pivote":
+            pivots.append(piv)
+        elif evento == "repintado":
+            pivots[-1] = piv
     return pivots
 
 
 def _detectar_tendencia_zigzag(
-    kl: List[Dict[str, Any]],
+    kl,
     depth: int = 12,
     deviation: float = 5.0,
     backstep: int = 2,
 ) -> Dict[str, Any]:
-    piv = _zigzag_pivots(kl, depth=depth, deviation=deviation, backstep=backstep)
-    if not kl or len(piv) < 3:
+    zz = _zigzag(kl, depth, deviation, backstep)
+    if zz is None:
         return {"estado": "lateral", "BOS": "—"}
+    return zz.tendencia()
 
-    highs = [(i, p) for (i, t, p) in piv if t == "H"]
-    lows = [(i, p) for (i, t, p) in piv if t == "L"]
-
-    if len(highs) < 2 or len(lows) < 2:
-        idx_prev, tipo_prev, price_prev = piv[-2]
-        idx_last, tipo_last, price_last = piv[-1]
-
-        if tipo_prev == "L" and tipo_last == "H":
-            estado = "alcista"
-        elif tipo_prev == "H" and tipo_last == "L":
-            estado = "bajista"
-        else:
-            estado = "lateral"
-
-        return {
-            "estado": estado,
-            "BOS": "—",
-            "ultimo_pivote": price_last,
-            "pivotes": [
-                (idx_prev, tipo_prev, price_prev),
-                (idx_last, tipo_last, price_last),
-            ],
-        }
-
-    _, h1 = highs[-2]
-    _, h2 = highs[-1]
-    _, l1 = lows[-2]
-    _, l2 = lows[-1]
-
-    if h2 > h1 and l2 > l1:
-        estado = "alcista"
-        bos = "✔️"
-    elif h2 < h1 and l2 < l1:
-        estado = "bajista"
-        bos = "✔️"
-    else:
-        estado = "lateral"
-        bos = "—"
-
-    _, _, price_last = piv[-1]
-
-    return {
-        "estado": estado,
-        "BOS": bos,
-        "HH": h2,
-        "LH": h1,
-        "LL": l2,
-        "HL": l1,
-        "ultimo_pivote": price_last,
-        "pivotes": piv[-6:],
-    }
-
-def _poi_fibo_band(
-    estado: Optional[str],
-    hi: Optional[float],
-    lo: Optional[float],
-) -> Optional[Tuple[float, float]]:
-    """
-    Devuelve la banda 61.8–88.6 % de retroceso del último impulso H4.
-
-    Regla TESLABTC:
-      - En alcista: impulso low→high, pero la zona de reacción es el
-        retroceso desde el HIGH hacia el LOW (descuento).
-      - En bajista: impulso high→low, y la zona de reacción es el
-        retroceso desde el HIGH hacia el LOW (pullback para vender).
-
-    Matemáticamente, para ambos casos usamos la misma banda anclada al HIGH.
-    """
-    if hi is None or lo is None or hi == lo:
-        return None
-
-    hi = float(hi)
-    lo = float(lo)
-    rango = hi - lo
-    if rango <= 0:
-        return None
-
-    # Niveles de retroceso medidos desde el HIGH hacia el LOW
-    lvl_618 = hi - 0.618 * rango
-    lvl_886 = hi - 0.886 * rango
-
-    banda_low = min(lvl_886, lvl_618)
-    banda_high = max(lvl_886, lvl_618)
-    return round(banda_low, 2), round(banda_high, 2)
 # ------------------------------------------------------------
 # 🔹 Filtro de tamaño de SL para scalping
 # ------------------------------------------------------------
@@ -291,10 +185,73 @@ def _evaluar_riesgo_sl(entry: Optional[float], sl: Optional[float], riesgo_base:
     except Exception:
         return riesgo_base, False, None, None
 
+# (dirección, contexto) de cada bloque de scalping según H1
+_TEXTOS_SCALPING: Dict[str, Dict[str, Tuple[str, str]]] = {
+    "alcista": {
+        "cont": (
+            "ALCISTA (a favor de H1)",
+            "SCALPING a favor de H1: entrada por ruptura del HIGH/LOW M5, "
+            "SL en el extremo opuesto de M5, TP1 1:1 (mover a BE) y TP2 1:2.",
+        ),
+        "corr": (
+            "BAJISTA (contra H1)",
+            "SCALPING de corrección: venta contra la estructura de H1, "
+            "solo si hay agotamiento claro y confirmación limpia.",
+        ),
+    },
+    "bajista": {
+        "cont": (
+            "BAJISTA (a favor de H1)",
+            "SCALPING a favor de H1: venta por ruptura del LOW M5, "
+            "SL en el HIGH M5 previo, TP1 1:1 (BE) y TP2 1:2.",
+        ),
+        "corr": (
+            "ALCISTA (contra H1)",
+            "SCALPING de corrección: compra contra la estructura de H1, "
+            "solo si hay agotamiento claro y confirmación limpia.",
+        ),
+    },
+    "rango": {
+        "cont": (
+            "ALCISTA (rango H1)",
+            "SCALPING en rango: ruptura del HIGH M5 dentro del rango de H1; "
+            "se trabaja la liquidez superior con tamaño controlado.",
+        ),
+        "corr": (
+            "BAJISTA (rango H1)",
+            "SCALPING en rango: ruptura del LOW M5 dentro del rango de H1; "
+            "se trabaja el breakout bajista con tamaño controlado.",
+        ),
+    },
+}
+
+
+def _bloque_scalping(
+    nivel: Dict[str, Any], riesgo_base: str, direccion: str, contexto: str
+) -> Dict[str, Any]:
+    """Niveles numéricos → bloque de texto del payload (scalping)."""
+    riesgo, alerta_sl, dist_sl, pct_sl = _evaluar_riesgo_sl(
+        nivel["entry"], nivel["sl"], riesgo_base
+    )
+    r = nivel["r"]
+    return {
+        "activo": True,
+        "direccion": direccion,
+        "riesgo": riesgo,
+        "zona_reaccion": f"{nivel['entry']:,.2f}",
+        "sl": f"{nivel['sl']:,.2f}",
+        "tp1_rr": f"{nivel['tp1']:,.2f}" if r > 0 else "—",
+        "tp2_rr": f"{nivel['tp2']:,.2f}" if r > 0 else "—",
+        "sl_alerta": alerta_sl,
+        "sl_dist": dist_sl,
+        "sl_pct": pct_sl,
+        "contexto": contexto,
+    }
+
 # ------------------------------------------------------------
 # 🔹 Sesiones (Asia, Londres, NY)
 # ------------------------------------------------------------
-def _estado_sesiones() -> Tuple[str, Dict[str, bool]]:
+def _estado_sesiones(ahora: Optional[datetime] = None) -> Tuple[str, Dict[str, bool]]:
     """
     Devuelve:
       - Texto de la sesión actual
@@ -304,7 +261,7 @@ def _estado_sesiones() -> Tuple[str, Dict[str, bool]]:
       • LONDRES: 02:00 – 11:00
       • NY:      07:00 – 15:00
     """
-    ahora = datetime.now(TZ_COL)
+    ahora = (ahora or datetime.now(TZ_COL)).astimezone(TZ_COL)
     m = ahora.hour * 60 + ahora.minute  # minutos desde medianoche
 
     asia = (m >= 17 * 60) or (m < 2 * 60)
@@ -330,7 +287,7 @@ def _estado_sesiones() -> Tuple[str, Dict[str, bool]]:
 # ============================================================
 # 🌟 TESLABTC — ANÁLISIS PREMIUM REAL (v5.3 con Fibo-Riesgo)
 # ============================================================
-def generar_analisis_premium(symbol: str = "BTCUSDT") -> Dict[str, Any]:
+async def generar_analisis_premium(symbol: str = "BTCUSDT") -> Dict[str, Any]:
     """
     - Usa estructura H4/H1 para SWING
     - Usa M5 para señales SCALPING (a favor/contra H1)
@@ -339,41 +296,78 @@ def generar_analisis_premium(symbol: str = "BTCUSDT") -> Dict[str, Any]:
     now = datetime.now(TZ_COL)
     fecha_txt = now.strftime("%d/%m/%Y %H:%M:%S")
 
-    # Precio actual
-    precio, fuente = _safe_get_price(symbol)
+    # Precio + velas por temporalidad: en paralelo, con un plazo común
+    with etapa("fetch"):
+        datos, tiempos_ms = await reunir_con_plazo(
+            {
+                "precio": _safe_get_price(symbol),
+                "H4": _safe_get_klines(symbol, "4h", 400),
+                "H1": _safe_get_klines(symbol, "1h", 400),
+                "M5": _safe_get_klines(symbol, "5m", 300),
+            },
+            PLAZO_FETCH_S,
+            por_defecto={
+                "precio": (None, "Timeout precio"),
+                "H4": VELAS_VACIAS,
+                "H1": VELAS_VACIAS,
+                "M5": VELAS_VACIAS,
+            },
+        )
+    precio, fuente = datos["precio"]
+
+    # Cálculo puro (CPU) fuera del event loop
+    return await en_pool(
+        calcular_analisis_premium,
+        symbol, fecha_txt, precio, fuente,
+        datos["H4"], datos["H1"], datos["M5"], tiempos_ms,
+    )
+
+
+def calcular_analisis_premium(
+    symbol: str,
+    fecha_txt: str,
+    precio: Any,
+    fuente: str,
+    kl_h4: Velas,
+    kl_h1: Velas,
+    kl_m5: Velas,
+    tiempos_ms: Optional[Dict[str, Any]] = None,
+    ahora: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Parte de cálculo del análisis premium: no toca la red.
+    Recibe precio y velas ya descargados (se puede ejecutar en un worker);
+    `ahora` fija la hora de referencia de las sesiones (backtest).
+    """
     precio_num = float(precio) if isinstance(precio, (int, float)) else None
     precio_txt = f"{precio_num:,.2f} USD" if precio_num is not None else "—"
 
-    # Datos por temporalidad
-    kl_h4 = _safe_get_klines(symbol, "4h", 400)
-    kl_h1 = _safe_get_klines(symbol, "1h", 400)
-    kl_m5 = _safe_get_klines(symbol, "5m", 300)
-
-    # --------------------------------------------------------
-    # 🧱 Estructura H4
-    # --------------------------------------------------------
-    if kl_h4:
-        info_h4 = evaluar_estructura(kl_h4)
-        dir_h4 = info_h4.get("estado", "sin_datos")
-        h4_high = info_h4.get("high")
-        h4_low = info_h4.get("low")
-    else:
-        dir_h4 = "sin_datos"
-        h4_high = None
-        h4_low = None
-
-    # --------------------------------------------------------
-    # 🧱 Estructura H1
-    # --------------------------------------------------------
-    if kl_h1:
-        info_h1 = evaluar_estructura(kl_h1)
-        dir_h1 = info_h1.get("estado", "sin_datos")
-        h1_high = info_h1.get("high")
-        h1_low = info_h1.get("low")
-    else:
-        dir_h1 = "sin_datos"
-        h1_high = None
-        h1_low = None
+    with etapa("estructura"):
+        # --------------------------------------------------------
+        # 🧱 Estructura H4
+        # --------------------------------------------------------
+        if kl_h4:
+            info_h4 = evaluar_estructura(kl_h4)
+            dir_h4 = info_h4.get("estado", "sin_datos")
+            h4_high = info_h4.get("high")
+            h4_low = info_h4.get("low")
+        else:
+            dir_h4 = "sin_datos"
+            h4_high = None
+            h4_low = None
+
+        # --------------------------------------------------------
+        # 🧱 Estructura H1
+        # --------------------------------------------------------
+        if kl_h1:
+            info_h1 = evaluar_estructura(kl_h1)
+            dir_h1 = info_h1.get("estado", "sin_datos")
+            h1_high = info_h1.get("high")
+            h1_low = info_h1.get("low")
+        else:
+            dir_h1 = "sin_datos"
+            h1_high = None
+            h1_low = None
 
     # --------------------------------------------------------
     # 🔢 Helper Fibo relativo a la estructura de H1
@@ -407,420 +401,171 @@ def generar_analisis_premium(symbol: str = "BTCUSDT") -> Dict[str, Any]:
         else:
             return 50.0
 
-    # --------------------------------------------------------
-    # POI H4 61.8–88.6 para swing (zona premium)
-    # --------------------------------------------------------
-    poi_h4 = _poi_fibo_band(dir_h4, h4_high, h4_low)
-    poi_txt = "—"
-    in_premium = False
-    p_lo = p_hi = None
-    if poi_h4:
-        p_lo, p_hi = sorted([float(poi_h4[0]), float(poi_h4[1])])
-        poi_txt = f"{p_lo:,.2f}–{p_hi:,.2f}"
-        if precio_num is not None and p_lo <= precio_num <= p_hi:
-            in_premium = True
-
-    # Sesión actual
-    sesion_txt, ses_flags = _estado_sesiones()
-
-    # Modo backtest: scalping siempre permitido
-    ventana_scalping = True
-
-    # ============================
-    # 📊 SCALPING (M5)
-    # ============================
-    scalping_cont: Dict[str, Any] = {
-        "activo": False,
-        "direccion": "—",
-        "riesgo": "N/A",
-        "zona_reaccion": "—",
-        "sl": "—",
-        "tp1_rr": "—",
-        "tp2_rr": "—",
-        "sl_alerta": False,
-        "sl_dist": None,
-        "sl_pct": None,
-        "contexto": "Sin dirección clara en H1.",
-    }
-    scalping_corr: Dict[str, Any] = dict(scalping_cont)
-
-    # Siempre calculamos niveles de scalping si hay datos de M5.
-    if kl_m5 and ventana_scalping:
-        highs_m5 = [k["high"] for k in kl_m5[-30:]]
-        lows_m5 = [k["low"] for k in kl_m5[-30:]]
-        if len(highs_m5) >= 2 and len(lows_m5) >= 2:
-            prev_high = max(highs_m5[:-1])
-            prev_low = min(lows_m5[:-1])
-
-            # --------------------------------------------------------
-            # H1 ALCISTA → CONTINUACIÓN LARGA + CORRECCIÓN CORTA
-            # --------------------------------------------------------
-            if dir_h1 == "alcista":
-                # ✅ CONTINUACIÓN ALCISTA
-                entry_cont = prev_high
-                sl_cont = prev_low
-                r_cont = max(entry_cont - sl_cont, 0)
-                tp1_cont = entry_cont + r_cont
-                tp2_cont = entry_cont + 2 * r_cont
-
-                # ⚖️ Riesgo por Fibo: continuación
-                pos_fibo_cont = _trend_fibo(entry_cont)
-                if pos_fibo_cont <= 50.0:
-                    riesgo_base = "Bajo"
-                else:
-                    riesgo_base = "Medio"
-
-                riesgo_cont, alerta_sl, dist_sl, pct_sl = _evaluar_riesgo_sl(
-                    entry_cont, sl_cont, riesgo_base
-                )
-
-                scalping_cont.update(
-                    {
-                        "activo": True,
-                        "direccion": "ALCISTA (a favor de H1)",
-                        "riesgo": riesgo_cont,
-                        "zona_reaccion": f"{entry_cont:,.2f}",
-                        "sl": f"{sl_cont:,.2f}",
-                        "tp1_rr": f"{tp1_cont:,.2f}" if r_cont > 0 else "—",
-                        "tp2_rr": f"{tp2_cont:,.2f}" if r_cont > 0 else "—",
-                        "sl_alerta": alerta_sl,
-                        "sl_dist": dist_sl,
-                        "sl_pct": pct_sl,
-                        "contexto": (
-                            "SCALPING a favor de H1: entrada por ruptura del HIGH/LOW M5, "
-                            "SL en el extremo opuesto de M5, TP1 1:1 (mover a BE) y TP2 1:2."
-                        ),
-                    }
-                )
-
-                # 🔺 CORRECCIÓN ALCISTA (venta contra H1)
-                entry_corr = prev_low
-                sl_corr = prev_high
-                r_corr = max(sl_corr - entry_corr, 0)
-                tp1_corr = entry_corr - r_corr
-                tp2_corr = entry_corr - 2 * r_corr
-
-                # ⚖️ Riesgo por Fibo: corrección
-                pos_fibo_corr = _trend_fibo(entry_corr)
-                if pos_fibo_corr <= 61.8:
-                    riesgo_base = "Alto"
-                else:
-                    riesgo_base = "Medio"
-
-                riesgo_corr, alerta_sl, dist_sl, pct_sl = _evaluar_riesgo_sl(
-                    entry_corr, sl_corr, riesgo_base
-                )
-
-                scalping_corr.update(
-                    {
-                        "activo": True,
-                        "direccion": "BAJISTA (contra H1)",
-                        "riesgo": riesgo_corr,
-                        "zona_reaccion": f"{entry_corr:,.2f}",
-                        "sl": f"{sl_corr:,.2f}",
-                        "tp1_rr": f"{tp1_corr:,.2f}" if r_corr > 0 else "—",
-                        "tp2_rr": f"{tp2_corr:,.2f}" if r_corr > 0 else "—",
-                        "sl_alerta": alerta_sl,
-                        "sl_dist": dist_sl,
-                        "sl_pct": pct_sl,
-                        "contexto": (
-                            "SCALPING de corrección: venta contra la estructura de H1, "
-                            "solo si hay agotamiento claro y confirmación limpia."
-                        ),
-                    }
-                )
-
-            # --------------------------------------------------------
-            # H1 BAJISTA → CONTINUACIÓN CORTA + CORRECCIÓN LARGA
-            # --------------------------------------------------------
-            elif dir_h1 == "bajista":
-                # ✅ CONTINUACIÓN BAJISTA
-                entry_cont = prev_low
-                sl_cont = prev_high
-                r_cont = max(sl_cont - entry_cont, 0)
-                tp1_cont = entry_cont - r_cont
-                tp2_cont = entry_cont - 2 * r_cont
-
-                # ⚖️ Riesgo por Fibo: continuación
-                pos_fibo_cont = _trend_fibo(entry_cont)
-                if pos_fibo_cont <= 50.0:
-                    riesgo_base = "Bajo"
-                else:
-                    riesgo_base = "Medio"
-
-                riesgo_cont, alerta_sl, dist_sl, pct_sl = _evaluar_riesgo_sl(
-                    entry_cont, sl_cont, riesgo_base
-                )
-
-                scalping_cont.update(
-                    {
-                        "activo": True,
-                        "direccion": "BAJISTA (a favor de H1)",
-                        "riesgo": riesgo_cont,
-                        "zona_reaccion": f"{entry_cont:,.2f}",
-                        "sl": f"{sl_cont:,.2f}",
-                        "tp1_rr": f"{tp1_cont:,.2f}" if r_cont > 0 else "—",
-                        "tp2_rr": f"{tp2_cont:,.2f}" if r_cont > 0 else "—",
-                        "sl_alerta": alerta_sl,
-                        "sl_dist": dist_sl,
-                        "sl_pct": pct_sl,
-                        "contexto": (
-                            "SCALPING a favor de H1: venta por ruptura del LOW M5, "
-                            "SL en el HIGH M5 previo, TP1 1:1 (BE) y TP2 1:2."
-                        ),
-                    }
-                )
-
-                # 🔺 CORRECCIÓN BAJISTA (compra contra H1)
-                entry_corr = prev_high
-                sl_corr = prev_low
-                r_corr = max(entry_corr - sl_corr, 0)
-                tp1_corr = entry_corr + r_corr
-                tp2_corr = entry_corr + 2 * r_corr
-
-                # ⚖️ Riesgo por Fibo: corrección
-                pos_fibo_corr = _trend_fibo(entry_corr)
-                if pos_fibo_corr <= 61.8:
-                    riesgo_base = "Alto"
+    with etapa("escenarios"):
+        # --------------------------------------------------------
+        # POI H4 61.8–88.6 para swing (zona premium)
+        # --------------------------------------------------------
+        poi_h4 = _poi_fibo_band(dir_h4, h4_high, h4_low)
+        poi_txt = "—"
+        in_premium = False
+        p_lo = p_hi = None
+        if poi_h4:
+            p_lo, p_hi = sorted([float(poi_h4[0]), float(poi_h4[1])])
+            poi_txt = f"{p_lo:,.2f}–{p_hi:,.2f}"
+            if precio_num is not None and p_lo <= precio_num <= p_hi:
+                in_premium = True
+
+        # Sesión actual
+        sesion_txt, ses_flags = _estado_sesiones(ahora)
+
+        # Modo backtest: scalping siempre permitido
+        ventana_scalping = True
+
+        # ============================
+        # 📊 SCALPING (M5)
+        # ============================
+        scalping_cont: Dict[str, Any] = {
+            "activo": False,
+            "direccion": "—",
+            "riesgo": "N/A",
+            "zona_reaccion": "—",
+            "sl": "—",
+            "tp1_rr": "—",
+            "tp2_rr": "—",
+            "sl_alerta": False,
+            "sl_dist": None,
+            "sl_pct": None,
+            "contexto": "Sin dirección clara en H1.",
+        }
+        scalping_corr: Dict[str, Any] = dict(scalping_cont)
+
+        # Siempre calculamos niveles de scalping si hay datos de M5.
+        if kl_m5 and ventana_scalping:
+            highs_m5 = kl_m5.high[-30:]
+            lows_m5 = kl_m5.low[-30:]
+            if len(highs_m5) >= 2 and len(lows_m5) >= 2:
+                prev_high = max(highs_m5[:-1])
+                prev_low = min(lows_m5[:-1])
+
+                # H1 alcista / bajista → continuación + corrección; rango → ambos lados
+                nivel_cont, nivel_corr = niveles_scalping(dir_h1, prev_high, prev_low)
+                textos = _TEXTOS_SCALPING.get(dir_h1, _TEXTOS_SCALPING["rango"])
+
+                if dir_h1 in ("alcista", "bajista"):
+                    # ⚖️ Riesgo por Fibo relativo a H1
+                    base_cont = "Bajo" if _trend_fibo(nivel_cont["entry"]) <= 50.0 else "Medio"
+                    base_corr = "Alto" if _trend_fibo(nivel_corr["entry"]) <= 61.8 else "Medio"
                 else:
-                    riesgo_base = "Medio"
-
-                riesgo_corr, alerta_sl, dist_sl, pct_sl = _evaluar_riesgo_sl(
-                    entry_corr, sl_corr, riesgo_base
-                )
-
-                scalping_corr.update(
-                    {
-                        "activo": True,
-                        "direccion": "ALCISTA (contra H1)",
-                        "riesgo": riesgo_corr,
-                        "zona_reaccion": f"{entry_corr:,.2f}",
-                        "sl": f"{sl_corr:,.2f}",
-                        "tp1_rr": f"{tp1_corr:,.2f}" if r_corr > 0 else "—",
-                        "tp2_rr": f"{tp2_corr:,.2f}" if r_corr > 0 else "—",
-                        "sl_alerta": alerta_sl,
-                        "sl_dist": dist_sl,
-                        "sl_pct": pct_sl,
-                        "contexto": (
-                            "SCALPING de corrección: compra contra la estructura de H1, "
-                            "solo si hay agotamiento claro y confirmación limpia."
-                        ),
-                    }
-                )
+                    base_cont = base_corr = "Medio"
+
+                scalping_cont.update(_bloque_scalping(nivel_cont, base_cont, *textos["cont"]))
+                scalping_corr.update(_bloque_scalping(nivel_corr, base_corr, *textos["corr"]))
+
+        # ============================
+        # 🕰️ SWING (H4 + H1)
+        # ============================
+        swing: Dict[str, Any] = {
+            "activo": False,
+            "direccion": "—",
+            "riesgo": "N/A",
+            "premium_zone": poi_txt,   # texto low–high 61.8–88.6
+            "zona_reaccion": "—",      # punto o rango mostrado en señales
+            "sl": "—",
+            "tp1_rr": "—",
+            "tp2_rr": "—",
+            "tp3_objetivo": "—",
+            "contexto": "Esperando que el precio trabaje la zona premium H4 y un BOS claro en H1.",
+        }
 
-            # --------------------------------------------------------
-            # H1 EN RANGO → SCALPING EN RANGO (ambos lados)
-            # --------------------------------------------------------
+        if poi_h4 and p_lo is not None and p_hi is not None and kl_h1:
+            # Dirección base del swing (aunque H4 esté en rango)
+            if dir_h4 == "alcista":
+                base_dir = "ALCISTA"
+            elif dir_h4 == "bajista":
+                base_dir = "BAJISTA"
             else:
-                # Rango simple usando extremos recientes de M5
-                entry_long = prev_high
-                sl_long = prev_low
-                r_long = max(entry_long - sl_long, 0)
-                tp1_long = entry_long + r_long
-                tp2_long = entry_long + 2 * r_long
-
-                riesgo_base = "Medio"
-                riesgo_long, alerta_sl, dist_sl, pct_sl = _evaluar_riesgo_sl(
-                    entry_long, sl_long, riesgo_base
-                )
-
-                scalping_cont.update(
-                    {
-                        "activo": True,
-                        "direccion": "ALCISTA (rango H1)",
-                        "riesgo": riesgo_long,
-                        "zona_reaccion": f"{entry_long:,.2f}",
-                        "sl": f"{sl_long:,.2f}",
-                        "tp1_rr": f"{tp1_long:,.2f}" if r_long > 0 else "—",
-                        "tp2_rr": f"{tp2_long:,.2f}" if r_long > 0 else "—",
-                        "sl_alerta": alerta_sl,
-                        "sl_dist": dist_sl,
-                        "sl_pct": pct_sl,
-                        "contexto": (
-                            "SCALPING en rango: ruptura del HIGH M5 dentro del rango de H1; "
-                            "se trabaja la liquidez superior con tamaño controlado."
-                        ),
-                    }
-                )
+                base_dir = "RANGO"
 
-                entry_short = prev_low
-                sl_short = prev_high
-                r_short = max(sl_short - entry_short, 0)
-                tp1_short = entry_short - r_short
-                tp2_short = entry_short - 2 * r_short
-
-                riesgo_base = "Medio"
-                riesgo_short, alerta_sl, dist_sl, pct_sl = _evaluar_riesgo_sl(
-                    entry_short, sl_short, riesgo_base
-                )
-
-                scalping_corr.update(
+            # Caso 1: precio aún fuera de la zona premium H4
+            if not in_premium:
+                swing.update(
                     {
-                        "activo": True,
-                        "direccion": "BAJISTA (rango H1)",
-                        "riesgo": riesgo_short,
-                        "zona_reaccion": f"{entry_short:,.2f}",
-                        "sl": f"{sl_short:,.2f}",
-                        "tp1_rr": f"{tp1_short:,.2f}" if r_short > 0 else "—",
-                        "tp2_rr": f"{tp2_short:,.2f}" if r_short > 0 else "—",
-                        "sl_alerta": alerta_sl,
-                        "sl_dist": dist_sl,
-                        "sl_pct": pct_sl,
+                        "activo": False,
+                        "direccion": base_dir,
+                        "riesgo": "Medio" if base_dir != "RANGO" else "N/A",
+                        "premium_zone": poi_txt,
+                        "zona_reaccion": poi_txt,  # se muestra como zona de reacción en el panel
+                        "sl": "—",
+                        "tp1_rr": "—",
+                        "tp2_rr": "—",
+                        "tp3_objetivo": "—",
                         "contexto": (
-                            "SCALPING en rango: ruptura del LOW M5 dentro del rango de H1; "
-                            "se trabaja el breakout bajista con tamaño controlado."
+                            "Precio fuera de la zona premium H4 (61.8–88.6). "
+                            "Se espera que el precio ENTRE en esa banda para luego pedir "
+                            "BOS + cierre de H1 a favor de la dirección superior."
                         ),
                     }
                 )
-
-    # ============================
-    # 🕰️ SWING (H4 + H1)
-    # ============================
-    swing: Dict[str, Any] = {
-        "activo": False,
-        "direccion": "—",
-        "riesgo": "N/A",
-        "premium_zone": poi_txt,   # texto low–high 61.8–88.6
-        "zona_reaccion": "—",      # punto o rango mostrado en señales
-        "sl": "—",
-        "tp1_rr": "—",
-        "tp2_rr": "—",
-        "tp3_objetivo": "—",
-        "contexto": "Esperando que el precio trabaje la zona premium H4 y un BOS claro en H1.",
-    }
-
-    if poi_h4 and p_lo is not None and p_hi is not None and kl_h1:
-        # Dirección base del swing (aunque H4 esté en rango)
-        if dir_h4 == "alcista":
-            base_dir = "ALCISTA"
-        elif dir_h4 == "bajista":
-            base_dir = "BAJISTA"
-        else:
-            base_dir = "RANGO"
-
-        # Caso 1: precio aún fuera de la zona premium H4
-        if not in_premium:
-            swing.update(
-                {
-                    "activo": False,
-                    "direccion": base_dir,
-                    "riesgo": "Medio" if base_dir != "RANGO" else "N/A",
-                    "premium_zone": poi_txt,
-                    "zona_reaccion": poi_txt,  # se muestra como zona de reacción en el panel
-                    "sl": "—",
-                    "tp1_rr": "—",
-                    "tp2_rr": "—",
-                    "tp3_objetivo": "—",
-                    "contexto": (
-                        "Precio fuera de la zona premium H4 (61.8–88.6). "
-                        "Se espera que el precio ENTRE en esa banda para luego pedir "
-                        "BOS + cierre de H1 a favor de la dirección superior."
-                    ),
-                }
-            )
-        else:
-            # Caso 2: precio dentro de la zona premium H4
-            highs_h1 = [k["high"] for k in kl_h1[-40:]]
-            lows_h1 = [k["low"] for k in kl_h1[-40:]]
-            if len(highs_h1) >= 2 and len(lows_h1) >= 2:
-                prev_high_h1 = max(highs_h1[:-1])
-                prev_low_h1 = min(lows_h1[:-1])
-
-                if dir_h4 == "alcista":
-                    entry = prev_high_h1
-                    sl_val = prev_low_h1
-                    tp3_val = h4_high
-                    direccion_txt = "ALCISTA"
-                elif dir_h4 == "bajista":
-                    entry = prev_low_h1
-                    sl_val = prev_high_h1
-                    tp3_val = h4_low
-                    direccion_txt = "BAJISTA"
-                else:
-                    # Si H4 está en rango, usamos la dirección de H1 como referencia
-                    if dir_h1 == "alcista":
-                        entry = prev_high_h1
-                        sl_val = prev_low_h1
-                        tp3_val = h4_high
-                        direccion_txt = "ALCISTA"
-                    elif dir_h1 == "bajista":
-                        entry = prev_low_h1
-                        sl_val = prev_high_h1
-                        tp3_val = h4_low
-                        direccion_txt = "BAJISTA"
+            else:
+                # Caso 2: precio dentro de la zona premium H4
+                highs_h1 = kl_h1.high[-40:]
+                lows_h1 = kl_h1.low[-40:]
+                if len(highs_h1) >= 2 and len(lows_h1) >= 2:
+                    prev_high_h1 = max(highs_h1[:-1])
+                    prev_low_h1 = min(lows_h1[:-1])
+
+                    niv = niveles_swing(dir_h4, dir_h1, prev_high_h1, prev_low_h1, h4_high, h4_low)
+                    direccion_txt = niv["direccion"]
+                    tp1_txt = f"{niv['tp1']:,.2f}" if niv["tp1"] is not None else "—"
+                    tp2_txt = f"{niv['tp2']:,.2f}" if niv["tp2"] is not None else "—"
+
+                    # 🔧 Ajuste visual: que la zona de reacción NO quede fuera de la banda premium
+                    entry = niv["entry"]
+                    if in_premium and p_lo is not None and p_hi is not None:
+                        entry_display = min(max(entry, p_lo), p_hi)
                     else:
-                        entry = prev_high_h1
-                        sl_val = prev_low_h1
-                        tp3_val = h4_high
-                        direccion_txt = "RANGO"
-
-                r = abs(entry - sl_val)
-                if r > 0 and direccion_txt in ("ALCISTA", "BAJISTA"):
-                    if direccion_txt == "ALCISTA":
-                        tp1_val = entry + r
-                        tp2_val = entry + 2 * r
+                        entry_display = entry
+
+                    zona_reac = f"{entry_display:,.2f}"
+                    sl_txt = f"{niv['sl']:,.2f}"
+                    tp3_txt = f"{niv['tp3']:,.2f}" if niv["tp3"] is not None else "—"
+
+                    # BOS H1 en dirección de H4 para marcar ACTIVO
+                    try:
+                        bos_ok = bos_a_favor(detectar_bos(kl_h1), dir_h4)
+                    except Exception:
+                        bos_ok = False
+
+                    activo = bool(bos_ok and in_premium)
+                    if activo:
+                        contexto_txt = (
+                            "SWING ACTIVO: precio en zona premium H4 (61.8–88.6) y BOS de H1 "
+                            "confirmado a favor de la dirección superior. TP1 1:1 (BE), "
+                            "TP2 1:2 y TP3 en el alto/bajo operativo de H4."
+                        )
                     else:
-                        tp1_val = entry - r
-                        tp2_val = entry - 2 * r
-                    tp1_txt = f"{tp1_val:,.2f}"
-                    tp2_txt = f"{tp2_val:,.2f}"
-                else:
-                    tp1_txt = "—"
-                    tp2_txt = "—"
-
-                # 🔧 Ajuste visual: que la zona de reacción NO quede fuera de la banda premium
-                if in_premium and p_lo is not None and p_hi is not None:
-                    entry_display = min(max(entry, p_lo), p_hi)
-                else:
-                    entry_display = entry
-
-                zona_reac = f"{entry_display:,.2f}"
-                sl_txt = f"{sl_val:,.2f}"
-                tp3_txt = f"{tp3_val:,.2f}" if tp3_val is not None else "—"
-
-                # BOS H1 en dirección de H4 para marcar ACTIVO
-                bos_ok = False
-                try:
-                    bos_h1 = detectar_bos(kl_h1)
-                    if dir_h4 in ("alcista", "bajista"):
-                        bos_ok = bos_h1.get("bos") and (
-                            (bos_h1.get("tipo") == "alcista" and dir_h4 == "alcista")
-                            or (bos_h1.get("tipo") == "bajista" and dir_h4 == "bajista")
+                        contexto_txt = (
+                            "Precio dentro de la zona premium H4, pero el swing sigue EN ESPERA "
+                            "hasta que se confirme un BOS claro en H1 a favor de la estructura "
+                            "de H4. Gestión propuesta: TP1 1:1 (BE), TP2 1:2 y TP3 en el "
+                            "alto/bajo de H4."
                         )
-                except Exception:
-                    bos_ok = False
-
-                activo = bool(bos_ok and in_premium)
 
-                if activo:
-                    contexto_txt = (
-                        "SWING ACTIVO: precio en zona premium H4 (61.8–88.6) y BOS de H1 "
-                        "confirmado a favor de la dirección superior. TP1 1:1 (BE), "
-                        "TP2 1:2 y TP3 en el alto/bajo operativo de H4."
-                    )
-                else:
-                    contexto_txt = (
-                        "Precio dentro de la zona premium H4, pero el swing sigue EN ESPERA "
-                        "hasta que se confirme un BOS claro en H1 a favor de la estructura "
-                        "de H4. Gestión propuesta: TP1 1:1 (BE), TP2 1:2 y TP3 en el "
-                        "alto/bajo de H4."
+                    swing.update(
+                        {
+                            "activo": activo,
+                            "direccion": direccion_txt,
+                            "riesgo": "Medio" if direccion_txt != "RANGO" else "N/A",
+                            "premium_zone": poi_txt,
+                            "zona_reaccion": zona_reac,
+                            "sl": sl_txt,
+                            "tp1_rr": tp1_txt,
+                            "tp2_rr": tp2_txt,
+                            "tp3_objetivo": tp3_txt,
+                            "contexto": contexto_txt,
+                        }
                     )
 
-                swing.update(
-                    {
-                        "activo": activo,
-                        "direccion": direccion_txt,
-                        "riesgo": "Medio" if direccion_txt != "RANGO" else "N/A",
-                        "premium_zone": poi_txt,
-                        "zona_reaccion": zona_reac,
-                        "sl": sl_txt,
-                        "tp1_rr": tp1_txt,
-                        "tp2_rr": tp2_txt,
-                        "tp3_objetivo": tp3_txt,
-                        "contexto": contexto_txt,
-                    }
-                )
-
     # =========================================================
     # 🧭 ESTRUCTURA DETECTADA (para contexto detallado)
     # =========================================================
@@ -867,6 +612,82 @@ def generar_analisis_premium(symbol: str = "BTCUSDT") -> Dict[str, Any]:
         "swing": swing,
         "reflexion": reflexion,
         "slogan": "✨ ¡Tu Mentalidad, Disciplina y Constancia definen tus Resultados!",
+        "debug": {
+            "tiempos_fetch_ms": tiempos_ms or {},
+            "plazo_fetch_s": PLAZO_FETCH_S,
+        },
     }
 
     return payload
+
+
+# ============================================================
+# 🛫 Punto de entrada compartido (cache M5 + coalescencia)
+# ============================================================
+_VUELOS = SingleFlight()
+CACHE_PREMIUM = AnalisisCache(precio_vivo=precio_en_vivo)
+
+
+def _payload_cacheable(payload: Dict[str, Any]) -> bool:
+    """No se cachean payloads armados sin precio o sin velas (fallo de red)."""
+    estructura = payload.get("estructura_detectada", {})
+    return payload.get("precio_actual") != "—" and any(
+        estructura.get(tf, {}).get("estado") != "sin_datos" for tf in ("H4", "H1")
+    )
+
+
+async def obtener_analisis_premium(symbol: str = "BTCUSDT") -> Dict[str, Any]:
+    """
+    Igual que generar_analisis_premium, pero:
+      - Sirve desde CACHE_PREMIUM hasta el próximo cierre de M5.
+      - Las llamadas concurrentes para el mismo símbolo (y versión del
+        análisis) comparten un único cálculo.
+    Cada llamador recibe su propia copia superficial del payload.
+    """
+    symbol = symbol.upper()
+    cacheado = CACHE_PREMIUM.obtener(symbol)
+    if cacheado is not None:
+        return cacheado
+
+    async def _calcular() -> Dict[str, Any]:
+        inicio_ms = int(time.time() * 1000)
+        payload = await generar_analisis_premium(symbol)
+        if _payload_cacheable(payload):
+            CACHE_PREMIUM.guardar(symbol, payload, desde_ms=inicio_ms)
+            HUB.publicar({"tipo": "premium", "simbolo": symbol, "version": payload["fecha"], "payload": payload})
+        return payload
+
+    payload = await _VUELOS.ejecutar((symbol, VERSION_TESLA), _calcular)
+    return dict(payload)
+
+
+def estado_coalescencia() -> Dict[str, int]:
+    return _VUELOS.estado()
+
+
+MARGEN_REFRESCO_S = 3.0
+# Sólo se refrescan símbolos de esta lista: los filtros del HUB los
+# escribe el cliente y no deben disparar cálculos (ni descargas) arbitrarios
+REFRESCO_SIMBOLOS = [
+    s.strip().upper()
+    for s in os.getenv("TESLABTC_REFRESCO_SIMBOLOS", ",".join(WS_SIMBOLOS)).split(",")
+    if s.strip()
+]
+
+
+async def refresco_premium_loop():
+    """
+    En cada cierre de M5 recalcula el premium de los símbolos con
+    suscriptores en el HUB (dentro de REFRESCO_SIMBOLOS): el payload
+    nuevo les llega empujado, sin sondeo.
+    """
+    while True:
+        ahora = time.time()
+        proximo = (int(ahora * 1000) // M5_MS + 1) * M5_MS / 1000
+        await asyncio.sleep(proximo - ahora + MARGEN_REFRESCO_S)
+        suscritos = HUB.simbolos_suscritos("premium", REFRESCO_SIMBOLOS)
+        for symbol in [s for s in REFRESCO_SIMBOLOS if s in suscritos]:
+            try:
+                await obtener_analisis_premium(symbol)
+            except Exception as e:
+                print(f"⚠️ Refresco premium {symbol}: {e}")
@@ -0,0 +1,279 @@
+# ============================================================
+# 🧪 TESLABTC.KG — utils/backtest.py
+# ============================================================
+# Backtest barra a barra de los escenarios premium sobre historial
+# M5 / H1 / H4 (Velas columnares):
+#   - Máx/mín móviles precalculados en una pasada O(n) por columna
+#   - Estructura H1/H4 con EstructuraIncremental (una actualización
+#     por vela cerrada, mismo resultado que evaluar_estructura)
+#   - Niveles con las mismas reglas que el payload en vivo
+#     (utils/escenarios_premium)
+#   - Simulación de orden stop → SL / TP1 (50 % + SL a BE) / TP2
+# Sin lookahead: en el cierre de la vela M5 t sólo se usan velas
+# cerradas hasta t. Una operación a la vez por escenario.
+# ============================================================
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from utils.estructura_incremental import EstructuraIncremental
+from utils.escenarios_premium import (
+    poi_fibo_band,
+    niveles_scalping,
+    niveles_swing,
+    bos_a_favor,
+)
+from utils.pivotes import extremo_movil
+from utils.velas import Velas, a_velas
+
+M5_MS = 5 * 60_000
+H1_MS = 3_600_000
+H4_MS = 4 * 3_600_000
+
+ESCENARIOS = ("continuacion", "correccion", "swing")
+VIGENCIA_ORDEN = 12        # velas M5 que la orden stop sigue viva (1 h)
+MAX_BARRAS_ABIERTA = 288   # velas M5 máximas en posición (1 día)
+
+
+# ------------------------------------------------------------
+# 🔹 Precálculo por temporalidad mayor
+# ------------------------------------------------------------
+def _previo(movil: List[float], i: int) -> Optional[float]:
+    return movil[i - 1] if i >= 1 else None
+
+
+class _SerieMayor:
+    """
+    Estado de H1/H4 indexado por nº de velas cerradas: estructura,
+    máx/mín de las 39 velas previas (swing) y BOS de las 19 previas.
+    """
+
+    def __init__(self, velas: Velas, intervalo: str, paso_ms: int):
+        self.v = velas
+        self.paso_ms = paso_ms
+        self.cerradas = 0
+        self.tracker = EstructuraIncremental(intervalo)
+        self.estructura: Dict[str, Any] = {"estado": "sin_datos", "high": None, "low": None}
+        self.max39 = extremo_movil(velas.high, 39, True)
+        self.min39 = extremo_movil(velas.low, 39, False)
+        self.max19 = extremo_movil(velas.high, 19, True)
+        self.min19 = extremo_movil(velas.low, 19, False)
+
+    def avanzar(self, hasta_ms: int) -> bool:
+        """Consume las velas cerradas antes de hasta_ms. True si hubo alguna nueva."""
+        v, n0 = self.v, self.cerradas
+        while self.cerradas < len(v) and v.open_time[self.cerradas] + self.paso_ms <= hasta_ms:
+            self.tracker.actualizar(v[self.cerradas])
+            self.cerradas += 1
+        if self.cerradas != n0:
+            self.estructura = self.tracker.resultado()
+            return True
+        return False
+
+    def bos(self) -> Dict[str, Any]:
+        """Igual que estructura_utils.detectar_bos sobre las velas cerradas."""
+        k = self.cerradas - 1
+        if self.cerradas < 10:
+            return {"bos": False, "tipo": None}
+        c = self.v.close[k]
+        if c > self.max19[k - 1]:
+            return {"bos": True, "tipo": "alcista"}
+        if c < self.min19[k - 1]:
+            return {"bos": True, "tipo": "bajista"}
+        return {"bos": False, "tipo": None}
+
+
+# ------------------------------------------------------------
+# 🔹 Simulación de una operación
+# ------------------------------------------------------------
+class _Operacion:
+    __slots__ = ("nivel", "vence", "fill", "abierta_en", "tp1", "tp2", "resultado_r")
+
+    def __init__(self, nivel: Dict[str, Any], desde: int, vigencia: int):
+        self.nivel = nivel
+        self.vence = desde + vigencia
+        self.fill: Optional[float] = None
+        self.abierta_en = -1
+        self.tp1 = False
+        self.tp2 = False
+        self.resultado_r: Optional[float] = None
+
+    def _r(self, salida: float) -> float:
+        n = self.nivel
+        signo = 1.0 if n["lado"] == "BUY" else -1.0
+        return signo * (salida - self.fill) / n["r"]
+
+    def vela(self, i: int, o: float, h: float, l: float, c: float, max_barras: int) -> bool:
+        """Procesa la vela i. Devuelve True cuando la operación terminó (o se canceló)."""
+        n = self.nivel
+        compra = n["lado"] == "BUY"
+        if self.fill is None:
+            if i >= self.vence:
+                return True                      # orden vencida sin ejecutar
+            if compra and h >= n["entry"]:
+                self.fill = max(o, n["entry"])   # gap: se ejecuta en la apertura
+            elif not compra and l <= n["entry"]:
+                self.fill = min(o, n["entry"])
+            else:
+                return False
+            self.abierta_en = i
+
+        toca_sl = (l <= n["sl"]) if compra else (h >= n["sl"])
+        toca_be = (l <= self.fill) if compra else (h >= self.fill)
+        toca_tp1 = (h >= n["tp1"]) if compra else (l <= n["tp1"])
+        toca_tp2 = (h >= n["tp2"]) if compra else (l <= n["tp2"])
+
+        if not self.tp1:
+            # Si en la misma vela se tocan SL y TP, se asume el SL (conservador)
+            if toca_sl:
+                self.resultado_r = self._r(n["sl"])
+                return True
+            if toca_tp1:
+                self.tp1 = True
+                if toca_tp2:
+                    self.tp2 = True
+                    self.resultado_r = 0.5 * self._r(n["tp1"]) + 0.5 * self._r(n["tp2"])
+                    return True
+        else:
+            if toca_be:
+                self.resultado_r = 0.5 * self._r(n["tp1"])
+                return True
+            if toca_tp2:
+                self.tp2 = True
+                self.resultado_r = 0.5 * self._r(n["tp1"]) + 0.5 * self._r(n["tp2"])
+                return True
+
+        if i - self.abierta_en >= max_barras:
+            parcial = 0.5 * self._r(n["tp1"]) if self.tp1 else 0.0
+            peso = 0.5 if self.tp1 else 1.0
+            self.resultado_r = parcial + peso * self._r(c)
+            return True
+        return False
+
+
+def _estadisticas(resultados: Sequence[float], tp1: int, tp2: int) -> Dict[str, Any]:
+    n = len(resultados)
+    ganadoras = sum(1 for r in resultados if r > 1e-9)
+    perdedoras = sum(1 for r in resultados if r < -1e-9)
+    equity = pico = dd = 0.0
+    for r in resultados:
+        equity += r
+        pico = max(pico, equity)
+        dd = max(dd, pico - equity)
+    ganancia = sum(r for r in resultados if r > 0)
+    perdida = -sum(r for r in resultados if r < 0)
+    return {
+        "operaciones": n,
+        "ganadoras": ganadoras,
+        "perdedoras": perdedoras,
+        "break_even": n - ganadoras - perdedoras,
+        "win_rate": round(ganadoras / n, 4) if n else 0.0,
+        "tp1_rate": round(tp1 / n, 4) if n else 0.0,
+        "tp2_rate": round(tp2 / n, 4) if n else 0.0,
+        "expectancy_r": round(equity / n, 4) if n else 0.0,
+        "total_r": round(equity, 2),
+        "max_drawdown_r": round(dd, 2),
+        "profit_factor": round(ganancia / perdida, 3) if perdida else None,
+    }
+
+
+# ------------------------------------------------------------
+# 🚀 Motor
+# ------------------------------------------------------------
+def backtest_premium(
+    m5,
+    h1,
+    h4,
+    escenarios: Sequence[str] = ESCENARIOS,
+    vigencia: int = VIGENCIA_ORDEN,
+    max_barras: int = MAX_BARRAS_ABIERTA,
+    detalle: bool = False,
+) -> Dict[str, Any]:
+    """
+    Reproduce los escenarios premium sobre el historial (velas M5/H1/H4
+    en cualquier formato aceptado por a_velas, ordenadas por open_time).
+    Resultado en múltiplos de R (riesgo entrada–SL). Con TP1 se cierra
+    el 50 % y el resto va a TP2 con el SL en break-even.
+    """
+    inicio = time.perf_counter()
+    m5, h1, h4 = a_velas(m5), a_velas(h1), a_velas(h4)
+    serie_h1 = _SerieMayor(h1, "1h", H1_MS)
+    serie_h4 = _SerieMayor(h4, "4h", H4_MS)
+
+    n = len(m5)
+    max29 = extremo_movil(m5.high, 29, True)
+    min29 = extremo_movil(m5.low, 29, False)
+    ot, op, hi, lo, cl = m5.open_time, m5.open, m5.high, m5.low, m5.close
+
+    abiertas: Dict[str, Optional[_Operacion]] = {e: None for e in escenarios}
+    resultados: Dict[str, List[float]] = {e: [] for e in escenarios}
+    tps: Dict[str, List[int]] = {e: [0, 0] for e in escenarios}
+    operaciones: List[Dict[str, Any]] = []
+
+    swing_base: Optional[Dict[str, Any]] = None
+    poi = None
+    for i in range(n):
+        o, h, l, c = op[i], hi[i], lo[i], cl[i]
+
+        # 1) Operaciones en curso con la vela i
+        for esc, opx in abiertas.items():
+            if opx is not None and opx.vela(i, o, h, l, c, max_barras):
+                if opx.resultado_r is not None:
+                    resultados[esc].append(opx.resultado_r)
+                    tps[esc][0] += opx.tp1
+                    tps[esc][1] += opx.tp2
+                    if detalle:
+                        operaciones.append({
+                            "escenario": esc,
+                            "lado": opx.nivel["lado"],
+                            "entrada_open_time": ot[opx.abierta_en],
+                            "salida_open_time": ot[i],
+                            "resultado_r": round(opx.resultado_r, 4),
+                        })
+                abiertas[esc] = None
+
+        # 2) Contexto al cierre de la vela i (sólo velas mayores cerradas)
+        cierre = ot[i] + M5_MS
+        nueva_h1 = serie_h1.avanzar(cierre)
+        if serie_h4.avanzar(cierre):
+            e4 = serie_h4.estructura
+            poi = poi_fibo_band(e4["estado"], e4["high"], e4["low"])
+        if nueva_h1 or swing_base is None:
+            swing_base = None
+            k = serie_h1.cerradas - 1
+            if serie_h1.cerradas >= 2:
+                e4 = serie_h4.estructura
+                swing_base = niveles_swing(
+                    e4["estado"], serie_h1.estructura["estado"],
+                    serie_h1.max39[k - 1], serie_h1.min39[k - 1],
+                    e4["high"], e4["low"],
+                )
+                swing_base["bos_ok"] = bos_a_favor(serie_h1.bos(), e4["estado"])
+
+        # 3) Nuevas señales para los escenarios libres
+        if i >= 1 and (abiertas.get("continuacion", 0) is None or abiertas.get("correccion", 0) is None):
+            cont, corr = niveles_scalping(serie_h1.estructura["estado"], max29[i - 1], min29[i - 1])
+            for esc, niv in (("continuacion", cont), ("correccion", corr)):
+                if abiertas.get(esc, 0) is None and niv["r"] > 0:
+                    abiertas[esc] = _Operacion(niv, i + 1, vigencia)
+
+        if (
+            abiertas.get("swing", 0) is None and swing_base and poi
+            and swing_base["bos_ok"] and swing_base["tp1"] is not None
+            and poi[0] <= c <= poi[1]
+        ):
+            abiertas["swing"] = _Operacion(swing_base, i + 1, vigencia)
+
+    out: Dict[str, Any] = {
+        "velas_m5": n,
+        "desde": ot[0] if n else None,
+        "hasta": ot[-1] if n else None,
+        "escenarios": {
+            esc: _estadisticas(resultados[esc], *tps[esc]) for esc in escenarios
+        },
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+    if detalle:
+        out["operaciones"] = operaciones
+    return out
@@ -0,0 +1,185 @@
+# ============================================================
+# 📡 TESLABTC.KG — utils/binance_ws.py
+# ============================================================
+# Ingesta en vivo desde Binance WebSocket (combined streams):
+#   - <symbol>@kline_<interval> → actualiza el KLINE_STORE en memoria
+#   - <symbol>@bookTicker       → último precio (mid bid/ask)
+#   - Reconexión con backoff exponencial + re-suscripción
+#   - Relleno de huecos por REST (KLINE_STORE.refrescar) al conectar
+#     o cuando llega una vela que no continúa el buffer
+# Mientras la conexión está viva, obtener_precio y los lectores de
+# klines responden desde memoria sin tocar la red.
+# Pruebas: benchmarks/fake_binance_ws.py (Binance falso) y
+#   python -m benchmarks.verificar_binance_ws
+# ============================================================
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import websockets
+
+
+WS_HABILITADO = os.getenv("TESLABTC_WS", "1") != "0"
+
+# Configurable para apuntar a un servidor local (pruebas) o a otro endpoint
+BINANCE_WS_BASE = os.getenv("BINANCE_WS_BASE", "wss://stream.binance.com:9443")
+WS_SIMBOLOS = [
+    s.strip().upper() for s in os.getenv("TESLABTC_WS_SIMBOLOS", "BTCUSDT").split(",") if s.strip()
+]
+WS_INTERVALOS = [
+    i.strip() for i in os.getenv("TESLABTC_WS_INTERVALOS", "4h,1h,15m,5m").split(",") if i.strip()
+]
+
+PRECIO_TTL_S = 10.0       # un precio WS más viejo que esto ya no se usa
+BACKOFF_MAX_S = 60.0
+
+_PRECIOS: Dict[str, Tuple[float, float]] = {}   # símbolo → (precio, monotonic)
+_ESTADO: Dict[str, Any] = {
+    "conectado": False,
+    "reconexiones": 0,
+    "ultimo_mensaje": None,
+    "ultimo_error": None,
+}
+_ACTIVO = False
+
+
+# ------------------------------------------------------------
+# 💰 Lecturas en memoria
+# ------------------------------------------------------------
+def precio_en_vivo(simbolo: str) -> Optional[float]:
+    """Último precio recibido por WebSocket si es reciente; si no, None."""
+    dato = _PRECIOS.get(simbolo.upper())
+    if not dato or not _ESTADO["conectado"]:
+        return None
+    precio, ts = dato
+    if time.monotonic() - ts > PRECIO_TTL_S:
+        return None
+    return precio
+
+
+def estado_ws() -> Dict[str, Any]:
+    return {
+        **_ESTADO,
+        "simbolos": WS_SIMBOLOS,
+        "intervalos": WS_INTERVALOS,
+    }
+
+
+# ------------------------------------------------------------
+# 🧩 Procesamiento de mensajes
+# ------------------------------------------------------------
+def _streams() -> List[str]:
+    out = []
+    for s in WS_SIMBOLOS:
+        low = s.lower()
+        out.append(f"{low}@bookTicker")
+        out.extend(f"{low}@kline_{i}" for i in WS_INTERVALOS)
+    return out
+
+
+def _procesar(store, msg: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """
+    Aplica un mensaje del stream. Devuelve (símbolo, intervalo) si la
+    vela no continúa el buffer y hace falta rellenar por REST.
+    """
+    data = msg.get("data", msg)
+    if not isinstance(data, dict):
+        return None
+
+    if data.get("e") == "kline":
+        k = data["k"]
+        simbolo, intervalo = k["s"].upper(), k["i"]
+        vela = {
+            "open_time": int(k["t"]),
+            "open": float(k["o"]),
+            "high": float(k["h"]),
+            "low": float(k["l"]),
+            "close": float(k["c"]),
+            "volume": float(k["v"]),
+        }
+        if not store.actualizar_vela(simbolo, intervalo, vela):
+            return simbolo, intervalo
+        return None
+
+    # bookTicker no trae "e"; se reconoce por bid/ask
+    if "b" in data and "a" in data and "s" in data:
+        precio = (float(data["b"]) + float(data["a"])) / 2
+        _PRECIOS[data["s"].upper()] = (precio, time.monotonic())
+    return None
+
+
+async def _rellenar(store, simbolo: str, intervalo: str) -> None:
+    store.marcar_en_vivo(simbolo, intervalo, False)
+    try:
+        velas = await store.refrescar(simbolo, intervalo)
+    except Exception as e:
+        _ESTADO["ultimo_error"] = f"Relleno {simbolo} {intervalo}: {e}"
+        return
+    if velas:
+        store.marcar_en_vivo(simbolo, intervalo, True)
+
+
+def _marcar_todo(store, vivo: bool) -> None:
+    for s in WS_SIMBOLOS:
+        for i in WS_INTERVALOS:
+            store.marcar_en_vivo(s, i, vivo)
+
+
+# ------------------------------------------------------------
+# 🔁 Loop principal (se lanza desde startup_event)
+# ------------------------------------------------------------
+async def ingesta_binance_loop(store) -> None:
+    global _ACTIVO
+    _ACTIVO = True
+    backoff = 1.0
+    while _ACTIVO:
+        try:
+            async with websockets.connect(
+                f"{BINANCE_WS_BASE}/stream", ping_interval=20, ping_timeout=20
+            ) as ws:
+                await ws.send(json.dumps({"method": "SUBSCRIBE", "params": _streams(), "id": 1}))
+
+                # Relleno por REST de todo lo ocurrido mientras no había conexión.
+                # Los mensajes que llegan entretanto quedan en cola del socket.
+                _ESTADO["conectado"] = True
+                for s in WS_SIMBOLOS:
+                    for i in WS_INTERVALOS:
+                        await _rellenar(store, s, i)
+                backoff = 1.0
+
+                pendientes: set = set()
+                async for raw in ws:
+                    if not _ACTIVO:
+                        break
+                    _ESTADO["ultimo_mensaje"] = time.time()
+                    try:
+                        hueco = _procesar(store, json.loads(raw))
+                    except Exception as e:
+                        _ESTADO["ultimo_error"] = f"Mensaje inválido: {e}"
+                        continue
+                    if hueco and hueco not in pendientes:
+                        pendientes.add(hueco)
+                        tarea = asyncio.create_task(_rellenar(store, *hueco))
+                        tarea.add_done_callback(lambda _t, h=hueco: pendientes.discard(h))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            _ESTADO["ultimo_error"] = f"{type(e).__name__}: {e}"
+        finally:
+            _ESTADO["conectado"] = False
+            _marcar_todo(store, False)
+
+        if not _ACTIVO:
+            break
+        _ESTADO["reconexiones"] += 1
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, BACKOFF_MAX_S)
+
+
+def detener_ingesta() -> None:
+    global _ACTIVO
+    _ACTIVO = False
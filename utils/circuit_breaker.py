@@ -0,0 +1,136 @@
+# ============================================================
+# 🔌 TESLABTC.KG — utils/circuit_breaker.py
+# ============================================================
+# Circuit breaker por upstream (Binance Global / Vision / CoinGecko):
+#   - cerrado      → las peticiones pasan; se cuentan fallos seguidos
+#   - abierto      → se salta la fuente hasta que venza el enfriamiento
+#   - semi_abierto → pasa UNA petición de prueba; si va bien se cierra,
+#                    si falla se vuelve a abrir con enfriamiento doble
+# El enfriamiento respeta Retry-After cuando el upstream lo envía.
+# Backoff siempre con asyncio.sleep (nunca bloquea el event loop).
+# ============================================================
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+CERRADO = "cerrado"
+ABIERTO = "abierto"
+SEMI_ABIERTO = "semi_abierto"
+
+BACKOFF_BASE_S = 0.25     # primer reintento
+ESPERA_MAX_S = 2.0        # nunca esperar más que esto dentro de una petición
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        nombre: str,
+        umbral_fallos: int = 3,
+        enfriamiento_s: float = 15.0,
+        enfriamiento_max_s: float = 300.0,
+    ):
+        self.nombre = nombre
+        self.umbral_fallos = umbral_fallos
+        self.enfriamiento_s = enfriamiento_s
+        self.enfriamiento_max_s = enfriamiento_max_s
+        self.estado_actual = CERRADO
+        self.fallos_seguidos = 0
+        self.aperturas = 0
+        self.abierto_hasta = 0.0
+        self.prueba_desde: Optional[float] = None
+        self.ultimo_error: Optional[str] = None
+
+    def permitir(self) -> bool:
+        ahora = time.monotonic()
+        if self.estado_actual == CERRADO:
+            return True
+        if self.estado_actual == ABIERTO:
+            if ahora < self.abierto_hasta:
+                return False
+            self.estado_actual = SEMI_ABIERTO
+            self.prueba_desde = ahora
+            return True
+        # SEMI_ABIERTO: una sola prueba en vuelo (si se perdió, se permite otra)
+        if self.prueba_desde is not None and ahora - self.prueba_desde < self.enfriamiento_s:
+            return False
+        self.prueba_desde = ahora
+        return True
+
+    def registrar_exito(self) -> None:
+        self.estado_actual = CERRADO
+        self.fallos_seguidos = 0
+        self.aperturas = 0
+        self.prueba_desde = None
+
+    def registrar_fallo(self, error: str = "", retry_after: Optional[float] = None) -> None:
+        self.fallos_seguidos += 1
+        self.ultimo_error = error or None
+        if (
+            self.estado_actual == SEMI_ABIERTO
+            or self.fallos_seguidos >= self.umbral_fallos
+            or retry_after is not None
+        ):
+            enfriamiento = min(
+                self.enfriamiento_s * (2 ** self.aperturas), self.enfriamiento_max_s
+            )
+            if retry_after is not None:
+                enfriamiento = max(enfriamiento, min(retry_after, self.enfriamiento_max_s))
+            self.estado_actual = ABIERTO
+            self.abierto_hasta = time.monotonic() + enfriamiento
+            self.aperturas += 1
+            self.prueba_desde = None
+
+    def estado(self) -> Dict[str, Any]:
+        restante = max(0.0, self.abierto_hasta - time.monotonic())
+        return {
+            "estado": self.estado_actual,
+            "fallos_seguidos": self.fallos_seguidos,
+            "reabre_en_s": round(restante, 1) if self.estado_actual == ABIERTO else 0.0,
+            "ultimo_error": self.ultimo_error,
+        }
+
+
+# ------------------------------------------------------------
+# 📋 Registro por upstream
+# ------------------------------------------------------------
+BREAKERS: Dict[str, CircuitBreaker] = {}
+
+
+def breaker(nombre: str) -> CircuitBreaker:
+    cb = BREAKERS.get(nombre)
+    if cb is None:
+        cb = BREAKERS[nombre] = CircuitBreaker(nombre)
+    return cb
+
+
+def estado_breakers() -> Dict[str, Dict[str, Any]]:
+    return {nombre: cb.estado() for nombre, cb in BREAKERS.items()}
+
+
+# ------------------------------------------------------------
+# ⏳ Backoff
+# ------------------------------------------------------------
+def retry_after_s(response) -> Optional[float]:
+    """Lee la cabecera Retry-After (segundos). None si no viene o no es numérica."""
+    valor = response.headers.get("Retry-After")
+    if valor is None:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        return None
+
+
+async def esperar_reintento(intento: int, retry_after: Optional[float]) -> bool:
+    """
+    Espera (async) antes del reintento `intento` (0, 1, ...).
+    Devuelve False si el upstream pide esperar más de ESPERA_MAX_S:
+    en ese caso no se reintenta y el breaker debe abrirse.
+    """
+    espera = retry_after if retry_after is not None else BACKOFF_BASE_S * (2 ** intento)
+    if espera > ESPERA_MAX_S:
+        return False
+    await asyncio.sleep(espera)
+    return True
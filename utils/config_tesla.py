@@ -2,6 +2,6 @@
 # ⚙️ CONFIG TESLABTC.KG — Parámetros globales
 # ============================================================
 
-VERSION_TESLA = "v5.2 REAL MARKET"
+VERSION_TESLA = "v5.3.1 PRO REAL MARKET"
 BUILD_DATE = "2025-11-10"
 AUTHOR = "TESLABTC.KG Core Engine"
@@ -0,0 +1,126 @@
+# ============================================================
+# 🎯 TESLABTC.KG — utils/escenarios_premium.py
+# ============================================================
+# Reglas numéricas del análisis premium (sin red, sin texto):
+#   - Banda premium H4 61.8–88.6
+#   - Niveles SCALPING M5 (continuación / corrección respecto a H1)
+#   - Niveles SWING H1 dentro de la banda premium H4
+# Las usan utils/analisis_premium (payload en vivo) y
+# utils/backtest (reproducción barra a barra sobre historial).
+# ============================================================
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Tuple
+
+Nivel = Dict[str, Any]
+
+
+def poi_fibo_band(
+    estado: Optional[str],
+    hi: Optional[float],
+    lo: Optional[float],
+) -> Optional[Tuple[float, float]]:
+    """
+    Devuelve la banda 61.8–88.6 % de retroceso del último impulso H4.
+
+    Regla TESLABTC:
+      - En alcista: impulso low→high, pero la zona de reacción es el
+        retroceso desde el HIGH hacia el LOW (descuento).
+      - En bajista: impulso high→low, y la zona de reacción es el
+        retroceso desde el HIGH hacia el LOW (pullback para vender).
+
+    Matemáticamente, para ambos casos usamos la misma banda anclada al HIGH.
+    """
+    if hi is None or lo is None or hi == lo:
+        return None
+
+    hi = float(hi)
+    lo = float(lo)
+    rango = hi - lo
+    if rango <= 0:
+        return None
+
+    # Niveles de retroceso medidos desde el HIGH hacia el LOW
+    lvl_618 = hi - 0.618 * rango
+    lvl_886 = hi - 0.886 * rango
+
+    banda_low = min(lvl_886, lvl_618)
+    banda_high = max(lvl_886, lvl_618)
+    return round(banda_low, 2), round(banda_high, 2)
+
+
+def nivel_operacion(lado: str, entry: float, sl: float) -> Nivel:
+    """Entrada + SL → riesgo R, TP1 (1:1) y TP2 (1:2). lado: "BUY" | "SELL"."""
+    if lado == "BUY":
+        r = max(entry - sl, 0)
+        tp1 = entry + r
+        tp2 = entry + 2 * r
+    else:
+        r = max(sl - entry, 0)
+        tp1 = entry - r
+        tp2 = entry - 2 * r
+    return {"lado": lado, "entry": entry, "sl": sl, "r": r, "tp1": tp1, "tp2": tp2}
+
+
+def niveles_scalping(dir_h1: str, prev_high: float, prev_low: float) -> Tuple[Nivel, Nivel]:
+    """
+    (continuación, corrección) para M5 según la dirección de H1:
+      - alcista → BUY por ruptura del HIGH M5 / SELL de corrección
+      - bajista → SELL por ruptura del LOW M5 / BUY de corrección
+      - rango   → BUY y SELL por ruptura de los extremos M5
+    """
+    compra = nivel_operacion("BUY", prev_high, prev_low)
+    venta = nivel_operacion("SELL", prev_low, prev_high)
+    if dir_h1 == "bajista":
+        return venta, compra
+    return compra, venta
+
+
+def niveles_swing(
+    dir_h4: str,
+    dir_h1: str,
+    prev_high_h1: float,
+    prev_low_h1: float,
+    h4_high: Optional[float],
+    h4_low: Optional[float],
+) -> Dict[str, Any]:
+    """
+    Niveles del swing cuando el precio está en la banda premium H4.
+    Dirección de H4; si H4 está en rango, la de H1 como referencia.
+    TP1/TP2 sólo con dirección clara y riesgo > 0; TP3 en el extremo de H4.
+    """
+    direccion = dir_h4 if dir_h4 in ("alcista", "bajista") else dir_h1
+    if direccion == "bajista":
+        entry, sl_val, tp3_val, direccion_txt = prev_low_h1, prev_high_h1, h4_low, "BAJISTA"
+    elif direccion == "alcista":
+        entry, sl_val, tp3_val, direccion_txt = prev_high_h1, prev_low_h1, h4_high, "ALCISTA"
+    else:
+        entry, sl_val, tp3_val, direccion_txt = prev_high_h1, prev_low_h1, h4_high, "RANGO"
+
+    r = abs(entry - sl_val)
+    tp1_val = tp2_val = None
+    if r > 0 and direccion_txt in ("ALCISTA", "BAJISTA"):
+        if direccion_txt == "ALCISTA":
+            tp1_val = entry + r
+            tp2_val = entry + 2 * r
+        else:
+            tp1_val = entry - r
+            tp2_val = entry - 2 * r
+
+    return {
+        "direccion": direccion_txt,
+        "lado": "SELL" if direccion_txt == "BAJISTA" else "BUY",
+        "entry": entry,
+        "sl": sl_val,
+        "r": r,
+        "tp1": tp1_val,
+        "tp2": tp2_val,
+        "tp3": tp3_val,
+    }
+
+
+def bos_a_favor(bos_h1: Dict[str, Any], dir_h4: str) -> bool:
+    """BOS de H1 en la misma dirección que H4 (gatillo del swing)."""
+    if dir_h4 not in ("alcista", "bajista"):
+        return False
+    return bool(bos_h1.get("bos") and bos_h1.get("tipo") == dir_h4)
@@ -0,0 +1,137 @@
+# ============================================================
+# 🧮 TESLABTC.KG — utils/estructura_incremental.py
+# ============================================================
+# Estructura incremental por (símbolo, intervalo):
+#   - Consume UNA vela cerrada a la vez, O(1) amortizado
+#   - Medias MA(10)/MA(30) con sumas exactas (Fraction) → mismo
+#     resultado que statistics.mean
+#   - Máx/mín de las últimas 40 velas con deques monótonas
+#   - Pivots depth=1 (estrictos) dentro de la ventana de 80 velas
+# resultado() devuelve exactamente el mismo dict que
+# estructura_utils.evaluar_estructura sobre las velas consumidas.
+# Lo usa el backtest (utils/backtest), que recorre la historia vela a
+# vela. En vivo no aplica: el análisis evalúa también la vela en formación.
+# ============================================================
+from __future__ import annotations
+
+from collections import deque
+from fractions import Fraction
+from statistics import mean
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from utils.estructura_utils import resolver_estructura
+from utils.kline_store import INTERVALO_MS
+
+VENTANA_ZONA = 40       # _swing_zone(klines, 40)
+VENTANA_SWINGS = 80     # detectar_estructura_simple(lookback=80)
+MA_RAPIDA = 10
+MA_LENTA = 30
+MIN_VELAS = 25
+
+Vela = Dict[str, Any]
+
+
+class EstructuraIncremental:
+    def __init__(self, intervalo: Optional[str] = None):
+        self.paso_ms = INTERVALO_MS.get(intervalo) if intervalo else None
+        self.reiniciar()
+
+    def reiniciar(self, velas: Optional[List[Vela]] = None) -> None:
+        self.n = 0
+        self.ultimo_open_time: Optional[int] = None
+        self._closes: Deque[float] = deque(maxlen=MA_LENTA)
+        self._suma_rapida = Fraction(0)
+        self._suma_lenta = Fraction(0)
+        self._hl: Deque[Tuple[float, float]] = deque(maxlen=3)   # últimas 3 (high, low)
+        self._max_zona: Deque[Tuple[int, float]] = deque()
+        self._min_zona: Deque[Tuple[int, float]] = deque()
+        self._piv_high: Deque[Tuple[int, float]] = deque()
+        self._piv_low: Deque[Tuple[int, float]] = deque()
+        for v in velas or ():
+            self.actualizar(v)
+
+    def actualizar(self, vela: Vela) -> bool:
+        """
+        Consume una vela cerrada. Ignora duplicados/atrasadas.
+        Devuelve False si hay un hueco respecto a la última vela consumida
+        (el llamador debe reiniciar con el historial).
+        """
+        t = vela.get("open_time")
+        if isinstance(t, int) and self.ultimo_open_time is not None:
+            if t <= self.ultimo_open_time:
+                return True
+            if self.paso_ms and t - self.ultimo_open_time > self.paso_ms:
+                return False
+        if isinstance(t, int):
+            self.ultimo_open_time = t
+
+        g = self.n
+        h, l, c = float(vela["high"]), float(vela["low"]), float(vela["close"])
+
+        # Medias: sumas exactas sobre las últimas 10 / 30
+        fc = Fraction(c)
+        if len(self._closes) >= MA_RAPIDA:
+            self._suma_rapida -= Fraction(self._closes[-MA_RAPIDA])
+        if len(self._closes) == MA_LENTA:
+            self._suma_lenta -= Fraction(self._closes[0])
+        self._closes.append(c)
+        self._suma_rapida += fc
+        self._suma_lenta += fc
+
+        # Zona operativa: máx/mín de las últimas 40
+        while self._max_zona and self._max_zona[-1][1] <= h:
+            self._max_zona.pop()
+        self._max_zona.append((g, h))
+        while self._min_zona and self._min_zona[-1][1] >= l:
+            self._min_zona.pop()
+        self._min_zona.append((g, l))
+        if self._max_zona[0][0] <= g - VENTANA_ZONA:
+            self._max_zona.popleft()
+        if self._min_zona[0][0] <= g - VENTANA_ZONA:
+            self._min_zona.popleft()
+
+        # Pivot en g-1: ya se conoce la vela de la derecha
+        self._hl.append((h, l))
+        if len(self._hl) == 3:
+            (h0, l0), (h1, l1), (h2, l2) = self._hl
+            if h1 > h0 and h1 > h2:
+                self._piv_high.append((g - 1, h1))
+            if l1 < l0 and l1 < l2:
+                self._piv_low.append((g - 1, l1))
+
+        self.n = g + 1
+        desde = max(1, self.n - (VENTANA_SWINGS - 1))
+        while self._piv_high and self._piv_high[0][0] < desde:
+            self._piv_high.popleft()
+        while self._piv_low and self._piv_low[0][0] < desde:
+            self._piv_low.popleft()
+        return True
+
+    def _estado_swings(self) -> str:
+        if len(self._piv_high) < 2 or len(self._piv_low) < 2:
+            return "rango"
+        h1, h2 = self._piv_high[-2][1], self._piv_high[-1][1]
+        l1, l2 = self._piv_low[-2][1], self._piv_low[-1][1]
+        if h2 > h1 and l2 > l1:
+            return "alcista"
+        if h2 < h1 and l2 < l1:
+            return "bajista"
+        return "rango"
+
+    def _medias(self):
+        closes = self._closes
+        ma_fast = float(self._suma_rapida / MA_RAPIDA)
+        if self.n >= MA_LENTA:
+            ma_slow = float(self._suma_lenta / MA_LENTA)
+        else:
+            # < 30 velas: todas siguen en el buffer
+            ma_slow = mean(list(closes)[:-5] or closes)
+        return ma_fast, ma_slow, closes[-1]
+
+    def resultado(self) -> Dict[str, Any]:
+        if self.n < MIN_VELAS:
+            return {"estado": "sin_datos", "high": None, "low": None}
+        hi = self._max_zona[0][1]
+        lo = self._min_zona[0][1]
+        return resolver_estructura(self._estado_swings(), hi, lo, self._medias)
+
@@ -39,15 +39,15 @@ def _procesar_estructura(data: list):
 # 🔹 ANÁLISIS MULTITEMPORAL
 # ============================================================
 
-def analizar_estructura_multi_tf(simbolo="BTCUSDT"):
+async def analizar_estructura_multi_tf(simbolo="BTCUSDT"):
     """
     Analiza la estructura multitemporal del símbolo dado:
     H4 (macro), H1 (intradía), M15 (reacción).
     """
     # Obtener velas desde Binance o fallback
-    h4 = obtener_klines_binance(simbolo, "4h", 120)
-    h1 = obtener_klines_binance(simbolo, "1h", 120)
-    m15 = obtener_klines_binance(simbolo, "15m", 120)
+    h4 = await obtener_klines_binance(simbolo, "4h", 120)
+    h1 = await obtener_klines_binance(simbolo, "1h", 120)
+    m15 = await obtener_klines_binance(simbolo, "15m", 120)
 
     estructura = {
         "H4 (macro)": _procesar_estructura(h4),
@@ -1,7 +1,7 @@
 # ============================================================
 # 🧭 TESLABTC.KG — utils/estructura_utils.py (v3.7.0)
 # ============================================================
-# Compatible con klines en formato dict o lista.
+# Compatible con klines en formato dict, lista o Velas (columnar).
 # Devuelve:
 #   - evaluar_estructura: estado + high/low de zona operativa
 #   - detectar_estructura_simple: HH/HL vs LH/LL con pivots
@@ -13,6 +13,9 @@ from statistics import mean
 from typing import List, Dict, Optional
 import random
 
+from utils.velas import a_velas
+from utils.pivotes import indices_pivote
+
 
 # ============================================================
 # 🔹 Helpers base
@@ -20,14 +23,12 @@ import random
 
 def _closes(klines):
     """
-    Extrae cierres de cualquier formato (lista o dict).
+    Extrae cierres de cualquier formato (lista, dict o Velas).
     """
     try:
         if not klines:
             return []
-        if isinstance(klines[0], dict):
-            return [float(k["close"]) for k in klines]
-        return [float(k[4]) for k in klines]
+        return a_velas(klines).close
     except Exception:
         return []
 
@@ -35,58 +36,37 @@ def _closes(klines):
 def _swing_zone(klines, lookback: int = 30):
     """
     Calcula zona operativa simple: max/min de los últimos 'lookback' candles.
-    Acepta klines dict o lista.
+    Acepta klines dict, lista o Velas.
     """
     if not klines:
         return None, None
 
-    data = klines[-lookback:] if len(klines) >= lookback else klines
-
     try:
-        if isinstance(data[0], dict):
-            highs = [float(k["high"]) for k in data]
-            lows = [float(k["low"]) for k in data]
-        else:
-            highs = [float(k[2]) for k in data]
-            lows = [float(k[3]) for k in data]
+        v = a_velas(klines, lookback)
     except Exception:
         return None, None
 
-    return (max(highs) if highs else None, min(lows) if lows else None)
+    highs = v.high
+    lows = v.low
+    return (max(highs) if len(highs) else None, min(lows) if len(lows) else None)
 
 
 def _extraer_hl(klines):
     """
-    Devuelve listas de highs y lows a partir de klines.
+    Devuelve las columnas de highs y lows a partir de klines.
     """
     if not klines:
         return [], []
-    if isinstance(klines[0], dict):
-        highs = [float(k["high"]) for k in klines]
-        lows = [float(k["low"]) for k in klines]
-    else:
-        highs = [float(k[2]) for k in klines]
-        lows = [float(k[3]) for k in klines]
-    return highs, lows
+    v = a_velas(klines)
+    return v.high, v.low
 
 
 def _pivot_extremos(highs: List[float], lows: List[float]):
     """
-    Detecta pivots simples (máximos y mínimos locales).
+    Detecta pivots simples (máximos y mínimos locales, estrictos a ambos lados).
     Devuelve listas de índices de pivots high y low.
     """
-    pivots_high = []
-    pivots_low = []
-    n = len(highs)
-    if n < 3:
-        return pivots_high, pivots_low
-
-    for i in range(1, n - 1):
-        if highs[i] > highs[i - 1] and highs[i] > highs[i + 1]:
-            pivots_high.append(i)
-        if lows[i] < lows[i - 1] and lows[i] < lows[i + 1]:
-            pivots_low.append(i)
-    return pivots_high, pivots_low
+    return indices_pivote(highs, lows, 1, izq_estricto=True, der_estricto=True)
 
 
 # ============================================================
@@ -115,7 +95,7 @@ def detectar_estructura_simple(klines, lookback: int = 80):
                 "low_anterior": None,
             }
 
-        data = klines[-lookback:] if len(klines) >= lookback else klines
+        data = a_velas(klines, lookback)
         highs, lows = _extraer_hl(data)
         if len(highs) < 3:
             return {
@@ -197,6 +177,13 @@ def evaluar_estructura(klines):
     if not klines or len(klines) < 25:
         return {"estado": "sin_datos", "high": None, "low": None}
 
+    # Una sola conversión a columnas para todos los helpers; sólo hacen
+    # falta las últimas 80 velas (swings 80, zona 40, medias 30)
+    try:
+        klines = a_velas(klines, 80)
+    except Exception:
+        return {"estado": "sin_datos", "high": None, "low": None}
+
     closes = _closes(klines)
     if len(closes) < 25:
         return {"estado": "sin_datos", "high": None, "low": None}
@@ -208,11 +195,23 @@ def evaluar_estructura(klines):
     simple = detectar_estructura_simple(klines, lookback=80)
     estado = simple.get("estado", "sin_datos")
 
-    # 2) Si no hay estructura clara por swings, usamos MA(10) vs MA(30)
-    if estado in ("sin_datos", "rango"):
+    def _medias():
         ma_fast = mean(closes[-10:])
         ma_slow = mean(closes[-30:]) if len(closes) >= 30 else mean(closes[:-5] or closes)
-        last = closes[-1]
+        return ma_fast, ma_slow, closes[-1]
+
+    return resolver_estructura(estado, hi, lo, _medias)
+
+
+def resolver_estructura(estado: str, hi, lo, medias) -> Dict:
+    """
+    Paso final de evaluar_estructura (compartido con utils/estructura_incremental):
+    respaldo MA(10) vs MA(30) cuando los swings no dan dirección y marca PRE-BOS.
+    `medias()` → (ma_fast, ma_slow, último cierre); sólo se llama si hace falta.
+    """
+    # 2) Si no hay estructura clara por swings, usamos MA(10) vs MA(30)
+    if estado in ("sin_datos", "rango"):
+        ma_fast, ma_slow, last = medias()
 
         if hi and lo and hi > lo:
             width_pct = (hi - lo) / ((hi + lo) / 2)
@@ -308,15 +307,8 @@ def detectar_bos(klines):
         if not klines or len(klines) < 10:
             return {"bos": False, "tipo": None}
 
-        chunk = klines[-20:]
-        if isinstance(chunk[0], dict):
-            closes = [float(k["close"]) for k in chunk]
-            highs = [float(k["high"]) for k in chunk]
-            lows = [float(k["low"]) for k in chunk]
-        else:
-            closes = [float(k[4]) for k in chunk]
-            highs = [float(k[2]) for k in chunk]
-            lows = [float(k[3]) for k in chunk]
+        chunk = a_velas(klines, 20)
+        closes, highs, lows = chunk.close, chunk.high, chunk.low
 
         last_close = closes[-1]
         prev_high = max(highs[:-1])
@@ -345,20 +337,15 @@ def detectar_ob(klines):
         if not klines or len(klines) < 10:
             return {"ob": False, "tipo": None}
 
-        data = klines[-30:]
-        if isinstance(data[0], dict):
-            bodies = [abs(float(k["close"]) - float(k["open"])) for k in data]
-        else:
-            bodies = [abs(float(k[4]) - float(k[1])) for k in data]
+        data = a_velas(klines, 30)
+        bodies = [abs(c - o) for o, c in zip(data.open, data.close)]
 
         avg_body = sum(bodies) / len(bodies)
         threshold = avg_body * 1.5
 
-        for k in reversed(data[-15:]):
-            if isinstance(k, dict):
-                o, c = float(k["open"]), float(k["close"])
-            else:
-                o, c = float(k[1]), float(k[4])
+        recientes = data[-15:]
+        for i in range(len(recientes) - 1, -1, -1):
+            o, c = recientes.open[i], recientes.close[i]
             body_size = abs(c - o)
             if body_size > threshold:
                 tipo = "demanda" if c > o else "oferta"
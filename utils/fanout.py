@@ -0,0 +1,78 @@
+# ============================================================
+# 🔀 TESLABTC.KG — utils/fanout.py
+# ============================================================
+# Lanza varias descargas independientes en paralelo con un plazo
+# común. La latencia total pasa a ser la de la más lenta (acotada
+# por el plazo) en lugar de la suma de todas.
+# El cálculo (CPU) se manda a un pool de hilos para no frenar el
+# event loop mientras otras descargas siguen en curso.
+# OJO: son hilos, no procesos. Con el GIL dos cálculos en Python puro
+# NO corren a la vez: el pool mantiene el loop respondiendo (latidos,
+# streams, peticiones cacheadas), no multiplica el throughput de CPU.
+# Un ProcessPool obligaría a serializar velas y payloads y perdería las
+# etapas medidas (contextvars); para más CPU, más workers de uvicorn.
+# ============================================================
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+# Hilos: acotan cuántos cálculos esperan turno del GIL a la vez, no
+# cuántos núcleos se usan
+WORKERS_CPU = int(os.getenv("TESLABTC_WORKERS", "4"))
+POOL_CPU = ThreadPoolExecutor(max_workers=WORKERS_CPU, thread_name_prefix="teslabtc-cpu")
+
+
+async def en_pool(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Ejecuta fn(*args) en POOL_CPU y espera el resultado sin bloquear el loop
+    (el cálculo sigue compitiendo por el GIL: no es paralelismo de CPU).
+    Propaga el contexto (contextvars) al worker, como asyncio.to_thread,
+    para que las etapas medidas dentro lleguen a la petición.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(POOL_CPU, functools.partial(ctx.run, fn, *args))
+
+
+async def reunir_con_plazo(
+    coros: Dict[str, Awaitable[Any]],
+    plazo_s: float,
+    por_defecto: Dict[str, Any],
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Ejecuta cada corrutina de `coros` en paralelo.
+    Devuelve (resultados, tiempos_ms):
+      - resultados[nombre]: valor devuelto, o por_defecto[nombre] si falló
+        o no terminó antes del plazo
+      - tiempos_ms[nombre]: milisegundos hasta terminar, "timeout" o "error"
+    """
+    inicio = time.perf_counter()
+    tiempos: Dict[str, Any] = {}
+
+    async def _medir(nombre: str, coro: Awaitable[Any]) -> Any:
+        valor = await coro
+        tiempos[nombre] = round((time.perf_counter() - inicio) * 1000, 1)
+        return valor
+
+    tareas = {nombre: asyncio.ensure_future(_medir(nombre, c)) for nombre, c in coros.items()}
+    _, pendientes = await asyncio.wait(tareas.values(), timeout=plazo_s)
+    for t in pendientes:
+        t.cancel()
+
+    resultados: Dict[str, Any] = {}
+    for nombre, tarea in tareas.items():
+        if tarea in pendientes:
+            resultados[nombre] = por_defecto.get(nombre)
+            tiempos[nombre] = "timeout"
+        elif tarea.exception() is not None:
+            resultados[nombre] = por_defecto.get(nombre)
+            tiempos[nombre] = "error"
+        else:
+            resultados[nombre] = tarea.result()
+    return resultados, tiempos
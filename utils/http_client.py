@@ -0,0 +1,101 @@
+# ============================================================
+# 🌐 TESLABTC.KG — utils/http_client.py
+# ============================================================
+# Cliente HTTP asíncrono compartido para Binance / CoinGecko:
+#   - Un único pool (httpx.AsyncClient) durante toda la vida de la app
+#   - Keep-alive + HTTP/2 cuando el paquete "h2" está instalado
+#   - Límite de conexiones simultáneas por host
+#   - Cada llamada cuenta en /metrics (fuente, status, latencia)
+# Se abre en startup_event y se cierra en shutdown_event (main.py).
+# ============================================================
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from utils.metricas import registrar_upstream
+
+# ------------------------------
+# ⚙️ Límites del pool
+# ------------------------------
+MAX_CONEXIONES = 50          # total del pool
+MAX_KEEPALIVE = 20           # conexiones ociosas reutilizables
+KEEPALIVE_EXPIRY = 30.0      # segundos antes de cerrar una conexión ociosa
+MAX_POR_HOST = 10            # peticiones simultáneas por host
+TIMEOUT_DEFAULT = 6.0
+
+HTTP2_DISPONIBLE = importlib.util.find_spec("h2") is not None
+
+_CLIENT: Optional[httpx.AsyncClient] = None
+_SEMAFOROS: Dict[str, asyncio.Semaphore] = {}
+
+
+def _crear_cliente() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=HTTP2_DISPONIBLE,
+        limits=httpx.Limits(
+            max_connections=MAX_CONEXIONES,
+            max_keepalive_connections=MAX_KEEPALIVE,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(TIMEOUT_DEFAULT),
+        follow_redirects=True,
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Devuelve el cliente compartido. Si la app no pasó por startup
+    (scripts, consola), lo crea bajo demanda.
+    """
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = _crear_cliente()
+    return _CLIENT
+
+
+async def iniciar_cliente_http() -> None:
+    get_client()
+
+
+async def cerrar_cliente_http() -> None:
+    global _CLIENT
+    if _CLIENT is not None and not _CLIENT.is_closed:
+        await _CLIENT.aclose()
+    _CLIENT = None
+    _SEMAFOROS.clear()
+
+
+def _semaforo(host: str) -> asyncio.Semaphore:
+    sem = _SEMAFOROS.get(host)
+    if sem is None:
+        sem = _SEMAFOROS[host] = asyncio.Semaphore(MAX_POR_HOST)
+    return sem
+
+
+async def http_get(
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = TIMEOUT_DEFAULT,
+) -> httpx.Response:
+    """
+    GET a través del pool compartido, respetando el límite por host.
+    No lanza por status HTTP: el llamador decide (raise_for_status / status_code).
+    """
+    host = urlsplit(url).netloc
+    async with _semaforo(host):
+        t = time.perf_counter()
+        try:
+            r = await get_client().get(url, params=params, headers=headers, timeout=timeout)
+        except Exception as e:
+            registrar_upstream(host, "timeout" if isinstance(e, httpx.TimeoutException) else "error",
+                               time.perf_counter() - t)
+            raise
+        registrar_upstream(host, str(r.status_code), time.perf_counter() - t)
+        return r
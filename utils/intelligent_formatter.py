@@ -6,6 +6,8 @@
 
 from typing import Dict, Any
 
+from utils.metricas import medir_etapa
+
 
 # ------------------------------------------------------------
 # 🔢 Helper numérico seguro
@@ -74,6 +76,7 @@ def _get_rango_txt(estructura: Dict[str, Any], tf: str) -> str:
 # ------------------------------------------------------------
 # 📋 MENSAJE PRINCIPAL: SEÑALES ACTIVAS (Premium)
 # ------------------------------------------------------------
+@medir_etapa("formato")
 def construir_mensaje_operativo(body: Dict[str, Any]) -> str:
     """
     Recibe el payload interno Premium:
@@ -239,6 +242,7 @@ def construir_mensaje_operativo(body: Dict[str, Any]) -> str:
 # ------------------------------------------------------------
 # 🆓 MENSAJE FREE: estructura general sin setups
 # ------------------------------------------------------------
+@medir_etapa("formato")
 def construir_mensaje_free(body: Dict[str, Any]) -> str:
     """
     Mensaje para usuarios Free.
@@ -299,6 +303,7 @@ def construir_mensaje_free(body: Dict[str, Any]) -> str:
 # ------------------------------------------------------------
 # 📘 CONTEXTO DETALLADO POR ESCENARIO (Premium)
 # ------------------------------------------------------------
+@medir_etapa("formato")
 def construir_contexto_detallado(body: Dict[str, Any], escenario: str) -> str:
     """
     Genera un texto explicativo para:
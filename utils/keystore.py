@@ -0,0 +1,114 @@
+# ============================================================
+# 🔐 TESLABTC.KG — utils/keystore.py
+# ============================================================
+# Claves API de Binance por usuario:
+#   - En disco: una fila por usuario en el ALMACEN (tabla claves_binance),
+#     cifrada con Fernet (AES-128-CBC + HMAC) usando la clave maestra
+#     de TESLABTC_MASTER_KEY (Fernet.generate_key())
+#   - En memoria: mapa ya descifrado; obtener() no toca el disco
+#   - guardar(): una transacción por usuario y después la memoria
+#   - Migración única del antiguo binance_keys.json en texto plano
+#     (se borra tras importarlo)
+# Sin clave maestra o sin el paquete "cryptography" el keystore no
+# arranca: nunca se guardan claves en claro.
+# ============================================================
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from utils.token_store import ALMACEN, DATA_DIR, AlmacenTokens
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:  # dependencia opcional
+    Fernet = None
+    InvalidToken = Exception
+
+MASTER_KEY_ENV = "TESLABTC_MASTER_KEY"
+BINANCE_KEYS_FILE = os.path.join(DATA_DIR, "binance_keys.json")
+
+
+class KeystoreNoDisponible(RuntimeError):
+    pass
+
+
+class Keystore:
+    def __init__(
+        self,
+        almacen: AlmacenTokens,
+        clave_maestra: Optional[str] = None,
+        archivo_legado: Optional[str] = None,
+    ):
+        self.almacen = almacen
+        self.clave_maestra = clave_maestra
+        self.archivo_legado = archivo_legado
+        self._fernet = None
+        self._claves: Optional[Dict[str, Dict[str, str]]] = None
+        self._lock = threading.Lock()
+
+    def _cifrador(self):
+        if self._fernet is None:
+            if Fernet is None:
+                raise KeystoreNoDisponible("Falta el paquete 'cryptography'")
+            clave = self.clave_maestra or os.getenv(MASTER_KEY_ENV)
+            if not clave:
+                raise KeystoreNoDisponible(f"Falta la clave maestra ({MASTER_KEY_ENV})")
+            self._fernet = Fernet(clave.encode() if isinstance(clave, str) else clave)
+        return self._fernet
+
+    def _cifrar(self, datos: Dict[str, str]) -> bytes:
+        return self._cifrador().encrypt(json.dumps(datos).encode())
+
+    def _cargar(self) -> Dict[str, Dict[str, str]]:
+        """Descifra todas las filas una vez (primera consulta)."""
+        if self._claves is not None:
+            return self._claves
+        with self._lock:
+            if self._claves is None:
+                f = self._cifrador()
+                claves: Dict[str, Dict[str, str]] = {}
+                for usuario, blob in self.almacen.claves_cifradas().items():
+                    try:
+                        claves[usuario] = json.loads(f.decrypt(blob))
+                    except InvalidToken:
+                        print(f"⚠️ Claves de {usuario} no descifrables con la clave maestra actual")
+                self._migrar_legado(claves)
+                self._claves = claves
+        return self._claves
+
+    def _migrar_legado(self, claves: Dict[str, Dict[str, str]]) -> None:
+        ruta = self.archivo_legado
+        if not ruta or not os.path.exists(ruta):
+            return
+        with open(ruta, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        nuevas = {
+            str(u): {"api_key": d["api_key"], "api_secret": d["api_secret"]}
+            for u, d in (data if isinstance(data, dict) else {}).items()
+            if str(u) not in claves
+        }
+        self.almacen.guardar_claves_cifradas({u: self._cifrar(d) for u, d in nuevas.items()})
+        claves.update(nuevas)
+        os.remove(ruta)
+        print(f"🔐 {len(nuevas)} claves Binance migradas y cifradas; {ruta} eliminado")
+
+    def obtener(self, usuario) -> Optional[Dict[str, str]]:
+        d = self._cargar().get(str(usuario))
+        return dict(d) if d is not None else None
+
+    def guardar(self, usuario, api_key: str, api_secret: str) -> None:
+        claves = self._cargar()
+        datos = {"api_key": api_key, "api_secret": api_secret}
+        blob = self._cifrar(datos)
+        with self._lock:
+            self.almacen.guardar_claves_cifradas({str(usuario): blob})
+            claves[str(usuario)] = datos
+
+    def __len__(self) -> int:
+        return len(self._cargar())
+
+
+KEYSTORE = Keystore(ALMACEN, archivo_legado=BINANCE_KEYS_FILE)
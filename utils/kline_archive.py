@@ -0,0 +1,333 @@
+# ============================================================
+# 🗄️ TESLABTC.KG — utils/kline_archive.py
+# ============================================================
+# Archivo histórico local de velas en /app/data/klines:
+#   - Una carpeta por (símbolo, intervalo) con un fichero binario por
+#     columna (open_time int64 + open/high/low/close/volume float64),
+#     registros de ancho fijo (8 bytes) ordenados por open_time
+#   - Lectura vía mmap: rango() busca por open_time con bisect y
+#     devuelve Velas cuyas columnas son vistas (sin copias)
+#   - Importador de dumps mensuales de Binance Vision (.zip / .csv)
+#   - Altas desde el KLINE_STORE en vivo (sólo velas cerradas), con la
+#     E/S de disco en un hilo (nunca en el event loop); sólo los símbolos
+#     de ARCHIVO_SIMBOLOS (el store también guarda los que pida cualquiera)
+# Importar dumps desde la línea de comandos:
+#   python -m utils.kline_archive importar BTCUSDT-5m-2024-01.zip [...]
+#   python -m utils.kline_archive importar datos.csv --simbolo BTCUSDT --intervalo 5m
+# ============================================================
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import io
+import mmap
+import os
+import re
+import sys
+import threading
+import time
+import zipfile
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.binance_ws import WS_SIMBOLOS
+from utils.kline_store import INTERVALO_MS
+from utils.velas import COLUMNAS, Velas
+
+DATA_DIR = os.getenv("TESLABTC_DATA_DIR", "/app/data")
+ARCHIVO_HABILITADO = os.getenv("TESLABTC_ARCHIVO", "1") != "0"
+ARCHIVO_CADA_S = 60.0
+ARCHIVO_SIMBOLOS = {
+    s.strip().upper()
+    for s in os.getenv("TESLABTC_ARCHIVO_SIMBOLOS", ",".join(WS_SIMBOLOS)).split(",")
+    if s.strip()
+}
+# Vacío = todos los intervalos de esos símbolos
+ARCHIVO_INTERVALOS = {i.strip() for i in os.getenv("TESLABTC_ARCHIVO_INTERVALOS", "").split(",") if i.strip()}
+
+TIPOS = {"open_time": "q", "open": "d", "high": "d", "low": "d", "close": "d", "volume": "d"}
+ANCHO = 8  # bytes por valor (int64 / float64)
+
+Fila = Tuple[int, float, float, float, float, float]
+
+
+class _SerieArchivo:
+    """Columnas de un (símbolo, intervalo) mapeadas en memoria."""
+
+    def __init__(self, carpeta: str):
+        os.makedirs(carpeta, exist_ok=True)
+        self.carpeta = carpeta
+        self.n = 0
+        self._vistas: Dict[str, memoryview] = {}
+        self._mapear()
+
+    def _ruta(self, col: str) -> str:
+        return os.path.join(self.carpeta, f"{col}.bin")
+
+    def _mapear(self) -> None:
+        """(Re)abre los mmap. Recorta columnas desiguales (escritura interrumpida)."""
+        for col in COLUMNAS:
+            if not os.path.exists(self._ruta(col)):
+                open(self._ruta(col), "wb").close()
+        n = min(os.path.getsize(self._ruta(col)) // ANCHO for col in COLUMNAS)
+        vistas: Dict[str, memoryview] = {}
+        for col in COLUMNAS:
+            ruta = self._ruta(col)
+            if os.path.getsize(ruta) != n * ANCHO:
+                os.truncate(ruta, n * ANCHO)
+            if n == 0:
+                vistas[col] = memoryview(array(TIPOS[col]))
+                continue
+            with open(ruta, "rb") as f:
+                mm = mmap.mmap(f.fileno(), n * ANCHO, access=mmap.ACCESS_READ)
+            # Los mmap anteriores siguen vivos mientras alguien use sus vistas
+            vistas[col] = memoryview(mm).cast(TIPOS[col])
+        self._vistas = vistas
+        self.n = n
+
+    def velas(self) -> Velas:
+        return Velas(*(self._vistas[col] for col in COLUMNAS))
+
+    def ultimo_open_time(self) -> Optional[int]:
+        return self._vistas["open_time"][-1] if self.n else None
+
+    def agregar(self, filas: List[Fila]) -> int:
+        """Añade al final filas con open_time posterior al último guardado."""
+        ultimo = self.ultimo_open_time()
+        if ultimo is not None:
+            filas = [f for f in filas if f[0] > ultimo]
+        if not filas:
+            return 0
+        for j, col in enumerate(COLUMNAS):
+            with open(self._ruta(col), "ab") as f:
+                array(TIPOS[col], (fila[j] for fila in filas)).tofile(f)
+        self._mapear()
+        return len(filas)
+
+    def reescribir(self, filas: List[Fila]) -> None:
+        """Sustituye todo el contenido (filas ya ordenadas y sin duplicados)."""
+        for j, col in enumerate(COLUMNAS):
+            tmp = self._ruta(col) + ".tmp"
+            with open(tmp, "wb") as f:
+                array(TIPOS[col], (fila[j] for fila in filas)).tofile(f)
+            os.replace(tmp, self._ruta(col))
+        self._mapear()
+
+    def filas(self) -> List[Fila]:
+        v = self._vistas
+        return list(zip(*(v[col] for col in COLUMNAS)))
+
+
+class KlineArchive:
+    def __init__(self, directorio: str):
+        self.directorio = directorio
+        self._series: Dict[Tuple[str, str], _SerieArchivo] = {}
+        self.ultimo_error: Optional[str] = None
+        # Lecturas y altas corren en hilos (asyncio.to_thread): un solo
+        # escritor a la vez y una sola apertura por serie
+        self._lock = threading.Lock()
+
+    def _serie(self, simbolo: str, intervalo: str) -> _SerieArchivo:
+        key = (simbolo.upper(), intervalo)
+        serie = self._series.get(key)
+        if serie is None:
+            with self._lock:
+                serie = self._series.get(key)
+                if serie is None:
+                    carpeta = os.path.join(self.directorio, f"{key[0]}_{intervalo}")
+                    serie = self._series[key] = _SerieArchivo(carpeta)
+        return serie
+
+    # --------------------------------------------------------
+    # Lectura
+    # --------------------------------------------------------
+    def ultimo_open_time(self, simbolo: str, intervalo: str) -> Optional[int]:
+        return self._serie(simbolo, intervalo).ultimo_open_time()
+
+    def rango(
+        self,
+        simbolo: str,
+        intervalo: str,
+        desde_ms: Optional[int] = None,
+        hasta_ms: Optional[int] = None,
+    ) -> Velas:
+        """Velas con desde_ms <= open_time <= hasta_ms (vista, sin copia)."""
+        v = self._serie(simbolo, intervalo).velas()
+        ot = v.open_time
+        i = bisect_left(ot, desde_ms) if desde_ms is not None else 0
+        j = bisect_right(ot, hasta_ms) if hasta_ms is not None else len(ot)
+        return v[i:j]
+
+    def ultimas(self, simbolo: str, intervalo: str, n: int) -> Velas:
+        return self._serie(simbolo, intervalo).velas()[-n:]
+
+    # --------------------------------------------------------
+    # Escritura
+    # --------------------------------------------------------
+    def agregar(self, simbolo: str, intervalo: str, velas: Iterable[Dict[str, Any]]) -> int:
+        """Añade velas (dicts) al final; ignora las ya archivadas."""
+        filas = [
+            (int(k["open_time"]), float(k["open"]), float(k["high"]),
+             float(k["low"]), float(k["close"]), float(k.get("volume", 0.0)))
+            for k in velas
+        ]
+        serie = self._serie(simbolo, intervalo)
+        with self._lock:
+            return serie.agregar(filas)
+
+    def fusionar(self, simbolo: str, intervalo: str, filas: List[Fila]) -> int:
+        """
+        Inserta filas en cualquier posición (p. ej. meses anteriores).
+        Si todas son posteriores a lo archivado, es un simple append.
+        """
+        if not filas:
+            return 0
+        filas = sorted(filas)
+        serie = self._serie(simbolo, intervalo)
+        with self._lock:
+            ultimo = serie.ultimo_open_time()
+            if ultimo is None or filas[0][0] > ultimo:
+                return serie.agregar(filas)
+            antes = serie.n
+            unidas = {f[0]: f for f in serie.filas()}
+            for f in filas:
+                unidas.setdefault(f[0], f)
+            serie.reescribir([unidas[t] for t in sorted(unidas)])
+            return serie.n - antes
+
+    def importar_binance_vision(self, ruta: str, simbolo: str, intervalo: str) -> int:
+        """
+        Importa un dump de data.binance.vision (BTCUSDT-5m-2024-01.zip o .csv).
+        Acepta open_time en milisegundos o microsegundos (dumps desde 2025).
+        """
+        if ruta.lower().endswith(".zip"):
+            with zipfile.ZipFile(ruta) as z:
+                filas: List[Fila] = []
+                for nombre in z.namelist():
+                    if nombre.lower().endswith(".csv"):
+                        with z.open(nombre) as f:
+                            filas.extend(_leer_csv(io.TextIOWrapper(f, encoding="utf-8")))
+        else:
+            with open(ruta, newline="", encoding="utf-8") as f:
+                filas = _leer_csv(f)
+        return self.fusionar(simbolo, intervalo, filas)
+
+    def estado(self) -> Dict[str, Any]:
+        return {
+            "directorio": self.directorio,
+            "series": {
+                f"{s}:{i}": {"velas": serie.n, "ultimo_open_time": serie.ultimo_open_time()}
+                for (s, i), serie in self._series.items()
+            },
+            "ultimo_error": self.ultimo_error,
+        }
+
+
+def _leer_csv(f) -> List[Fila]:
+    filas: List[Fila] = []
+    for r in csv.reader(f):
+        if not r or not r[0].strip().isdigit():
+            continue  # cabecera o línea vacía
+        t = int(r[0])
+        if t > 10**14:
+            t //= 1000  # microsegundos → milisegundos
+        filas.append((t, float(r[1]), float(r[2]), float(r[3]), float(r[4]), float(r[5])))
+    return filas
+
+
+# ------------------------------------------------------------
+# 🔁 Altas desde el KLINE_STORE (velas cerradas)
+# ------------------------------------------------------------
+ARCHIVO = KlineArchive(os.path.join(DATA_DIR, "klines"))
+
+
+def _archivable(simbolo: str, intervalo: str) -> bool:
+    return simbolo in ARCHIVO_SIMBOLOS and (not ARCHIVO_INTERVALOS or intervalo in ARCHIVO_INTERVALOS)
+
+
+def _copiar_store(store) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+    """
+    Copia de los buffers archivables (en el event loop: el store no es
+    thread-safe). El resto no crea carpetas ni mmaps.
+    """
+    return {(s, i): store.velas(s, i) for s, i in store.claves() if _archivable(s, i)}
+
+
+def _archivar_velas(
+    velas: Dict[Tuple[str, str], List[Dict[str, Any]]],
+    archivo: KlineArchive,
+    ahora_ms: Optional[int] = None,
+) -> int:
+    ahora_ms = ahora_ms if ahora_ms is not None else int(time.time() * 1000)
+    total = 0
+    for (simbolo, intervalo), buffer in velas.items():
+        paso = INTERVALO_MS.get(intervalo)
+        if not paso:
+            continue
+        ultimo = archivo.ultimo_open_time(simbolo, intervalo)
+        nuevas: List[Dict[str, Any]] = []
+        for v in reversed(buffer):
+            if ultimo is not None and v["open_time"] <= ultimo:
+                break
+            if v["open_time"] + paso <= ahora_ms:
+                nuevas.append(v)
+        nuevas.reverse()
+        total += archivo.agregar(simbolo, intervalo, nuevas)
+    return total
+
+
+def archivar_store(store, archivo: KlineArchive, ahora_ms: Optional[int] = None) -> int:
+    """Pasa al archivo las velas cerradas del store que aún no estén guardadas."""
+    return _archivar_velas(_copiar_store(store), archivo, ahora_ms)
+
+
+async def archivar_loop(store, archivo: KlineArchive = ARCHIVO, cada_s: float = ARCHIVO_CADA_S):
+    while True:
+        try:
+            await asyncio.to_thread(_archivar_velas, _copiar_store(store), archivo)
+            archivo.ultimo_error = None
+        except Exception as e:
+            archivo.ultimo_error = f"{type(e).__name__}: {e}"
+        await asyncio.sleep(cada_s)
+
+
+# ------------------------------------------------------------
+# 🖥️ CLI: importar dumps de Binance Vision
+# ------------------------------------------------------------
+_NOMBRE_DUMP = re.compile(r"^([A-Z0-9]+)-(\w+)-\d{4}-\d{2}(?:-\d{2})?\.(?:zip|csv)$", re.I)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(prog="python -m utils.kline_archive", description="Archivo local de velas")
+    sub = p.add_subparsers(dest="orden", required=True)
+    imp = sub.add_parser("importar", help="Importa dumps de data.binance.vision (.zip / .csv)")
+    imp.add_argument("rutas", nargs="+")
+    imp.add_argument("--simbolo", help="Si no se deduce del nombre (BTCUSDT-5m-2024-01.zip)")
+    imp.add_argument("--intervalo", help="Si no se deduce del nombre")
+    imp.add_argument("--directorio", default=ARCHIVO.directorio)
+    args = p.parse_args(argv)
+
+    archivo = KlineArchive(args.directorio)
+    errores = 0
+    for ruta in args.rutas:
+        m = _NOMBRE_DUMP.match(os.path.basename(ruta))
+        simbolo = args.simbolo or (m.group(1).upper() if m else None)
+        intervalo = args.intervalo or (m.group(2) if m else None)
+        if not simbolo or intervalo not in INTERVALO_MS:
+            print(f"⛔ {ruta}: indica --simbolo y --intervalo válidos")
+            errores += 1
+            continue
+        try:
+            n = archivo.importar_binance_vision(ruta, simbolo, intervalo)
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            print(f"⛔ {ruta}: {e}")
+            errores += 1
+            continue
+        print(f"✅ {ruta}: {n} velas nuevas en {simbolo} {intervalo}")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+# ============================================================
+# 🗃️ TESLABTC.KG — utils/kline_store.py
+# ============================================================
+# Almacén en memoria de velas por (símbolo, intervalo):
+#   - Buffer circular de tamaño fijo (deque con maxlen)
+#   - Primera lectura: descarga sólo lo pedido (`limite`); si luego se
+#     pide más de lo cargado, se recarga con la nueva profundidad
+#   - Acotado a MAX_CLAVES (símbolo, intervalo): se expulsa la menos
+#     usada (LRU), nunca una en vivo; el símbolo llega de peticiones anónimas
+#   - Siguientes: sólo velas con open_time >= la última guardada,
+#     reemplazando la vela aún en formación
+#   - Si la descarga falla, se sirven las velas ya guardadas
+#   - Claves "en vivo" (alimentadas por WebSocket): se leen sin red
+# ============================================================
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+# Duración de cada intervalo Binance en milisegundos
+INTERVALO_MS: Dict[str, int] = {
+    "1m": 60_000,
+    "3m": 3 * 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1h": 3_600_000,
+    "2h": 2 * 3_600_000,
+    "4h": 4 * 3_600_000,
+    "6h": 6 * 3_600_000,
+    "8h": 8 * 3_600_000,
+    "12h": 12 * 3_600_000,
+    "1d": 86_400_000,
+    "3d": 3 * 86_400_000,
+    "1w": 7 * 86_400_000,
+}
+
+CAPACIDAD_DEFAULT = 1000   # máximo que Binance entrega por petición
+REFRESCO_MIN_S = 1.0       # no repetir la descarga incremental antes de este tiempo
+MAX_CLAVES = int(os.getenv("TESLABTC_KLINES_MAX_CLAVES", "64"))
+
+Vela = Dict[str, Any]
+# descargar(simbolo, intervalo, limite, start_time) -> velas o None si falló
+Descargador = Callable[[str, str, int, Optional[int]], Awaitable[Optional[List[Vela]]]]
+
+
+class KlineStore:
+    def __init__(
+        self, descargar: Descargador, capacidad: int = CAPACIDAD_DEFAULT, max_claves: int = MAX_CLAVES
+    ):
+        self._descargar = descargar
+        self.capacidad = capacidad
+        self.max_claves = max_claves
+        # Orden de uso (LRU): el primero es el candidato a expulsar
+        self._buffers: "OrderedDict[Tuple[str, str], Deque[Vela]]" = OrderedDict()
+        self._profundidad: Dict[Tuple[str, str], int] = {}     # velas pedidas en la última carga completa
+        self._ultimo_refresco: Dict[Tuple[str, str], float] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self._en_vivo: set = set()
+
+    def _lock(self, key: Tuple[str, str]) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def _olvidar(self, key: Tuple[str, str]) -> None:
+        self._buffers.pop(key, None)
+        self._profundidad.pop(key, None)
+        self._ultimo_refresco.pop(key, None)
+        lock = self._locks.get(key)
+        if lock is not None and not lock.locked():
+            del self._locks[key]
+
+    def _expulsar(self) -> None:
+        """Expulsa las claves menos usadas por encima de max_claves (nunca en vivo ni en uso)."""
+        sobran = len(self._buffers) - self.max_claves
+        if sobran <= 0:
+            return
+        for key in list(self._buffers):
+            if sobran <= 0:
+                break
+            lock = self._locks.get(key)
+            if key in self._en_vivo or (lock is not None and lock.locked()):
+                continue
+            self._olvidar(key)
+            sobran -= 1
+
+    def _corto(self, key: Tuple[str, str], buf: Deque[Vela], limite: int) -> bool:
+        """El buffer tiene menos de `limite` velas y la última carga pidió menos."""
+        return len(buf) < limite and self._profundidad.get(key, 0) < limite
+
+    def claves(self) -> List[Tuple[str, str]]:
+        """(símbolo, intervalo) con velas cargadas."""
+        return [key for key, buf in self._buffers.items() if buf]
+
+    def velas(self, simbolo: str, intervalo: str, limite: Optional[int] = None) -> List[Vela]:
+        """Lectura directa del buffer (sin red)."""
+        buf = self._buffers.get((simbolo.upper(), intervalo))
+        if not buf:
+            return []
+        data = list(buf)
+        return data[-limite:] if limite else data
+
+    def upsert(self, simbolo: str, intervalo: str, nuevas: List[Vela]) -> None:
+        """
+        Inserta velas ordenadas por open_time. Las que ya existen
+        (mismo open_time o posteriores) se reemplazan.
+        """
+        if not nuevas:
+            return
+        key = (simbolo.upper(), intervalo)
+        buf = self._buffers.get(key)
+        if buf is None:
+            buf = self._buffers[key] = deque(maxlen=self.capacidad)
+            self._expulsar()
+        desde = nuevas[0]["open_time"]
+        while buf and buf[-1]["open_time"] >= desde:
+            buf.pop()
+        buf.extend(nuevas)
+
+    def actualizar_vela(self, simbolo: str, intervalo: str, vela: Vela) -> bool:
+        """
+        Aplica una vela recibida en vivo sobre un buffer ya cargado.
+        Devuelve False si hay un hueco (faltan velas intermedias) o si
+        el buffer aún no se cargó: el llamador debe rellenar por REST.
+        """
+        buf = self._buffers.get((simbolo.upper(), intervalo))
+        if not buf:
+            return False
+        ultimo = buf[-1]["open_time"]
+        t = vela["open_time"]
+        if t == ultimo:
+            buf[-1] = vela
+        elif t > ultimo:
+            paso = INTERVALO_MS.get(intervalo)
+            if paso and t - ultimo > paso:
+                return False
+            buf.append(vela)
+        # t < ultimo: mensaje atrasado, ya cubierto por el buffer
+        return True
+
+    def marcar_en_vivo(self, simbolo: str, intervalo: str, vivo: bool = True) -> None:
+        key = (simbolo.upper(), intervalo)
+        if vivo:
+            self._en_vivo.add(key)
+        else:
+            self._en_vivo.discard(key)
+
+    async def refrescar(self, simbolo: str, intervalo: str) -> List[Vela]:
+        """Descarga incremental forzada (relleno de huecos tras reconexión)."""
+        return await self.obtener(simbolo, intervalo, self.capacidad, forzar=True)
+
+    async def obtener(
+        self, simbolo: str, intervalo: str, limite: int = 120, forzar: bool = False
+    ) -> List[Vela]:
+        simbolo = simbolo.upper()
+        key = (simbolo, intervalo)
+        limite = max(1, min(int(limite), self.capacidad))
+
+        buf = self._buffers.get(key)
+        if buf:
+            self._buffers.move_to_end(key)
+            if not forzar and key in self._en_vivo and not self._corto(key, buf, limite):
+                return self.velas(simbolo, intervalo, limite)
+
+        async with self._lock(key):
+            buf = self._buffers.get(key)
+            paso = INTERVALO_MS.get(intervalo)
+            ahora = time.time()
+
+            if (
+                buf and paso and not forzar and not self._corto(key, buf, limite)
+                and ahora - self._ultimo_refresco.get(key, 0.0) < REFRESCO_MIN_S
+            ):
+                return self.velas(simbolo, intervalo, limite)
+
+            if not buf or not paso or self._corto(key, buf, limite):
+                # Primera carga, intervalo desconocido o más profundidad de la
+                # cargada: descarga completa de lo pedido
+                nuevas = await self._cargar(key, limite)
+            else:
+                ultimo = buf[-1]["open_time"]
+                faltan = int(ahora * 1000 - ultimo) // paso + 1
+                if faltan >= self._profundidad.get(key, self.capacidad):
+                    # Hueco mayor que lo cargado: recargar todo
+                    nuevas = await self._cargar(key, self._profundidad.get(key, limite))
+                else:
+                    nuevas = await self._descargar(simbolo, intervalo, faltan + 1, ultimo)
+                    self.upsert(simbolo, intervalo, nuevas or [])
+            if nuevas:
+                self._ultimo_refresco[key] = ahora
+
+        if key not in self._buffers:
+            self._olvidar(key)   # símbolo inválido / sin datos: no deja ni el lock
+        return self.velas(simbolo, intervalo, limite)
+
+    async def _cargar(self, key: Tuple[str, str], limite: int) -> Optional[List[Vela]]:
+        profundidad = max(limite, self._profundidad.get(key, 0))
+        nuevas = await self._descargar(key[0], key[1], profundidad, None)
+        if nuevas:
+            self._buffers[key] = deque(nuevas, maxlen=self.capacidad)
+            self._buffers.move_to_end(key)
+            self._profundidad[key] = profundidad
+            self._expulsar()
+        return nuevas
+
+    def estado(self) -> Dict[str, Any]:
+        return {
+            f"{s}:{i}": {
+                "velas": len(buf),
+                "ultimo_open_time": buf[-1]["open_time"] if buf else None,
+                "en_vivo": (s, i) in self._en_vivo,
+            }
+            for (s, i), buf in self._buffers.items()
+        }
@@ -1,41 +1,177 @@
 # ============================================================
-# 📡 TESLABTC.KG — utils/live_monitor.py (v3.6.0)
+# 📡 TESLABTC.KG — utils/live_monitor.py (v3.7.0)
 # ============================================================
-# Monitor ligero en background:
-#  - Mantiene un registro circular de eventos/alertas
-#  - Evita consumo alto de CPU/RAM
+# Monitor de estructura en background:
+#  - Se despierta en cada cierre de vela de los intervalos configurados
+#    y sólo re-evalúa los (símbolo, intervalo) que acaban de cerrar
+#  - Swings → tendencia → BOS/CHoCH → OB válido sobre velas CERRADAS
+#    (desde el KLINE_STORE: en memoria si el WebSocket está vivo)
+#  - Alertas sólo en transiciones (ruptura nueva, cambio de tendencia,
+#    OB nuevo); la primera evaluación sólo fija el estado
+#  - Registro circular (deque) con número de secuencia por alerta;
+#    cada alerta se publica también en el HUB (SSE / WebSocket) y se
+#    encola en el outbox de Telegram
 # ============================================================
 
 import asyncio
+import itertools
+import os
+import time
+from collections import deque
 from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.binance_ws import WS_SIMBOLOS
+from utils.bos_choch import detectar_bos_choch, tendencia_por_estructura
+from utils.fanout import en_pool
+from utils.kline_store import INTERVALO_MS
+from utils.ob_detector import detectar_ob_valido
+from utils.price_utils import KLINE_STORE
+from utils.stream_hub import HUB
+from utils.swings import detectar_swings
+from utils.telegram_outbox import OUTBOX
 
 TZ_COL = timezone(timedelta(hours=-5))
-_ALERTS = []
-_MONITOR_ON = True
 _MAX_LOG = 200
+_ALERTS = deque(maxlen=_MAX_LOG)
+_SEQ = itertools.count(1)
+_MONITOR_ON = True
 
-def _log(msg):
-    if len(_ALERTS) >= _MAX_LOG:
-        _ALERTS.pop(0)
-    _ALERTS.append({"ts": datetime.now(TZ_COL).strftime("%H:%M:%S"), "msg": msg})
+MONITOR_SIMBOLOS = [
+    s.strip().upper() for s in os.getenv("TESLABTC_MONITOR_SIMBOLOS", ",".join(WS_SIMBOLOS)).split(",")
+    if s.strip()
+]
+MONITOR_INTERVALOS = [
+    i.strip() for i in os.getenv("TESLABTC_MONITOR_INTERVALOS", "4h,1h,15m").split(",")
+    if i.strip() in INTERVALO_MS
+]
+VELAS_MONITOR = 300
+MARGEN_CIERRE_S = 2.0    # espera tras el cierre para que llegue la vela cerrada
 
+# (símbolo, intervalo) → último estado evaluado
+_ESTADOS: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+
+def _log(msg, **extra):
+    entrada = {
+        "seq": next(_SEQ),
+        "ts": datetime.now(TZ_COL).strftime("%H:%M:%S"),
+        "msg": msg,
+        **extra,
+    }
+    _ALERTS.append(entrada)
+    HUB.publicar({"tipo": "alerta", **entrada, "seq_monitor": entrada["seq"]})
+    if "evento" in extra:
+        OUTBOX.encolar(entrada)
+
+
+# ------------------------------------------------------------
+# 🧠 Evaluación de un (símbolo, intervalo)
+# ------------------------------------------------------------
+def evaluar_estado(velas: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Estado estructural sobre velas cerradas (cálculo puro)."""
+    swings = detectar_swings(velas)
+    tendencia = tendencia_por_estructura(swings)
+    niveles = detectar_bos_choch(swings, tendencia)
+    cierre = float(velas[-1]["close"]) if velas else None
+
+    ruptura = None
+    bos, choch = niveles["BOS"], niveles["CHoCH"]
+    if cierre is not None and bos and choch:
+        if (bos["tipo"] == "alcista" and cierre > bos["nivel"]) or (
+            bos["tipo"] == "bajista" and cierre < bos["nivel"]
+        ):
+            ruptura = ("BOS", bos["tipo"], round(bos["nivel"], 2))
+        elif (choch["tipo"] == "alcista" and cierre > choch["nivel"]) or (
+            choch["tipo"] == "bajista" and cierre < choch["nivel"]
+        ):
+            ruptura = ("CHoCH", choch["tipo"], round(choch["nivel"], 2))
+
+    ob = detectar_ob_valido(velas, tendencia) if tendencia in ("alcista", "bajista") else None
+    return {
+        "tendencia": tendencia,
+        "ruptura": ruptura,
+        "ob": (ob["tipo"], round(ob["rango"][0], 2), round(ob["rango"][1], 2)) if ob else None,
+        "cierre": cierre,
+    }
+
+
+def transiciones(previo: Optional[Dict[str, Any]], actual: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """(tipo, mensaje) de cada cambio entre dos estados; nada si no hay previo."""
+    if previo is None:
+        return []
+    out = []
+    if actual["ruptura"] and actual["ruptura"] != previo["ruptura"]:
+        evento, tipo, nivel = actual["ruptura"]
+        out.append((evento, f"{'⚡' if evento == 'BOS' else '🔄'} {evento} {tipo} ({nivel:,.2f})"))
+    if actual["tendencia"] != previo["tendencia"] and "sin_datos" not in (actual["tendencia"], previo["tendencia"]):
+        out.append(("tendencia", f"🧭 Tendencia {previo['tendencia']} → {actual['tendencia']}"))
+    if actual["ob"] and actual["ob"] != previo["ob"]:
+        tipo, lo, hi = actual["ob"]
+        out.append(("OB", f"🧱 OB de {tipo} válido {lo:,.2f}–{hi:,.2f}"))
+    return out
+
+
+async def _revisar(simbolo: str, intervalo: str, ahora_ms: int) -> None:
+    velas = await KLINE_STORE.obtener(simbolo, intervalo, VELAS_MONITOR + 1)
+    paso = INTERVALO_MS[intervalo]
+    cerradas = [v for v in velas if int(v["open_time"]) + paso <= ahora_ms]
+    if len(cerradas) < 20:
+        return
+    actual = await en_pool(evaluar_estado, cerradas[-VELAS_MONITOR:])
+    clave = (simbolo, intervalo)
+    for tipo, msg in transiciones(_ESTADOS.get(clave), actual):
+        _log(f"{simbolo} {intervalo} · {msg}", simbolo=simbolo, intervalo=intervalo, evento=tipo)
+    _ESTADOS[clave] = actual
+
+
+def _proximo_cierre_ms(ahora_ms: int) -> int:
+    return min((ahora_ms // INTERVALO_MS[i] + 1) * INTERVALO_MS[i] for i in MONITOR_INTERVALOS)
+
+
+# ------------------------------------------------------------
+# 🔁 Loop (se lanza desde startup_event)
+# ------------------------------------------------------------
 async def live_monitor_loop():
     global _MONITOR_ON
     _MONITOR_ON = True
     _log("▶️ Monitor iniciado")
+    if not MONITOR_INTERVALOS:
+        return
+    # Estado inicial de todos los pares (sin alertas)
+    ahora_ms = int(time.time() * 1000)
+    pendientes = [(s, i) for s in MONITOR_SIMBOLOS for i in MONITOR_INTERVALOS]
     while _MONITOR_ON:
-        # Aquí podrías añadir chequeos reales de estructura/klines
-        await asyncio.sleep(15)
+        resultados = await asyncio.gather(
+            *(_revisar(s, i, ahora_ms) for s, i in pendientes), return_exceptions=True
+        )
+        for (s, i), r in zip(pendientes, resultados):
+            if isinstance(r, Exception):
+                _log(f"⚠️ {s} {i}: {r}")
+
+        cierre_ms = _proximo_cierre_ms(int(time.time() * 1000))
+        await asyncio.sleep(max(0.0, cierre_ms / 1000 - time.time()) + MARGEN_CIERRE_S)
+        ahora_ms = int(time.time() * 1000)
+        # Sólo los intervalos que cerraron en este corte
+        pendientes = [
+            (s, i) for s in MONITOR_SIMBOLOS for i in MONITOR_INTERVALOS
+            if cierre_ms % INTERVALO_MS[i] == 0
+        ]
 
 def stop_monitor():
     global _MONITOR_ON
     _MONITOR_ON = False
     _log("⏹️ Monitor detenido")
 
-def get_alerts():
+def get_alerts(desde: int = 0):
+    """Últimos 80 registros; con `desde`, sólo los de seq mayor (sondeo incremental)."""
+    logs = [a for a in _ALERTS if a["seq"] > desde] if desde else list(_ALERTS)
     return {
         "estado": "🟢 Activo" if _MONITOR_ON else "⏹️ Detenido",
         "ultima_actualizacion": datetime.now(TZ_COL).strftime("%d/%m/%Y %H:%M:%S"),
         "registros": len(_ALERTS),
-        "logs": _ALERTS[-80:]  # últimos 80
+        "ultimo_seq": _ALERTS[-1]["seq"] if _ALERTS else 0,
+        "simbolos": MONITOR_SIMBOLOS,
+        "intervalos": MONITOR_INTERVALOS,
+        "logs": logs[-80:]  # últimos 80
     }
@@ -0,0 +1,237 @@
+# ============================================================
+# 📈 TESLABTC.KG — utils/metricas.py
+# ============================================================
+# Métricas en formato Prometheus (texto 0.0.4), sin dependencias:
+#   - Contador / Histograma con etiquetas
+#   - etapa("nombre"): cronómetro de etapas (fetch, estructura,
+#     escenarios, formato...) → histograma + lista por petición
+#     (contextvar) para la cabecera Server-Timing
+#   - Colectores: funciones que aportan líneas al exportar
+#     (cache, coalescencia, breakers...)
+#   - Lag del event loop (tarea de fondo)
+# ============================================================
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+BUCKETS_DEFAULT = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_CADA_S = 0.5
+
+
+def _etiquetas(nombres: Sequence[str], valores: Sequence[str]) -> str:
+    if not nombres:
+        return ""
+    pares = ",".join(
+        f'{n}="{str(v)}"'.replace("\\", "\\\\").replace("\n", "\\n") for n, v in zip(nombres, valores)
+    )
+    return "{" + pares + "}"
+
+
+class Contador:
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *valores: str, n: float = 1.0) -> None:
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0.0) + n
+
+    def exportar(self) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        with self._lock:
+            for valores, v in sorted(self._valores.items()):
+                lineas.append(f"{self.nombre}{_etiquetas(self.etiquetas, valores)} {v:g}")
+        return lineas
+
+
+class Histograma:
+    def __init__(
+        self,
+        nombre: str,
+        ayuda: str,
+        etiquetas: Sequence[str] = (),
+        buckets: Sequence[float] = BUCKETS_DEFAULT,
+    ):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(sorted(buckets))
+        # por etiquetas: [conteos por bucket..., suma, total]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, segundos: float, *valores: str) -> None:
+        with self._lock:
+            s = self._series.get(valores)
+            if s is None:
+                s = self._series[valores] = [0.0] * (len(self.buckets) + 2)
+            for i, limite in enumerate(self.buckets):
+                if segundos <= limite:
+                    s[i] += 1
+                    break
+            s[-2] += segundos
+            s[-1] += 1
+
+    def exportar(self) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        nombres = self.etiquetas + ("le",)
+        with self._lock:
+            for valores, s in sorted(self._series.items()):
+                acumulado = 0.0
+                for i, limite in enumerate(self.buckets):
+                    acumulado += s[i]
+                    lineas.append(
+                        f"{self.nombre}_bucket{_etiquetas(nombres, valores + (f'{limite:g}',))} {acumulado:g}"
+                    )
+                lineas.append(f"{self.nombre}_bucket{_etiquetas(nombres, valores + ('+Inf',))} {s[-1]:g}")
+                lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {s[-2]:.6f}")
+                lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {s[-1]:g}")
+        return lineas
+
+
+# ------------------------------------------------------------
+# 📋 Registro
+# ------------------------------------------------------------
+_METRICAS: List = []
+_COLECTORES: List[Callable[[], List[str]]] = []
+
+
+def _registrar(m):
+    _METRICAS.append(m)
+    return m
+
+
+def registrar_colector(fn: Callable[[], List[str]]) -> None:
+    """fn() devuelve líneas ya formateadas (se evalúa en cada /metrics)."""
+    _COLECTORES.append(fn)
+
+
+def gauge(nombre: str, ayuda: str, valores: Dict[str, float], etiqueta: str = "") -> List[str]:
+    """Líneas de un gauge; con `etiqueta`, una serie por clave de `valores`."""
+    lineas = [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} gauge"]
+    for clave, v in valores.items():
+        sufijo = _etiquetas((etiqueta,), (clave,)) if etiqueta else ""
+        lineas.append(f"{nombre}{sufijo} {float(v):g}")
+    return lineas
+
+
+def exportar() -> str:
+    lineas: List[str] = []
+    for m in _METRICAS:
+        lineas.extend(m.exportar())
+    for fn in _COLECTORES:
+        try:
+            lineas.extend(fn())
+        except Exception:
+            continue
+    return "\n".join(lineas) + "\n"
+
+
+ETAPAS = _registrar(Histograma(
+    "teslabtc_etapa_segundos", "Duración de cada etapa del análisis", ("etapa",)))
+PETICIONES = _registrar(Histograma(
+    "teslabtc_http_peticion_segundos", "Duración de las peticiones HTTP de la API", ("ruta", "status")))
+UPSTREAM_TOTAL = _registrar(Contador(
+    "teslabtc_upstream_peticiones_total", "Llamadas a upstreams por fuente y status", ("fuente", "status")))
+UPSTREAM_SEGUNDOS = _registrar(Histograma(
+    "teslabtc_upstream_segundos", "Latencia de las llamadas a upstreams", ("fuente",)))
+LAG_LOOP = _registrar(Histograma(
+    "teslabtc_event_loop_lag_segundos", "Retraso del event loop respecto al sleep programado",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)))
+
+
+# ------------------------------------------------------------
+# ⏱️ Etapas (histograma + Server-Timing)
+# ------------------------------------------------------------
+_ETAPAS_PETICION: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = (
+    contextvars.ContextVar("teslabtc_etapas", default=None)
+)
+
+
+def iniciar_etapas() -> List[Tuple[str, float]]:
+    """Abre la lista de etapas de la petición actual (la usa el middleware)."""
+    etapas: List[Tuple[str, float]] = []
+    _ETAPAS_PETICION.set(etapas)
+    return etapas
+
+
+@contextmanager
+def etapa(nombre: str) -> Iterator[None]:
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t
+        ETAPAS.observar(dt, nombre)
+        etapas = _ETAPAS_PETICION.get()
+        if etapas is not None:
+            etapas.append((nombre, dt))
+
+
+def medir_etapa(nombre: str):
+    """Decorador: cronometra la función como etapa `nombre`."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def envoltura(*args, **kwargs):
+            with etapa(nombre):
+                return fn(*args, **kwargs)
+        return envoltura
+    return deco
+
+
+def server_timing(etapas: List[Tuple[str, float]], total_s: Optional[float] = None) -> str:
+    """`fetch;dur=12.3, estructura;dur=4.1, total;dur=20.5` (ms, etapas repetidas se suman)."""
+    suma: Dict[str, float] = {}
+    for nombre, dt in etapas:
+        suma[nombre] = suma.get(nombre, 0.0) + dt
+    partes = [f"{n};dur={dt * 1000:.1f}" for n, dt in suma.items()]
+    if total_s is not None:
+        partes.append(f"total;dur={total_s * 1000:.1f}")
+    return ", ".join(partes)
+
+
+# ------------------------------------------------------------
+# 🌐 Upstreams (lo llama utils/http_client)
+# ------------------------------------------------------------
+FUENTES = {
+    "api.binance.com": "binance_global",
+    "data-api.binance.vision": "binance_vision",
+    "api.coingecko.com": "coingecko",
+    "api.telegram.org": "telegram",
+}
+
+
+def registrar_upstream(host: str, status: str, segundos: float) -> None:
+    fuente = FUENTES.get(host, host)
+    UPSTREAM_TOTAL.inc(fuente, status)
+    UPSTREAM_SEGUNDOS.observar(segundos, fuente)
+
+
+# ------------------------------------------------------------
+# 🐢 Lag del event loop
+# ------------------------------------------------------------
+_LAG = {"ultimo_s": 0.0, "max_s": 0.0}
+
+
+async def monitor_lag_loop(cada_s: float = LAG_CADA_S):
+    while True:
+        t = time.perf_counter()
+        await asyncio.sleep(cada_s)
+        lag = max(0.0, time.perf_counter() - t - cada_s)
+        LAG_LOOP.observar(lag)
+        _LAG["ultimo_s"] = lag
+        _LAG["max_s"] = max(_LAG["max_s"], lag)
+
+
+registrar_colector(lambda: gauge(
+    "teslabtc_event_loop_lag_ultimo_segundos", "Último retraso medido del event loop",
+    {"": _LAG["ultimo_s"]}))
@@ -3,7 +3,9 @@
 # ============================================================
 from typing import List, Dict, Optional
 
-def detectar_ob_valido(klines: List[Dict], direccion: str) -> Optional[Dict]:
+from utils.velas import a_velas
+
+def detectar_ob_valido(klines, direccion: str) -> Optional[Dict]:
     """
     Heurística limpia TESLABTC:
 
@@ -15,6 +17,7 @@ def detectar_ob_valido(klines: List[Dict], direccion: str) -> Optional[Dict]:
           • Demanda (alcista): [LOW, max(OPEN, CLOSE)]
           • Oferta  (bajista): [min(OPEN, CLOSE), HIGH]
       - Si el rango ya fue MITIGADO (cierres dentro del OB) → se descarta.
+    Acepta lista de dicts o Velas.
     """
     if not klines or len(klines) < 20:
         return None
@@ -22,16 +25,17 @@ def detectar_ob_valido(klines: List[Dict], direccion: str) -> Optional[Dict]:
     if direccion not in ("alcista", "bajista"):
         return None
 
-    # Trabajamos con las últimas 50 velas
-    data = klines[-50:]
+    # Trabajamos con las últimas 50 velas (vistas columnares)
+    data = a_velas(klines, 50)
+    opens, highs, lows, closes = data.open, data.high, data.low, data.close
 
     idx = None
     # Recorremos hacia atrás desde la parte reciente
     for i in range(len(data) - 6, 3, -1):
-        o = float(data[i]["open"])
-        c = float(data[i]["close"])
-        h = float(data[i]["high"])
-        l = float(data[i]["low"])
+        o = opens[i]
+        c = closes[i]
+        h = highs[i]
+        l = lows[i]
 
         rango = abs(h - l)
         cuerpo = abs(c - o)
@@ -43,7 +47,7 @@ def detectar_ob_valido(klines: List[Dict], direccion: str) -> Optional[Dict]:
             continue
 
         # Desplazamiento posterior a favor de la dirección
-        closes_fut = [float(k["close"]) for k in data[i+1:i+6]]
+        closes_fut = closes[i+1:i+6]
         if not closes_fut:
             continue
 
@@ -62,10 +66,10 @@ def detectar_ob_valido(klines: List[Dict], direccion: str) -> Optional[Dict]:
     if idx is None:
         return None
 
-    o = float(data[idx]["open"])
-    c = float(data[idx]["close"])
-    h = float(data[idx]["high"])
-    l = float(data[idx]["low"])
+    o = opens[idx]
+    c = closes[idx]
+    h = highs[idx]
+    l = lows[idx]
 
     if direccion == "bajista":
         tipo = "oferta"
@@ -79,7 +83,7 @@ def detectar_ob_valido(klines: List[Dict], direccion: str) -> Optional[Dict]:
     rango_ob = (ob_low, ob_high)
 
     # Mitigación: si cierres posteriores están DENTRO del OB → lo descartamos
-    closes_recent = [float(k["close"]) for k in data[idx+1:]]
+    closes_recent = closes[idx+1:]
     mitigado = any(rango_ob[0] <= cr <= rango_ob[1] for cr in closes_recent)
     if mitigado:
         return None
@@ -0,0 +1,71 @@
+# ============================================================
+# 📍 TESLABTC.KG — utils/pivotes.py
+# ============================================================
+# Motor único de pivotes (fractales) en O(n) para cualquier depth:
+#   - Máximo/mínimo móvil con deque monótona (ventana de `depth` velas)
+#   - Pivote HIGH en i  ⇔  high[i] supera la ventana izquierda
+#     [i-depth, i-1] y la derecha [i+1, i+depth]
+#   - Cada lado puede ser estricto (>) o no estricto (>=), para
+#     respetar la semántica de empates de cada llamador:
+#       · analisis_premium._pivotes         → estricto / estricto
+#       · estructura_utils._pivot_extremos  → estricto / estricto (depth=1)
+#       · swings.detectar_swings            → estricto / no estricto
+# ============================================================
+from __future__ import annotations
+
+import operator
+from collections import deque
+from typing import List, Sequence, Tuple
+
+
+def extremo_movil(valores: Sequence[float], ancho: int, maximo: bool) -> List[float]:
+    """out[i] = max (o min) de valores[i-ancho+1 .. i], en O(n) amortizado."""
+    out: List[float] = [0.0] * len(valores)
+    dq: deque = deque()
+    for i, x in enumerate(valores):
+        if maximo:
+            while dq and valores[dq[-1]] <= x:
+                dq.pop()
+        else:
+            while dq and valores[dq[-1]] >= x:
+                dq.pop()
+        dq.append(i)
+        if dq[0] <= i - ancho:
+            dq.popleft()
+        out[i] = valores[dq[0]]
+    return out
+
+
+def indices_pivote(
+    highs: Sequence[float],
+    lows: Sequence[float],
+    depth: int,
+    izq_estricto: bool = True,
+    der_estricto: bool = True,
+) -> Tuple[List[int], List[int]]:
+    """
+    Devuelve (índices pivote high, índices pivote low) para i en [depth, n-depth).
+    Estricto: el pivote debe superar a todas las velas de ese lado (> / <);
+    no estricto: basta con igualarlas (>= / <=).
+    """
+    n = len(highs)
+    if depth < 1 or n < depth * 2 + 1:
+        return [], []
+
+    max_mov = extremo_movil(highs, depth, True)
+    min_mov = extremo_movil(lows, depth, False)
+    sup_izq = operator.gt if izq_estricto else operator.ge
+    sup_der = operator.gt if der_estricto else operator.ge
+    inf_izq = operator.lt if izq_estricto else operator.le
+    inf_der = operator.lt if der_estricto else operator.le
+
+    hi_idx: List[int] = []
+    lo_idx: List[int] = []
+    for i in range(depth, n - depth):
+        h = highs[i]
+        if sup_izq(h, max_mov[i - 1]) and sup_der(h, max_mov[i + depth]):
+            hi_idx.append(i)
+        l = lows[i]
+        if inf_izq(l, min_mov[i - 1]) and inf_der(l, min_mov[i + depth]):
+            lo_idx.append(i)
+    return hi_idx, lo_idx
@@ -1,20 +1,27 @@
 # ==============================================
 # 📦 TESLABTC.KG — utils/price_utils.py (REAL v5.2)
-# 1) Precio actual (Binance → CoinGecko fallback)
+# 1) Precio actual (WebSocket en vivo → Binance REST → CoinGecko fallback)
 # 2) Klines (Binance REST → Binance Vision → CoinGecko)
+#    Cada fuente con su circuit breaker (utils/circuit_breaker)
+#    Todo vía el cliente async compartido (utils/http_client)
+#    Velas guardadas en KLINE_STORE (utils/kline_store)
 # 3) Sesión NY (07:00–13:30 COL)
 # 4) PDH/PDL día operativo CERRADO (7PM–7PM COL)
 # 5) Rango asiático CERRADO (5PM–2AM COL)
 # ==============================================
 from __future__ import annotations
-import requests, time
+from bisect import bisect_left
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
+import httpx
 from typing import List, Dict, Any, Tuple, Optional
 
-from utils.time_utils import (
-    TZ_COL, now_col, last_closed_daily_window_col, last_closed_asian_window_col
-)
+from utils.time_utils import TZ_COL, now_col, ms_to_col, ventana_asia_ms, ventana_diaria_ms
+from utils.http_client import http_get
+from utils.kline_store import INTERVALO_MS, KlineStore
+from utils.velas import Velas, a_velas
+from utils.binance_ws import precio_en_vivo
+from utils.circuit_breaker import breaker, retry_after_s, esperar_reintento
 
 BINANCE_STATUS = "🦎 Fallback CoinGecko activo"
 UA = {"User-Agent": "teslabtc-kg/5.2"}
@@ -22,37 +29,73 @@ UA = {"User-Agent": "teslabtc-kg/5.2"}
 BINANCE_REST_BASE = "https://api.binance.com"
 BINANCE_VISION_BASE = "https://data-api.binance.vision"
 
+# Por fuente: 2 intentos como máximo; si cae, el breaker la salta
+MAX_INTENTOS_KLINES = 2
+TIMEOUT_KLINES_S = 6
+for _upstream in ("binance_global", "binance_vision", "coingecko"):
+    breaker(_upstream)   # registrados desde el arranque (visibles en /health)
+
 # -----------------------------
 # 💰 Precio
 # -----------------------------
-def obtener_precio(simbolo: str = "BTCUSDT") -> Dict[str, Any]:
+async def obtener_precio(simbolo: str = "BTCUSDT") -> Dict[str, Any]:
     global BINANCE_STATUS
-    try:
-        r = requests.get(
-            f"{BINANCE_REST_BASE}/api/v3/ticker/price",
-            params={"symbol": simbolo.upper()},
-            headers=UA, timeout=6
-        )
-        r.raise_for_status()
-        price = float(r.json()["price"])
-        BINANCE_STATUS = "✅ Conectado a Binance REST"
-        return {"precio": price, "fuente": "Binance (REST)"}
-    except Exception as e:
-        BINANCE_STATUS = f"⚠️ Binance REST: {e}"
+    vivo = precio_en_vivo(simbolo)
+    if vivo is not None:
+        BINANCE_STATUS = "✅ Conectado a Binance WebSocket"
+        return {"precio": vivo, "fuente": "Binance (WS)"}
 
-    try:
-        r = requests.get(
-            "https://api.coingecko.com/api/v3/simple/price",
-            params={"ids": "bitcoin", "vs_currencies": "usd"},
-            headers=UA, timeout=6
-        )
-        r.raise_for_status()
-        data = r.json()
-        if "bitcoin" in data and "usd" in data["bitcoin"]:
-            BINANCE_STATUS = "🦎 CoinGecko (fallback)"
-            return {"precio": float(data["bitcoin"]["usd"]), "fuente": "CoinGecko"}
-    except Exception as e:
-        BINANCE_STATUS = f"⚠️ CoinGecko: {e}"
+    cb = breaker("binance_global")
+    if cb.permitir():
+        try:
+            r = await http_get(
+                f"{BINANCE_REST_BASE}/api/v3/ticker/price",
+                params={"symbol": simbolo.upper()},
+                headers=UA, timeout=6
+            )
+            if r.status_code in (403, 418, 429, 451):
+                cb.registrar_fallo(f"Binance Global HTTP {r.status_code}", retry_after_s(r))
+            r.raise_for_status()
+            price = float(r.json()["price"])
+            cb.registrar_exito()
+            BINANCE_STATUS = "✅ Conectado a Binance REST"
+            return {"precio": price, "fuente": "Binance (REST)"}
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code >= 500:
+                cb.registrar_fallo(f"Binance Global HTTP {e.response.status_code}")
+            elif e.response.status_code not in (403, 418, 429, 451):
+                # 400 (símbolo inválido) etc.: el upstream responde; libera la prueba semi-abierta
+                cb.registrar_exito()
+            BINANCE_STATUS = f"⚠️ Binance REST: {e}"
+        except Exception as e:
+            cb.registrar_fallo(f"Binance Global: {type(e).__name__} {e}")
+            BINANCE_STATUS = f"⚠️ Binance REST: {e}"
+
+    cb = breaker("coingecko")
+    if cb.permitir():
+        try:
+            r = await http_get(
+                "https://api.coingecko.com/api/v3/simple/price",
+                params={"ids": "bitcoin", "vs_currencies": "usd"},
+                headers=UA, timeout=6
+            )
+            if r.status_code == 429:
+                cb.registrar_fallo("CoinGecko HTTP 429", retry_after_s(r))
+            r.raise_for_status()
+            cb.registrar_exito()
+            data = r.json()
+            if "bitcoin" in data and "usd" in data["bitcoin"]:
+                BINANCE_STATUS = "🦎 CoinGecko (fallback)"
+                return {"precio": float(data["bitcoin"]["usd"]), "fuente": "CoinGecko"}
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code >= 500:
+                cb.registrar_fallo(f"CoinGecko HTTP {e.response.status_code}")
+            elif e.response.status_code != 429:
+                cb.registrar_exito()
+            BINANCE_STATUS = f"⚠️ CoinGecko: {e}"
+        except Exception as e:
+            cb.registrar_fallo(f"CoinGecko: {type(e).__name__} {e}")
+            BINANCE_STATUS = f"⚠️ CoinGecko: {e}"
 
     BINANCE_STATUS = "⛔ Sin conexión de precio"
     return {"precio": None, "fuente": "⚙️ No conectado"}
@@ -68,26 +111,39 @@ def sesion_ny_activa() -> bool:
 # -----------------------------
 # 📊 Klines
 # -----------------------------
-def obtener_klines_binance(simbolo="BTCUSDT", intervalo="1h", limite=120) -> List[Dict[str, Any]]:
-    global BINANCE_STATUS
-    simbolo = simbolo.upper()
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Accept": "application/json",
-        "Connection": "keep-alive",
-    }
+KLINES_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "application/json",
+}
+_ULTIMO_ERROR_KLINES: Optional[str] = None
+
+async def _descargar_klines_binance(
+    simbolo: str, intervalo: str, limite: int, start_time: Optional[int] = None
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Descarga velas reales (Binance Global → Binance Vision).
+    Con start_time sólo trae velas desde ese open_time (refresco incremental).
+    Devuelve None si ninguna fuente respondió.
+    """
+    global BINANCE_STATUS, _ULTIMO_ERROR_KLINES
     urls = [
-        ("Binance Global", f"{BINANCE_REST_BASE}/api/v3/klines"),
-        ("Binance Vision", f"{BINANCE_VISION_BASE}/api/v3/klines"),
+        ("Binance Global", "binance_global", f"{BINANCE_REST_BASE}/api/v3/klines"),
+        ("Binance Vision", "binance_vision", f"{BINANCE_VISION_BASE}/api/v3/klines"),
     ]
+    params = {"symbol": simbolo, "interval": intervalo, "limit": limite}
+    if start_time is not None:
+        params["startTime"] = start_time
     last_err = None
-    for src, url in urls:
+    for src, upstream, url in urls:
+        cb = breaker(upstream)
+        if not cb.permitir():
+            last_err = f"{src}: circuito abierto"
+            continue
         try:
-            for _ in range(3):
-                r = requests.get(url, params={
-                    "symbol": simbolo, "interval": intervalo, "limit": limite
-                }, headers=headers, timeout=10)
+            for intento in range(MAX_INTENTOS_KLINES):
+                r = await http_get(url, params=params, headers=KLINES_HEADERS, timeout=TIMEOUT_KLINES_S)
                 if r.status_code == 200:
+                    cb.registrar_exito()
                     data = r.json()
                     if isinstance(data, list) and data:
                         BINANCE_STATUS = f"✅ Klines desde {src}"
@@ -102,26 +158,59 @@ def obtener_klines_binance(simbolo="BTCUSDT", intervalo="1h", limite=120) -> Lis
                                 "volume": float(k[5]),
                             })
                         return out
-                elif r.status_code in (403, 429):
-                    time.sleep(1.5)
-                    continue
+                    last_err = f"{src}: respuesta vacía"
+                    break
+                elif r.status_code in (403, 418, 429):
+                    # Rate limit / ban: reintento corto sólo si el upstream lo permite
+                    espera = retry_after_s(r)
+                    if intento + 1 < MAX_INTENTOS_KLINES and await esperar_reintento(intento, espera):
+                        continue
+                    last_err = f"{src} HTTP {r.status_code}"
+                    cb.registrar_fallo(last_err, espera)
+                    break
                 elif r.status_code == 451:
+                    # Restricción geográfica: no va a cambiar pronto
+                    last_err = f"{src} HTTP 451"
+                    cb.registrar_fallo(last_err, cb.enfriamiento_max_s)
                     break
                 else:
                     last_err = f"{src} HTTP {r.status_code}"
+                    if r.status_code >= 500:
+                        cb.registrar_fallo(last_err)
+                    else:
+                        # Otro 4xx (p. ej. 400 por símbolo inválido): el upstream
+                        # responde; cuenta como éxito para no dejar el breaker
+                        # semi-abierto (bloquearía también a BTCUSDT)
+                        cb.registrar_exito()
                     break
         except Exception as e:
             last_err = f"{src}: {type(e).__name__} {e}"
+            cb.registrar_fallo(last_err)
+    _ULTIMO_ERROR_KLINES = last_err
+    return None
 
-    # Fallback CoinGecko (aprox)
+# Buffer circular por (símbolo, intervalo) con refresco incremental
+KLINE_STORE = KlineStore(_descargar_klines_binance)
+
+async def _klines_coingecko(intervalo: str, limite: int) -> List[Dict[str, Any]]:
+    global BINANCE_STATUS, _ULTIMO_ERROR_KLINES
+    cb = breaker("coingecko")
+    if not cb.permitir():
+        _ULTIMO_ERROR_KLINES = "CoinGecko: circuito abierto"
+        return []
     try:
         cg_interval = "hourly" if ("m" in intervalo or "h" in intervalo) else "daily"
-        r = requests.get(
+        r = await http_get(
             "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart",
             params={"vs_currency": "usd", "days": 7, "interval": cg_interval},
-            headers=headers, timeout=10
+            headers=KLINES_HEADERS, timeout=10
         )
+        if r.status_code == 429:
+            cb.registrar_fallo("CoinGecko HTTP 429", retry_after_s(r))
+            _ULTIMO_ERROR_KLINES = "CoinGecko HTTP 429"
+            return []
         r.raise_for_status()
+        cb.registrar_exito()
         prices = r.json().get("prices", [])
         if prices:
             BINANCE_STATUS = "🦎 Fallback CoinGecko (sim)"
@@ -137,67 +226,95 @@ def obtener_klines_binance(simbolo="BTCUSDT", intervalo="1h", limite=120) -> Lis
                 })
             return out
     except Exception as e:
-        last_err = f"CoinGecko: {e}"
+        _ULTIMO_ERROR_KLINES = f"CoinGecko: {e}"
+        cb.registrar_fallo(_ULTIMO_ERROR_KLINES)
+    return []
 
-    BINANCE_STATUS = f"⛔ Sin datos válidos ({last_err})"
+async def obtener_klines_binance(simbolo="BTCUSDT", intervalo="1h", limite=120) -> List[Dict[str, Any]]:
+    """
+    Velas desde el KLINE_STORE (Binance Global → Vision, incremental).
+    Si Binance no responde y no hay velas guardadas → CoinGecko (aprox, no se guarda).
+    """
+    global BINANCE_STATUS
+    out = await KLINE_STORE.obtener(simbolo.upper(), intervalo, limite)
+    if out:
+        return out
+
+    # Fallback CoinGecko (aprox)
+    out = await _klines_coingecko(intervalo, limite)
+    if out:
+        return out
+
+    BINANCE_STATUS = f"⛔ Sin datos válidos ({_ULTIMO_ERROR_KLINES})"
     return []
 
 # -----------------------------
 # 🧊 Zonas reales (CERRADAS)
 # -----------------------------
-def _pdh_pdl_anterior_col(simbolo="BTCUSDT") -> Dict[str, Optional[float]]:
-    """
-    PDH / PDL del ÚLTIMO DÍA OPERATIVO CERRADO (7PM–7PM COL).
-    """
-    kl = obtener_klines_binance(simbolo, "15m", 400)
-    if not kl:
-        return {"PDH": None, "PDL": None}
-
-    start, end = last_closed_daily_window_col()
-    highs, lows = [], []
-    for k in kl:
-        t = datetime.fromtimestamp(k["open_time"] / 1000, tz=TZ_COL)
-        if start <= t <= end:
-            highs.append(float(k["high"]))
-            lows.append(float(k["low"]))
-    if not highs or not lows:
-        return {"PDH": None, "PDL": None}
-    return {"PDH": round(max(highs), 2), "PDL": round(min(lows), 2)}
-
-def _asian_range_anterior_col(simbolo="BTCUSDT") -> Dict[str, Optional[float]]:
-    """
-    ASIAN HIGH/LOW de la ÚLTIMA SESIÓN ASIÁTICA CERRADA (5PM→2AM COL).
-    """
-    kl = obtener_klines_binance(simbolo, "15m", 400)
-    if not kl:
-        return {"ASIAN_HIGH": None, "ASIAN_LOW": None}
-
-    start, end = last_closed_asian_window_col()
-    highs, lows = [], []
-    for k in kl:
-        t = datetime.fromtimestamp(k["open_time"] / 1000, tz=TZ_COL)
-        if start <= t <= end:
-            highs.append(float(k["high"]))
-            lows.append(float(k["low"]))
-    if not highs or not lows:
-        return {"ASIAN_HIGH": None, "ASIAN_LOW": None}
-    return {"ASIAN_HIGH": round(max(highs), 2), "ASIAN_LOW": round(min(lows), 2)}
-
-def obtener_datos_sesion_colombia(simbolo="BTCUSDT") -> Dict[str, Any]:
+# Una única serie 15m para ambas ventanas; búsqueda por bisect sobre
+# open_time. Una ventana cerrada no cambia: su high/low se memoiza,
+# pero sólo si las velas son de Binance (el fallback CoinGecko es un
+# cierre horario aproximado, y siempre de bitcoin).
+VELAS_ZONAS = 400          # 15m → 100 h, cubre día operativo + Asia anteriores
+_ZONAS_CERRADAS: Dict[Tuple[str, int, int], Tuple[float, float]] = {}
+MAX_ZONAS_MEMO = 64
+
+
+def _rango_ventana(velas: Velas, inicio_ms: int, fin_ms: int) -> Optional[Tuple[float, float]]:
+    """(high, low) de las velas con open_time en [inicio_ms, fin_ms)."""
+    ot = velas.open_time
+    i = bisect_left(ot, inicio_ms)
+    j = bisect_left(ot, fin_ms, i)
+    if i >= j:
+        return None
+    return round(max(velas.high[i:j]), 2), round(min(velas.low[i:j]), 2)
+
+
+def _zona_cerrada(simbolo: str, velas: Optional[Velas], inicio_ms: int, fin_ms: int, fiable: bool = True):
+    clave = (simbolo, inicio_ms, fin_ms)
+    memo = _ZONAS_CERRADAS.get(clave)
+    if memo is not None or velas is None:
+        return memo
+    rango = _rango_ventana(velas, inicio_ms, fin_ms)
+    # Sólo se memoiza con velas fiables que cubren la ventana completa
+    if (
+        fiable and rango
+        and velas.open_time[0] <= inicio_ms and velas.open_time[-1] >= fin_ms - INTERVALO_MS["15m"]
+    ):
+        if len(_ZONAS_CERRADAS) >= MAX_ZONAS_MEMO:
+            _ZONAS_CERRADAS.pop(next(iter(_ZONAS_CERRADAS)))
+        _ZONAS_CERRADAS[clave] = rango
+    return rango
+
+
+async def obtener_datos_sesion_colombia(simbolo="BTCUSDT") -> Dict[str, Any]:
     """
-    Paquete completo de zonas: PDH/PDL (día operador cerrado) + Asia cerrado.
-    Incluye etiquetas de horario.
+    Paquete completo de zonas: PDH/PDL del ÚLTIMO DÍA OPERATIVO CERRADO
+    (7PM–7PM COL) + ASIAN HIGH/LOW de la ÚLTIMA SESIÓN ASIÁTICA CERRADA
+    (5PM→2AM COL). Incluye etiquetas de horario.
     """
-    pd = _pdh_pdl_anterior_col(simbolo)
-    asia = _asian_range_anterior_col(simbolo)
-    d_start, d_end = last_closed_daily_window_col()
-    a_start, a_end = last_closed_asian_window_col()
-    out = {
-        **pd, **asia,
-        "horario_dia": f"{d_start.strftime('%a %d %H:%M')} → {d_end.strftime('%a %d %H:%M')} COL",
-        "horario_asia": f"{a_start.strftime('%a %d %H:%M')} → {a_end.strftime('%a %d %H:%M')} COL",
+    simbolo = simbolo.upper()
+    d_ini, d_fin = ventana_diaria_ms()
+    a_ini, a_fin = ventana_asia_ms()
+
+    velas, fiable = None, False
+    if (simbolo, d_ini, d_fin) not in _ZONAS_CERRADAS or (simbolo, a_ini, a_fin) not in _ZONAS_CERRADAS:
+        # Como obtener_klines_binance, pero sabiendo de qué fuente vienen
+        kl = await KLINE_STORE.obtener(simbolo, "15m", VELAS_ZONAS)
+        fiable = bool(kl)
+        if not kl:
+            kl = await _klines_coingecko("15m", VELAS_ZONAS)   # aprox: no se memoiza
+        velas = a_velas(kl) if kl else None
+
+    dia = _zona_cerrada(simbolo, velas, d_ini, d_fin, fiable) or (None, None)
+    asia = _zona_cerrada(simbolo, velas, a_ini, a_fin, fiable) or (None, None)
+    fmt = lambda ms: ms_to_col(ms).strftime('%a %d %H:%M')
+    return {
+        "PDH": dia[0], "PDL": dia[1],
+        "ASIAN_HIGH": asia[0], "ASIAN_LOW": asia[1],
+        "horario_dia": f"{fmt(d_ini)} → {fmt(d_fin)} COL",
+        "horario_asia": f"{fmt(a_ini)} → {fmt(a_fin)} COL",
     }
-    return out
 
 def estado_binance() -> str:
     return BINANCE_STATUS
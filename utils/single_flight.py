@@ -0,0 +1,46 @@
+# ============================================================
+# 🛫 TESLABTC.KG — utils/single_flight.py
+# ============================================================
+# Coalescencia de peticiones concurrentes ("single-flight"):
+# si varios llamadores piden la misma clave al mismo tiempo,
+# sólo el primero ejecuta el cálculo y todos reciben su resultado.
+# ============================================================
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    def __init__(self):
+        self._vuelos: Dict[Hashable, asyncio.Task] = {}
+        self.ejecutados = 0     # cálculos reales lanzados
+        self.compartidos = 0    # llamadas que se unieron a uno en curso
+
+    async def ejecutar(self, clave: Hashable, fabrica: Callable[[], Awaitable[Any]]) -> Any:
+        tarea = self._vuelos.get(clave)
+        if tarea is None:
+            tarea = asyncio.ensure_future(fabrica())
+            self._vuelos[clave] = tarea
+            self.ejecutados += 1
+
+            def _liberar(t: asyncio.Task, clave=clave) -> None:
+                if self._vuelos.get(clave) is t:
+                    del self._vuelos[clave]
+
+            tarea.add_done_callback(_liberar)
+        else:
+            self.compartidos += 1
+
+        # shield: si un llamador se cancela, el cálculo sigue para los demás
+        return await asyncio.shield(tarea)
+
+    def en_curso(self) -> int:
+        return len(self._vuelos)
+
+    def estado(self) -> Dict[str, int]:
+        return {
+            "en_curso": self.en_curso(),
+            "ejecutados": self.ejecutados,
+            "compartidos": self.compartidos,
+        }
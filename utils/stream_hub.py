@@ -0,0 +1,137 @@
+# ============================================================
+# 📣 TESLABTC.KG — utils/stream_hub.py
+# ============================================================
+# Pub/sub en memoria para empujar eventos a clientes SSE / WebSocket:
+#   - Eventos: alertas del live monitor ("alerta") y payloads premium
+#     recién calculados ("premium"); cada uno con seq global
+#   - Suscripción con filtros por símbolo / intervalo / tipo
+#     (un evento sin símbolo o sin intervalo no se filtra por ese campo),
+#     siempre dentro de los tipos que permite el token (`permitidos`;
+#     restringir() los recorta si el token pierde nivel)
+#   - Cola acotada por cliente: si el cliente no lee, se descarta el
+#     evento MÁS ANTIGUO y se cuenta (aviso "perdidos" al cliente)
+# publicar() no espera a nadie: un cliente lento nunca frena al resto.
+# Se usa sólo desde el event loop.
+# ============================================================
+from __future__ import annotations
+
+import asyncio
+import itertools
+from collections import deque
+from typing import Any, Dict, Iterable, Optional, Set
+
+COLA_MAX = 100
+TIPOS = ("alerta", "premium")
+
+
+def _conjunto(valores: Optional[Iterable[str]], upper: bool = False) -> Optional[Set[str]]:
+    if not valores:
+        return None
+    out = {v.strip().upper() if upper else v.strip() for v in valores if v and v.strip()}
+    return out or None
+
+
+class Suscripcion:
+    def __init__(
+        self,
+        simbolos: Optional[Iterable[str]] = None,
+        intervalos: Optional[Iterable[str]] = None,
+        tipos: Optional[Iterable[str]] = None,
+        maximo: int = COLA_MAX,
+        permitidos: Optional[Iterable[str]] = None,
+    ):
+        self.permitidos = set(permitidos or TIPOS)
+        self.filtrar(simbolos, intervalos, tipos)
+        self._cola: deque = deque(maxlen=maximo)
+        self._hay_datos = asyncio.Event()
+        self.perdidos = 0
+        self._perdidos_avisados = 0
+
+    def filtrar(self, simbolos=None, intervalos=None, tipos=None) -> None:
+        self.simbolos = _conjunto(simbolos, upper=True)
+        self.intervalos = _conjunto(intervalos)
+        self.tipos = ((_conjunto(tipos) or set(TIPOS)) & self.permitidos) or set(self.permitidos)
+
+    def restringir(self, permitidos: Iterable[str]) -> None:
+        """Recorta los tipos (y lo ya encolado) a los que el token permite ahora."""
+        self.permitidos = set(permitidos)
+        if self.tipos <= self.permitidos:
+            return
+        self.tipos &= self.permitidos
+        self._cola = deque((e for e in self._cola if e.get("tipo") in self.tipos), maxlen=self._cola.maxlen)
+
+    def acepta(self, evento: Dict[str, Any]) -> bool:
+        if evento.get("tipo") not in self.tipos:
+            return False
+        sim = evento.get("simbolo")
+        if sim and self.simbolos and sim not in self.simbolos:
+            return False
+        itv = evento.get("intervalo")
+        if itv and self.intervalos and itv not in self.intervalos:
+            return False
+        return True
+
+    def entregar(self, evento: Dict[str, Any]) -> None:
+        if len(self._cola) == self._cola.maxlen:
+            self.perdidos += 1          # deque(maxlen) descarta el más antiguo
+        self._cola.append(evento)
+        self._hay_datos.set()
+
+    async def siguiente(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Próximo evento (o aviso de perdidos); None si vence el timeout."""
+        if not self._cola:
+            self._hay_datos.clear()
+            try:
+                await asyncio.wait_for(self._hay_datos.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.perdidos != self._perdidos_avisados:
+            n = self.perdidos - self._perdidos_avisados
+            self._perdidos_avisados = self.perdidos
+            return {"tipo": "perdidos", "n": n}
+        return self._cola.popleft()
+
+
+class Hub:
+    def __init__(self):
+        self._subs: Set[Suscripcion] = set()
+        self._seq = itertools.count(1)
+        self.publicados = 0
+        self._perdidos_cerrados = 0
+
+    def suscribir(self, simbolos=None, intervalos=None, tipos=None, permitidos=None) -> Suscripcion:
+        sub = Suscripcion(simbolos, intervalos, tipos, permitidos=permitidos)
+        self._subs.add(sub)
+        return sub
+
+    def cancelar(self, sub: Suscripcion) -> None:
+        if sub in self._subs:
+            self._subs.discard(sub)
+            self._perdidos_cerrados += sub.perdidos
+
+    def publicar(self, evento: Dict[str, Any]) -> None:
+        if not self._subs:
+            return
+        evento = {**evento, "seq": next(self._seq)}
+        self.publicados += 1
+        for sub in self._subs:
+            if sub.acepta(evento):
+                sub.entregar(evento)
+
+    def simbolos_suscritos(self, tipo: str, por_defecto: Iterable[str] = ()) -> Set[str]:
+        """Símbolos con algún suscriptor de `tipo`; uno sin filtro suma `por_defecto`."""
+        out: Set[str] = set()
+        for sub in self._subs:
+            if tipo in sub.tipos:
+                out |= sub.simbolos if sub.simbolos else set(por_defecto)
+        return out
+
+    def estado(self) -> Dict[str, int]:
+        return {
+            "suscriptores": len(self._subs),
+            "publicados": self.publicados,
+            "perdidos": self._perdidos_cerrados + sum(s.perdidos for s in self._subs),
+        }
+
+
+HUB = Hub()
@@ -3,32 +3,28 @@
 # ============================================================
 from typing import List, Dict
 
-def _is_pivot_high(kl, i: int, depth: int) -> bool:
-    h = kl[i]["high"]
-    for j in range(1, depth + 1):
-        if i-j < 0 or i+j >= len(kl): return False
-        if kl[i-j]["high"] >= h or kl[i+j]["high"] > h: return False
-    return True
+from utils.velas import a_velas
+from utils.pivotes import indices_pivote
 
-def _is_pivot_low(kl, i: int, depth: int) -> bool:
-    l = kl[i]["low"]
-    for j in range(1, depth + 1):
-        if i-j < 0 or i+j >= len(kl): return False
-        if kl[i-j]["low"] <= l or kl[i+j]["low"] < l: return False
-    return True
-
-def detectar_swings(klines: List[Dict], depth: int = 3, max_points: int = 30) -> List[Dict]:
+def detectar_swings(klines, depth: int = 3, max_points: int = 30) -> List[Dict]:
     """
     Devuelve lista de swings: [{"i": idx, "type": "H|L", "price": float}]
     depth=3 suele ir bien para H1/M15; usa 4-5 para H4 si deseas.
+    Acepta lista de dicts o Velas.
+
+    Pivote HIGH: mayor que las `depth` velas previas y >= que las siguientes
+    (LOW simétrico). Si una vela es ambos, cuenta como HIGH.
     """
     if not klines or len(klines) < depth * 2 + 1:
         return []
+    v = a_velas(klines)
+    hi_idx, lo_idx = indices_pivote(v.high, v.low, depth, izq_estricto=True, der_estricto=False)
+    highs = set(hi_idx)
     out = []
-    for i in range(depth, len(klines) - depth):
-        if _is_pivot_high(klines, i, depth):
-            out.append({"i": i, "type": "H", "price": float(klines[i]["high"])})
-        elif _is_pivot_low(klines, i, depth):
-            out.append({"i": i, "type": "L", "price": float(klines[i]["low"])})
+    for i in sorted(highs.union(lo_idx)):
+        if i in highs:
+            out.append({"i": i, "type": "H", "price": float(v.high[i])})
+        else:
+            out.append({"i": i, "type": "L", "price": float(v.low[i])})
     # Mantener últimos puntos relevantes
     return out[-max_points:]
@@ -0,0 +1,325 @@
+# ============================================================
+# 📨 TESLABTC.KG — utils/telegram_outbox.py
+# ============================================================
+# Entrega de las alertas del monitor a los chats de Telegram suscritos:
+#   - encolar(): lo llama live_monitor; sólo memoria, O(chats), nunca
+#     espera a Telegram ni al disco
+#   - Bandeja persistente (ALMACEN, tabla telegram_outbox): el worker
+#     guarda lo nuevo antes de enviarlo y lo borra al confirmarse; lo no
+#     entregado se recupera al arrancar
+#   - Lotes por chat: las alertas acumuladas de un chat salen en un solo
+#     sendMessage (≤ 4096 caracteres)
+#   - Cubos de tokens: global (25 msg/s, ráfaga 5) y por chat (1 msg/s,
+#     sin ráfaga); además, por chat, 1/tasa entre respuesta y siguiente envío
+#   - Reintentos: 429 pausa todo el bot retry_after segundos; 401 / 404
+#     (token del bot inválido) pausan todo PAUSA_CREDENCIALES_S sin
+#     descartar nada; 5xx / red → backoff exponencial con jitter por
+#     chat; otro 4xx (chat bloqueado, id inválido) → se descarta el lote
+#   - Un error inesperado del worker (p. ej. SQLite) se registra y el
+#     worker sigue tras una pausa corta
+#   - Un envío lento sólo ocupa a su chat (una tarea por chat en vuelo)
+# Sin TELEGRAM_BOT_TOKEN el outbox queda desactivado.
+# TELEGRAM_API_BASE permite apuntar a un Bot API falso
+# (benchmarks/fake_telegram.py).
+# ============================================================
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from utils.http_client import get_client
+from utils.metricas import registrar_upstream
+from utils.token_store import ALMACEN, AlmacenTokens
+
+API_BASE_DEFAULT = "https://api.telegram.org"
+# Telegram: ~30 msg/s por bot y ~1 msg/s por chat.
+# Tasa + ráfaga (tokens extra del cubo lleno) ≤ límite: ninguna ventana
+# de 1 s lo supera. Por chat la ráfaga es 1 → nunca 2 mensajes en 1 s.
+TASA_GLOBAL = float(os.getenv("TELEGRAM_TASA_GLOBAL", "25"))   # msg/s del bot
+RAFAGA_GLOBAL = 5
+TASA_CHAT = float(os.getenv("TELEGRAM_TASA_CHAT", "1"))        # msg/s por chat
+RAFAGA_CHAT = 1
+MAX_TEXTO = 4096
+MAX_LOTE = 20                 # alertas por mensaje
+TIMEOUT_ENVIO = 10.0
+BACKOFF_BASE_S = 1.0
+BACKOFF_MAX_S = 60.0
+PAUSA_CREDENCIALES_S = 60.0   # 401 / 404: el token del bot no sirve para ningún chat
+PAUSA_ERROR_S = 1.0           # tras un error inesperado del worker
+
+
+class CuboTokens:
+    """Token bucket: `tasa` tokens/s hasta `capacidad`."""
+
+    def __init__(self, tasa: float, capacidad: float):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self._tokens = capacidad
+        self._ts = time.monotonic()
+
+    def espera(self) -> float:
+        """Segundos hasta que haya un token (0 si ya lo hay)."""
+        ahora = time.monotonic()
+        self._tokens = min(self.capacidad, self._tokens + (ahora - self._ts) * self.tasa)
+        self._ts = ahora
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.tasa
+
+    def tomar(self) -> None:
+        self._tokens -= 1
+
+
+def formatear_alerta(entrada: Dict[str, Any]) -> str:
+    return f"📡 {entrada.get('ts', '')} · {entrada['msg']}"
+
+
+class Outbox:
+    def __init__(
+        self,
+        almacen: AlmacenTokens,
+        token: Optional[str] = None,
+        api_base: Optional[str] = None,
+        tasa_global: float = TASA_GLOBAL,
+        tasa_chat: float = TASA_CHAT,
+    ):
+        self.almacen = almacen
+        self.token = token if token is not None else os.getenv("TELEGRAM_BOT_TOKEN", "")
+        self.api_base = (api_base or os.getenv("TELEGRAM_API_BASE", API_BASE_DEFAULT)).rstrip("/")
+        self.tasa_chat = tasa_chat
+        self._global = CuboTokens(tasa_global, RAFAGA_GLOBAL)
+        self._cubos: Dict[str, CuboTokens] = {}
+        self._chats: Dict[str, Optional[Set[str]]] = {}      # chat → símbolos (None = todos)
+        self._nuevos: List[Tuple[str, str]] = []              # aún sin persistir
+        self._pendientes: Dict[str, Deque[Tuple[int, str]]] = {}
+        self._en_vuelo: Dict[str, asyncio.Task] = {}           # chat → envío en curso
+        self._reintentos: Dict[str, int] = {}
+        self._proximo: Dict[str, float] = {}                  # chat → monotonic del reintento
+        self._pausa_global = 0.0
+        self._hay_trabajo = asyncio.Event()
+        self._cargado = False
+        self.enviados = 0
+        self.lotes = 0
+        self.reintentos = 0
+        self.descartados = 0
+
+    @property
+    def activo(self) -> bool:
+        return bool(self.token)
+
+    # ---------- suscripciones ----------
+    def _cargar(self) -> None:
+        if self._cargado:
+            return
+        self._chats = {
+            c: set(s.split(",")) if s else None for c, s in self.almacen.chats_telegram().items()
+        }
+        huerfanas = []
+        for id_, chat, texto in self.almacen.pendientes_telegram():
+            if chat in self._chats:
+                self._pendientes.setdefault(chat, deque()).append((id_, texto))
+            else:
+                huerfanas.append(id_)   # chat dado de baja: no se entrega
+        if huerfanas:
+            self.almacen.borrar_telegram(huerfanas)
+        self._cargado = True
+
+    def suscribir(self, chat_id, simbolos=None) -> None:
+        self._cargar()
+        if isinstance(simbolos, str):
+            simbolos = simbolos.split(",")
+        sims = sorted({s.strip().upper() for s in simbolos or [] if s.strip()})
+        self.almacen.guardar_chat_telegram(str(chat_id), ",".join(sims))
+        self._chats[str(chat_id)] = set(sims) or None
+
+    def cancelar(self, chat_id) -> None:
+        self._cargar()
+        self.almacen.borrar_chat_telegram(str(chat_id))
+        self._chats.pop(str(chat_id), None)
+        self._pendientes.pop(str(chat_id), None)
+
+    # ---------- productor ----------
+    def encolar(self, entrada: Dict[str, Any]) -> int:
+        """Reparte una alerta a los chats suscritos. Devuelve cuántos."""
+        if not self.activo:
+            return 0
+        self._cargar()
+        if not self._chats:
+            return 0
+        simbolo = entrada.get("simbolo")
+        texto = formatear_alerta(entrada)
+        n = 0
+        for chat, sims in self._chats.items():
+            if sims is None or simbolo in sims:
+                self._nuevos.append((chat, texto))
+                n += 1
+        if n:
+            self._hay_trabajo.set()
+        return n
+
+    # ---------- worker ----------
+    async def _persistir_nuevos(self) -> None:
+        if not self._nuevos:
+            return
+        filas, self._nuevos = self._nuevos, []
+        try:
+            ids = await asyncio.to_thread(self.almacen.encolar_telegram, filas)
+        except Exception:
+            self._nuevos[:0] = filas   # se reintenta en la próxima vuelta
+            raise
+        huerfanas = []
+        for id_, (chat, texto) in zip(ids, filas):
+            if chat in self._chats:
+                self._pendientes.setdefault(chat, deque()).append((id_, texto))
+            else:
+                huerfanas.append(id_)   # cancelado mientras se insertaba
+        if huerfanas:
+            await asyncio.to_thread(self.almacen.borrar_telegram, huerfanas)
+
+    def _cubo(self, chat: str) -> CuboTokens:
+        cubo = self._cubos.get(chat)
+        if cubo is None:
+            cubo = self._cubos[chat] = CuboTokens(self.tasa_chat, RAFAGA_CHAT)
+        return cubo
+
+    def _espera_chat(self, chat: str, ahora: float) -> float:
+        return max(self._proximo.get(chat, 0.0) - ahora, self._cubo(chat).espera())
+
+    def _despachar(self) -> Optional[float]:
+        """
+        Lanza un envío por cada chat listo. Devuelve los segundos hasta el
+        próximo chat listo (None si no queda nada pendiente fuera de vuelo).
+        """
+        ahora = time.monotonic()
+        proxima: Optional[float] = None
+        for chat, cola in self._pendientes.items():
+            if not cola or chat in self._en_vuelo:
+                continue
+            espera = max(self._pausa_global - ahora, self._espera_chat(chat, ahora), self._global.espera())
+            if espera > 0:
+                proxima = espera if proxima is None else min(proxima, espera)
+                continue
+            self._global.tomar()
+            self._cubo(chat).tomar()
+            self._en_vuelo[chat] = asyncio.create_task(self._enviar(chat, self._lote(cola)))
+        return proxima
+
+    @staticmethod
+    def _lote(cola: Deque[Tuple[int, str]]) -> List[Tuple[int, str]]:
+        lote = [cola.popleft()]
+        largo = len(lote[0][1])
+        while cola and len(lote) < MAX_LOTE and largo + 1 + len(cola[0][1]) <= MAX_TEXTO:
+            largo += 1 + len(cola[0][1])
+            lote.append(cola.popleft())
+        return lote
+
+    async def _enviar(self, chat: str, lote: List[Tuple[int, str]]) -> None:
+        url = f"{self.api_base}/bot{self.token}/sendMessage"
+        texto = "\n".join(t for _, t in lote)[:MAX_TEXTO]
+        t0 = time.perf_counter()
+        status, retry_after = "error", None
+        try:
+            try:
+                r = await get_client().post(
+                    url,
+                    json={"chat_id": chat, "text": texto, "disable_web_page_preview": True},
+                    timeout=TIMEOUT_ENVIO,
+                )
+                status = str(r.status_code)
+                if r.status_code == 429:
+                    try:
+                        retry_after = float(r.json().get("parameters", {}).get("retry_after", 1))
+                    except Exception:
+                        retry_after = 1.0   # cuerpo no JSON / no dict
+            except httpx.TimeoutException:
+                status = "timeout"
+            except httpx.HTTPError:
+                pass
+            registrar_upstream(urlsplit(url).hostname or "", status, time.perf_counter() - t0)
+            # Telegram cuenta por llegada, no por salida: el siguiente envío al
+            # chat espera 1/tasa desde ESTA respuesta (la latencia variable ya
+            # no puede juntar dos mensajes en el mismo segundo)
+            espaciado = time.monotonic() + 1 / self.tasa_chat
+
+            if status in ("401", "404"):
+                # Token del bot inválido: no es culpa del chat, se conserva todo
+                if chat in self._chats:
+                    self._pendientes.setdefault(chat, deque()).extendleft(reversed(lote))
+                self._pausa_global = time.monotonic() + PAUSA_CREDENCIALES_S
+                print(f"⚠️ Telegram HTTP {status}: token del bot inválido, outbox en pausa {PAUSA_CREDENCIALES_S:.0f} s")
+            elif status == "200" or (status.startswith("4") and status != "429"):
+                # Entregado, o rechazo definitivo (chat bloqueado / inexistente)
+                await asyncio.to_thread(self.almacen.borrar_telegram, [i for i, _ in lote])
+                if status == "200":
+                    self.enviados += len(lote)
+                    self.lotes += 1
+                else:
+                    self.descartados += len(lote)
+                    print(f"⚠️ Telegram rechazó {len(lote)} alertas para {chat} (HTTP {status})")
+                self._reintentos.pop(chat, None)
+                self._proximo[chat] = espaciado
+            else:
+                self.reintentos += 1
+                if chat in self._chats:
+                    self._pendientes.setdefault(chat, deque()).extendleft(reversed(lote))
+                else:
+                    # Cancelado durante el envío: que no reviva al reiniciar
+                    await asyncio.to_thread(self.almacen.borrar_telegram, [i for i, _ in lote])
+                if retry_after is not None:
+                    self._pausa_global = time.monotonic() + retry_after
+                else:
+                    n = self._reintentos[chat] = self._reintentos.get(chat, 0) + 1
+                    backoff = min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** (n - 1))
+                    self._proximo[chat] = max(
+                        espaciado, time.monotonic() + backoff * random.uniform(0.5, 1.0)
+                    )
+        except Exception as e:
+            # Las filas siguen en la bandeja: se recuperan al reiniciar
+            print(f"⚠️ Envío a Telegram para {chat}: {type(e).__name__} {e}")
+        finally:
+            self._en_vuelo.pop(chat, None)
+            self._hay_trabajo.set()
+
+    async def loop(self) -> None:
+        """Worker de envío (se lanza desde startup_event)."""
+        if not self.activo:
+            return
+        while True:
+            # Limpiar antes de persistir: lo encolado durante el await re-dispara
+            self._hay_trabajo.clear()
+            try:
+                self._cargar()
+                await self._persistir_nuevos()
+                espera = self._despachar()
+            except Exception as e:
+                print(f"⚠️ Outbox de Telegram: {type(e).__name__} {e}")
+                self._hay_trabajo.set()   # reintentar tras la pausa
+                await asyncio.sleep(PAUSA_ERROR_S)
+                continue
+            try:
+                await asyncio.wait_for(self._hay_trabajo.wait(), espera)
+            except asyncio.TimeoutError:
+                pass
+
+    def pendientes(self) -> int:
+        return len(self._nuevos) + sum(len(c) for c in self._pendientes.values())
+
+    def estado(self) -> Dict[str, Any]:
+        return {
+            "activo": self.activo,
+            "chats": len(self._chats),
+            "pendientes": self.pendientes(),
+            "en_vuelo": len(self._en_vuelo),
+            "enviados": self.enviados,
+            "lotes": self.lotes,
+            "reintentos": self.reintentos,
+            "descartados": self.descartados,
+        }
+
+
+OUTBOX = Outbox(ALMACEN)
@@ -1,8 +1,10 @@
 # ==============================================
 # ⏰ TESLABTC.KG — utils/time_utils.py
 # Horarios Colombia para día operativo y sesión Asia
+# Ventanas también en epoch ms (cacheadas hasta el siguiente corte)
 # ==============================================
 from __future__ import annotations
+import time as time_mod
 from datetime import datetime, timedelta, time, timezone
 from zoneinfo import ZoneInfo
 
@@ -50,3 +52,37 @@ def last_closed_asian_window_col(now: datetime | None = None) -> tuple[datetime,
 def col_to_ms(dt_col: datetime) -> int:
     """Epoch ms desde datetime COL."""
     return int(dt_col.timestamp() * 1000)
+
+# ----------------------------------------------
+# 🗓️ Ventanas cerradas en epoch ms [inicio, fin)
+# ----------------------------------------------
+# La última ventana cerrada no cambia hasta el siguiente corte
+# (19:00 COL la diaria, 02:00 COL la asiática): se calcula una vez
+# y se sirve desde cache mientras ahora_ms siga en [fin, próximo corte).
+_VENTANAS_MS: dict[str, tuple[int, int, int]] = {}  # nombre → (inicio, fin, valida_hasta)
+
+
+def _ventana_ms(nombre: str, calcular, ahora_ms: int | None) -> tuple[int, int]:
+    if ahora_ms is None:
+        ahora_ms = int(time_mod.time() * 1000)
+    cache = _VENTANAS_MS.get(nombre)
+    if cache is not None and cache[1] <= ahora_ms < cache[2]:
+        return cache[0], cache[1]
+    start, end = calcular(datetime.fromtimestamp(ahora_ms / 1000, tz=TZ_COL))
+    inicio, fin = col_to_ms(start), col_to_ms(end)
+    _VENTANAS_MS[nombre] = (inicio, fin, col_to_ms(end + timedelta(days=1)))
+    return inicio, fin
+
+
+def ventana_diaria_ms(ahora_ms: int | None = None) -> tuple[int, int]:
+    """Último día operativo cerrado (7PM→7PM COL) como (inicio_ms, fin_ms)."""
+    return _ventana_ms("diaria", last_closed_daily_window_col, ahora_ms)
+
+
+def ventana_asia_ms(ahora_ms: int | None = None) -> tuple[int, int]:
+    """Última sesión asiática cerrada (5PM→2AM COL) como (inicio_ms, fin_ms)."""
+    return _ventana_ms("asia", last_closed_asian_window_col, ahora_ms)
+
+
+def ms_to_col(ms: int) -> datetime:
+    return datetime.fromtimestamp(ms / 1000, tz=TZ_COL)
@@ -0,0 +1,250 @@
+# ============================================================
+# 🗃️ TESLABTC.KG — utils/token_store.py
+# ============================================================
+# Persistencia de tokens y usuarios en /app/data/teslabtc.db (SQLite):
+#   - Modo WAL: cada cambio es una transacción atómica que sólo añade
+#     las filas tocadas al log (coste O(cambio), no O(usuarios))
+#   - synchronous=NORMAL: el fsync se agrupa en los checkpoints del WAL;
+#     un corte de luz puede perder los últimos commits, nunca corrompe
+#   - Arranque: una lectura de la tabla tokens (sin parsear JSON)
+#   - Migración única desde tokens.json / usuarios.json (los JSON se
+#     dejan intactos como copia); si un JSON existe pero no se puede
+#     leer, el arranque falla (MigracionJSONFallida) antes de servir
+#   - version_usuarios(): cambia con cada alta/cambio de usuario, también
+#     si lo escribe otro proceso (PRAGMA data_version) → caches en memoria
+#   - claves_binance: claves API por usuario, cifradas (utils/keystore)
+#   - telegram_chats / telegram_outbox: suscripciones y alertas aún no
+#     entregadas a Telegram (utils/telegram_outbox)
+# ============================================================
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DATA_DIR = os.getenv("TESLABTC_DATA_DIR", "/app/data")
+DB_FILE = os.path.join(DATA_DIR, "teslabtc.db")
+
+
+class MigracionJSONFallida(RuntimeError):
+    pass
+
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    token             TEXT PRIMARY KEY,
+    usuario           TEXT NOT NULL,
+    fecha_activacion  TEXT NOT NULL,
+    fecha_vencimiento TEXT NOT NULL,
+    dias_free         INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tokens_usuario ON tokens (usuario);
+CREATE TABLE IF NOT EXISTS usuarios (
+    usuario TEXT PRIMARY KEY,
+    datos   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS claves_binance (
+    usuario TEXT PRIMARY KEY,
+    cifrado BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS telegram_chats (
+    chat_id  TEXT PRIMARY KEY,
+    simbolos TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS telegram_outbox (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL,
+    texto   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+"""
+
+
+class AlmacenTokens:
+    def __init__(self, ruta: str = DB_FILE):
+        self.ruta = ruta
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._cambios_usuarios = 0
+
+    def _conexion(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+            conn = sqlite3.connect(self.ruta, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.executescript(_ESQUEMA)
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        """Transacción atómica (BEGIN IMMEDIATE … COMMIT / ROLLBACK)."""
+        with self._lock:
+            conn = self._conexion()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def cerrar(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ---------- tokens ----------
+    def tokens(self) -> Dict[str, Dict[str, Any]]:
+        """Todos los tokens en el formato de tokens.json (fechas ISO)."""
+        with self._lock:
+            filas = self._conexion().execute(
+                "SELECT token, usuario, fecha_activacion, fecha_vencimiento, dias_free FROM tokens"
+            ).fetchall()
+        return {
+            t: {"usuario": u, "fecha_activacion": a, "fecha_vencimiento": v, "dias_free": d}
+            for t, u, a, v, d in filas
+        }
+
+    def guardar_token(self, token: str, d: Dict[str, Any]) -> None:
+        with self._tx() as conn:
+            self._upsert_token(conn, token, d)
+
+    @staticmethod
+    def _upsert_token(conn: sqlite3.Connection, token: str, d: Dict[str, Any]) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO tokens VALUES (?, ?, ?, ?, ?)",
+            (token, d["usuario"], d["fecha_activacion"], d["fecha_vencimiento"], d["dias_free"]),
+        )
+
+    def borrar_tokens(self, tokens: Iterable[str]) -> None:
+        with self._tx() as conn:
+            conn.executemany("DELETE FROM tokens WHERE token = ?", ((t,) for t in tokens))
+
+    # ---------- usuarios ----------
+    def usuarios(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            filas = self._conexion().execute("SELECT usuario, datos FROM usuarios").fetchall()
+        return {u: json.loads(d) for u, d in filas}
+
+    def guardar_usuario(self, usuario: str, datos: Dict[str, Any]) -> None:
+        with self._tx() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO usuarios VALUES (?, ?)",
+                (str(usuario), json.dumps(datos, ensure_ascii=False)),
+            )
+            self._cambios_usuarios += 1
+
+    def version_usuarios(self) -> Tuple[int, int]:
+        """
+        (cambios locales, data_version de SQLite). data_version sólo se mueve
+        con commits de OTRAS conexiones; los propios los cuenta el contador.
+        """
+        with self._lock:
+            (dv,) = self._conexion().execute("PRAGMA data_version").fetchone()
+            return self._cambios_usuarios, dv
+
+    # ---------- claves Binance (ya cifradas por utils/keystore) ----------
+    def claves_cifradas(self) -> Dict[str, bytes]:
+        with self._lock:
+            filas = self._conexion().execute("SELECT usuario, cifrado FROM claves_binance").fetchall()
+        return dict(filas)
+
+    def guardar_claves_cifradas(self, filas: Dict[str, bytes]) -> None:
+        with self._tx() as conn:
+            conn.executemany("INSERT OR REPLACE INTO claves_binance VALUES (?, ?)", filas.items())
+
+    # ---------- Telegram (utils/telegram_outbox) ----------
+    def chats_telegram(self) -> Dict[str, str]:
+        with self._lock:
+            filas = self._conexion().execute("SELECT chat_id, simbolos FROM telegram_chats").fetchall()
+        return dict(filas)
+
+    def guardar_chat_telegram(self, chat_id: str, simbolos: str = "") -> None:
+        with self._tx() as conn:
+            conn.execute("INSERT OR REPLACE INTO telegram_chats VALUES (?, ?)", (str(chat_id), simbolos))
+
+    def borrar_chat_telegram(self, chat_id: str) -> None:
+        with self._tx() as conn:
+            conn.execute("DELETE FROM telegram_chats WHERE chat_id = ?", (str(chat_id),))
+            conn.execute("DELETE FROM telegram_outbox WHERE chat_id = ?", (str(chat_id),))
+
+    def encolar_telegram(self, filas: Iterable[Tuple[str, str]]) -> List[int]:
+        """Inserta (chat_id, texto) y devuelve los ids en el mismo orden."""
+        with self._tx() as conn:
+            return [
+                conn.execute("INSERT INTO telegram_outbox (chat_id, texto) VALUES (?, ?)", f).lastrowid
+                for f in filas
+            ]
+
+    def pendientes_telegram(self) -> List[Tuple[int, str, str]]:
+        with self._lock:
+            return self._conexion().execute(
+                "SELECT id, chat_id, texto FROM telegram_outbox ORDER BY id"
+            ).fetchall()
+
+    def borrar_telegram(self, ids: Iterable[int]) -> None:
+        with self._tx() as conn:
+            conn.executemany("DELETE FROM telegram_outbox WHERE id = ?", ((i,) for i in ids))
+
+    # ---------- migración ----------
+    def migrar_json(self, tokens_file: str, users_file: str) -> bool:
+        """
+        Importa los JSON antiguos una sola vez (marca en la tabla meta).
+        Si un JSON existe pero no se puede leer lanza MigracionJSONFallida
+        sin importar ni marcar nada: la app no arranca hasta arreglar (o
+        apartar) el fichero, así nada escribe en la base antes de migrar.
+        Lo migrado nunca pisa filas ya presentes (INSERT OR IGNORE).
+        """
+        with self._lock:
+            hecho = self._conexion().execute(
+                "SELECT 1 FROM meta WHERE clave = 'migrado_json'"
+            ).fetchone()
+        if hecho:
+            return False
+
+        def _leer(ruta: str) -> Dict[str, Any]:
+            try:
+                with open(ruta, "r", encoding="utf-8") as f:
+                    datos = json.load(f)
+                if not isinstance(datos, dict):
+                    raise ValueError("se esperaba un objeto JSON")
+                return datos
+            except FileNotFoundError:
+                return {}
+            except Exception as e:
+                raise MigracionJSONFallida(
+                    f"No se pudo leer {ruta} para migrarlo a {self.ruta}: {e}. "
+                    "Corrige el fichero o apártalo y vuelve a arrancar."
+                ) from e
+
+        tokens, usuarios = _leer(tokens_file), _leer(users_file)
+        with self._tx() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO tokens VALUES (?, ?, ?, ?, ?)",
+                (
+                    (t, d["usuario"], d["fecha_activacion"], d["fecha_vencimiento"], d.get("dias_free", 10))
+                    for t, d in tokens.items()
+                ),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO usuarios VALUES (?, ?)",
+                ((str(u), json.dumps(d, ensure_ascii=False)) for u, d in usuarios.items()),
+            )
+            conn.execute("INSERT INTO meta VALUES ('migrado_json', datetime('now'))")
+            self._cambios_usuarios += 1
+        if tokens or usuarios:
+            print(f"✅ Migrados {len(tokens)} tokens y {len(usuarios)} usuarios a {self.ruta}")
+        return True
+
+
+ALMACEN = AlmacenTokens()
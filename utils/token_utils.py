@@ -2,241 +2,198 @@
 # ⚙️ TESLABTC.KG — token_utils.py (versión consolidada 100%)
 # ============================================================
 
-import os, json, uuid
+import asyncio, heapq, os, threading, time, uuid
 from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
-# ============================================================
-# 📁 Archivos persistentes (montados en Fly.io)
-# ============================================================
-TOKENS_FILE = "/app/data/tokens.json"
-USERS_FILE = "/app/data/usuarios.json"
-TOKENS = {}
+from utils.token_store import ALMACEN, DATA_DIR
 
 # ============================================================
-# 🧩 Utilidades internas
+# 📁 Archivos persistentes (montados en Fly.io)
 # ============================================================
-def _ensure_dir():
-    os.makedirs(os.path.dirname(TOKENS_FILE), exist_ok=True)
+# Los datos viven en ALMACEN (SQLite, utils/token_store); los JSON sólo
+# se leen una vez para migrar.
+TOKENS_FILE = os.path.join(DATA_DIR, "tokens.json")
+USERS_FILE = os.path.join(DATA_DIR, "usuarios.json")
+DIAS_FREE_DEFAULT = 10
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+BARRIDO_MAX_S = 300.0   # el barrido revisa al menos cada 5 min (tokens nuevos / renovados)
+BARRIDO_LOTE_S = 1.0    # margen tras el vencimiento para juntar los que vencen casi a la vez
 
-def _load_tokens():
-    global TOKENS
-    _ensure_dir()
-    if os.path.exists(TOKENS_FILE):
-        with open(TOKENS_FILE, "r", encoding="utf-8") as f:
-            raw = json.load(f)
-        # normalizar fechas
-        for t, d in raw.items():
-            d["fecha_activacion"] = datetime.fromisoformat(d["fecha_activacion"])
-            d["fecha_vencimiento"] = datetime.fromisoformat(d["fecha_vencimiento"])
-        TOKENS = raw
-    else:
-        TOKENS = {}
-
-def _save_tokens():
-    _ensure_dir()
-    serial = {}
-    for t, d in TOKENS.items():
-        serial[t] = {
-            "usuario": d["usuario"],
-            "fecha_activacion": d["fecha_activacion"].isoformat(),
-            "fecha_vencimiento": d["fecha_vencimiento"].isoformat(),
-            "dias_free": d.get("dias_free", 10)
-        }
-    with open(TOKENS_FILE, "w", encoding="utf-8") as f:
-        json.dump(serial, f, indent=2, ensure_ascii=False)
-
-# 🔁 Inicializa al importar el módulo
-_load_tokens()
 
 # ============================================================
-# 🧠 Generar o renovar token
+# 🗂️ Registro de tokens
 # ============================================================
-def generar_token(usuario: str, dias_premium: int = 30, dias_free: int = 10):
+class RegistroTokens:
     """
-    Crea o renueva token para un usuario Premium.
-    Guarda token en tokens.json y usuario en usuarios.json
+    Tokens en memoria con índice inverso usuario → tokens.
+    Cada entrada guarda ya calculados los límites Premium / gracia
+    (epoch s) y el texto de vencimiento: validar es una búsqueda O(1)
+    y dos comparaciones.
+    Un min-heap (gracia_ts, token) ordena los vencimientos definitivos;
+    las entradas de tokens borrados o renovados se descartan al salir.
+    El barrido corre en otro hilo: todo recorrido de los dicts va con _lock.
     """
-    ahora = datetime.now()
 
-    # Si ya existe token, renovar fechas
-    for tok, info in TOKENS.items():
-        if str(info.get("usuario")) == str(usuario):
-            info["fecha_activacion"] = ahora
-            info["fecha_vencimiento"] = ahora + timedelta(days=dias_premium)
-            info["dias_free"] = dias_free
-            _save_tokens()
-            _guardar_usuario_premium(usuario, ahora, dias_premium)
-            return {
-                "estado": "✅",
-                "mensaje": "Token renovado correctamente",
-                "token": tok,
-                "nivel": "Premium",
-                "vencimiento": info["fecha_vencimiento"].strftime("%Y-%m-%d %H:%M:%S")
-            }
-
-    # Si no existe, crear nuevo
-    nuevo = uuid.uuid4().hex[:16].upper()
-    TOKENS[nuevo] = {
-        "usuario": str(usuario),
-        "fecha_activacion": ahora,
-        "fecha_vencimiento": ahora + timedelta(days=dias_premium),
-        "dias_free": dias_free
-    }
-    _save_tokens()
-    _guardar_usuario_premium(usuario, ahora, dias_premium)
-    return {
-        "estado": "✅",
-        "mensaje": "Token creado correctamente",
-        "token": nuevo,
-        "nivel": "Premium",
-        "vencimiento": (ahora + timedelta(days=dias_premium)).strftime("%Y-%m-%d %H:%M:%S")
-    }
+    def __init__(self):
+        self._tokens: Dict[str, Dict[str, Any]] = {}
+        # dict como conjunto ordenado: el primer token del usuario es el más antiguo
+        self._por_usuario: Dict[str, Dict[str, None]] = {}
+        self._vencimientos: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
 
-# ============================================================
-# 💾 Guardar usuario Premium
-# ============================================================
-def _guardar_usuario_premium(usuario: str, fecha_inicio: datetime, dias_premium: int):
-    """
-    Registra o actualiza un usuario Premium en /app/data/usuarios.json
-    """
-    try:
-        os.makedirs(os.path.dirname(USERS_FILE), exist_ok=True)
-        usuarios = {}
-        if os.path.exists(USERS_FILE):
-            with open(USERS_FILE, "r", encoding="utf-8") as f:
-                usuarios = json.load(f)
-
-        usuarios[str(usuario)] = {
-            "nivel": "Premium",
-            "fecha_activacion": fecha_inicio.strftime("%Y-%m-%d %H:%M:%S"),
-            "fecha_vencimiento": (fecha_inicio + timedelta(days=dias_premium)).strftime("%Y-%m-%d %H:%M:%S")
-        }
-
-        with open(USERS_FILE, "w", encoding="utf-8") as f:
-            json.dump(usuarios, f, indent=2, ensure_ascii=False)
-
-        print(f"✅ Usuario {usuario} guardado/actualizado en usuarios.json")
-
-    except Exception as e:
-        print(f"⚠️ Error guardando usuario Premium: {e}")
-
-# ============================================================
-# 🔎 Validar token
-# ============================================================
-def validar_token(token: str):
-    ahora = datetime.now()
-    data = TOKENS.get(token)
-    if not data:
-        return {"estado": "❌", "nivel": "Free", "mensaje": "Token inválido o inexistente."}
-
-    vto = data["fecha_vencimiento"]
-    dias_free = data.get("dias_free", 10)
-
-    if ahora <= vto:
+    @staticmethod
+    def _entrada(usuario: str, activacion: datetime, vencimiento: datetime, dias_free: int) -> Dict[str, Any]:
         return {
-            "estado": "✅",
-	    "valido": True,
-            "nivel": "Premium",
-            "usuario": data["usuario"],
-            "expira": vto.strftime("%Y-%m-%d %H:%M:%S")
+            "usuario": str(usuario),
+            "fecha_activacion": activacion,
+            "fecha_vencimiento": vencimiento,
+            "dias_free": dias_free,
+            "vence_ts": vencimiento.timestamp(),
+            "gracia_ts": (vencimiento + timedelta(days=dias_free)).timestamp(),
+            "expira": vencimiento.strftime(FORMATO_FECHA),
         }
 
-    if vto < ahora <= (vto + timedelta(days=dias_free)):
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self._tokens
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            return iter(list(self._tokens.items()))
+
+    def obtener(self, token: str) -> Optional[Dict[str, Any]]:
+        return self._tokens.get(token)
+
+    def tokens_de(self, usuario: str) -> List[str]:
+        with self._lock:
+            return list(self._por_usuario.get(str(usuario), ()))
+
+    def guardar(
+        self, token: str, usuario: str, activacion: datetime, vencimiento: datetime,
+        dias_free: int = DIAS_FREE_DEFAULT,
+    ) -> Dict[str, Any]:
+        """Crea o reemplaza la entrada de `token` (mantiene índice inverso y heap)."""
+        entrada = self._entrada(usuario, activacion, vencimiento, dias_free)
+        with self._lock:
+            previo = self._tokens.get(token)
+            if previo is not None and previo["usuario"] != entrada["usuario"]:
+                self._desindexar(token, previo["usuario"])
+            self._tokens[token] = entrada
+            self._por_usuario.setdefault(entrada["usuario"], {})[token] = None
+            heapq.heappush(self._vencimientos, (entrada["gracia_ts"], token))
+            if len(self._vencimientos) > 2 * len(self._tokens) + 64:
+                # demasiadas entradas obsoletas (renovaciones / bajas): rehacer
+                self._vencimientos = [(d["gracia_ts"], t) for t, d in self._tokens.items()]
+                heapq.heapify(self._vencimientos)
+        return entrada
+
+    def eliminar(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entrada = self._tokens.pop(token, None)
+            if entrada is not None:
+                self._desindexar(token, entrada["usuario"])
+        return entrada
+
+    def eliminar_usuario(self, usuario: str) -> List[str]:
+        """Borra todos los tokens del usuario. Devuelve los tokens borrados."""
+        with self._lock:
+            tokens = list(self._por_usuario.pop(str(usuario), ()))
+            for t in tokens:
+                self._tokens.pop(t, None)
+        return tokens
+
+    # ---------- vencimientos ----------
+    def _limpiar_cima(self) -> None:
+        heap = self._vencimientos
+        while heap:
+            ts, t = heap[0]
+            d = self._tokens.get(t)
+            if d is not None and d["gracia_ts"] == ts:
+                return
+            heapq.heappop(heap)
+
+    def proximo_vencimiento(self) -> Optional[float]:
+        """Epoch s del próximo vencimiento definitivo (None si no hay tokens)."""
+        with self._lock:
+            self._limpiar_cima()
+            return self._vencimientos[0][0] if self._vencimientos else None
+
+    def extraer_vencidos(self, ahora: float) -> List[str]:
+        """Borra y devuelve los tokens cuyo periodo de gracia terminó antes de `ahora`."""
+        vencidos: List[str] = []
+        with self._lock:
+            self._limpiar_cima()
+            while self._vencimientos and self._vencimientos[0][0] < ahora:
+                _, t = heapq.heappop(self._vencimientos)
+                entrada = self._tokens.pop(t)
+                self._desindexar(t, entrada["usuario"])
+                vencidos.append(t)
+                self._limpiar_cima()
+        return vencidos
+
+    def persistir_borrados(self, tokens: List[str], borrar: Callable[[List[str]], None]) -> None:
+        """
+        Borra del disco los `tokens` que siguen sin estar en memoria, con el
+        lock tomado: una renovación (guardar + ALMACEN.guardar_token)
+        posterior escribe después del DELETE y una anterior no se borra.
+        """
+        with self._lock:
+            ausentes = [t for t in tokens if t not in self._tokens]
+            if ausentes:
+                borrar(ausentes)
+
+    def _desindexar(self, token: str, usuario: str) -> None:
+        propios = self._por_usuario.get(usuario)
+        if propios is not None:
+            propios.pop(token, None)
+            if not propios:
+                del self._por_usuario[usuario]
+
+    # ---------- serialización (formato de tokens.json) ----------
+    def cargar(self, raw: Dict[str, Dict[str, Any]]) -> None:
+        with self._lock:
+            self._tokens.clear()
+            self._por_usuario.clear()
+            self._vencimientos.clear()
+        for t, d in raw.items():
+            self.guardar(
+                t, d["usuario"],
+                datetime.fromisoformat(d["fecha_activacion"]),
+                datetime.fromisoformat(d["fecha_vencimiento"]),
+                d.get("dias_free", DIAS_FREE_DEFAULT),
+            )
+
+    @staticmethod
+    def a_json(d: Dict[str, Any]) -> Dict[str, Any]:
         return {
-            "estado": "✅",
-            "nivel": "Free",
-            "usuario": data["usuario"],
-            "expira": vto.strftime("%Y-%m-%d %H:%M:%S"),
-            "mensaje": "Token en periodo Free post-premium (gracia)."
-        }
-
-    # Expirado definitivo
-    TOKENS.pop(token, None)
-    _save_tokens()
-    return {"estado": "❌", "valido": False, "nivel": "Free", "mensaje": "Token expirado definitivo."}
-
-# ============================================================
-# ♻️ Liberar token
-# ============================================================
-def liberar_token(token: str):
-    if token in TOKENS:
-        TOKENS.pop(token, None)
-        _save_tokens()
-        return {"estado": "✅", "mensaje": "Token liberado"}
-    return {"estado": "⚠️", "mensaje": "Token no encontrado"}
-
-# ============================================================
-# 📋 Listar tokens
-# ============================================================
-def listar_tokens():
-    return {
-        t: {
-            **d,
+            "usuario": d["usuario"],
             "fecha_activacion": d["fecha_activacion"].isoformat(),
-            "fecha_vencimiento": d["fecha_vencimiento"].isoformat()
+            "fecha_vencimiento": d["fecha_vencimiento"].isoformat(),
+            "dias_free": d["dias_free"],
         }
-        for t, d in TOKENS.items()
-    }
 
-# ============================================================
-# ⏰ Verificar vencimientos
-# ============================================================
-def verificar_vencimientos():
-    ahora = datetime.now()
-    expirados = []
-    for t, d in list(TOKENS.items()):
-        if ahora > d["fecha_vencimiento"] + timedelta(days=d.get("dias_free", 10)):
-            expirados.append(t)
-            TOKENS.pop(t, None)
-    if expirados:
-        _save_tokens()
-    return expirados
-# ============================================================
-# ⚙️ TESLABTC.KG — token_utils.py (versión consolidada 100%)
-# ============================================================
+    def serializar(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {t: self.a_json(d) for t, d in self._tokens.items()}
 
-import os, json, uuid
-from datetime import datetime, timedelta
 
-# ============================================================
-# 📁 Archivos persistentes (montados en Fly.io)
-# ============================================================
-TOKENS_FILE = "/app/data/tokens.json"
-USERS_FILE = "/app/data/usuarios.json"
-TOKENS = {}
+REGISTRO_TOKENS = RegistroTokens()
 
 # ============================================================
 # 🧩 Utilidades internas
 # ============================================================
-def _ensure_dir():
-    os.makedirs(os.path.dirname(TOKENS_FILE), exist_ok=True)
-
 def _load_tokens():
-    global TOKENS
-    _ensure_dir()
-    if os.path.exists(TOKENS_FILE):
-        with open(TOKENS_FILE, "r", encoding="utf-8") as f:
-            raw = json.load(f)
-        # normalizar fechas
-        for t, d in raw.items():
-            d["fecha_activacion"] = datetime.fromisoformat(d["fecha_activacion"])
-            d["fecha_vencimiento"] = datetime.fromisoformat(d["fecha_vencimiento"])
-        TOKENS = raw
-    else:
-        TOKENS = {}
+    ALMACEN.migrar_json(TOKENS_FILE, USERS_FILE)
+    REGISTRO_TOKENS.cargar(ALMACEN.tokens())
 
-def _save_tokens():
-    _ensure_dir()
-    serial = {}
-    for t, d in TOKENS.items():
-        serial[t] = {
-            "usuario": d["usuario"],
-            "fecha_activacion": d["fecha_activacion"].isoformat(),
-            "fecha_vencimiento": d["fecha_vencimiento"].isoformat(),
-            "dias_free": d.get("dias_free", 10)
-        }
-    with open(TOKENS_FILE, "w", encoding="utf-8") as f:
-        json.dump(serial, f, indent=2, ensure_ascii=False)
+def _persistir_borrados(tokens: List[str]):
+    try:
+        REGISTRO_TOKENS.persistir_borrados(tokens, ALMACEN.borrar_tokens)
+    except Exception as e:
+        print(f"⚠️ Error persistiendo borrado de tokens: {e}")
 
 # 🔁 Inicializa al importar el módulo
 _load_tokens()
@@ -244,45 +201,32 @@ _load_tokens()
 # ============================================================
 # 🧠 Generar o renovar token
 # ============================================================
-def generar_token(usuario: str, dias_premium: int = 30, dias_free: int = 10):
+def generar_token(usuario: str, dias_premium: int = 30, dias_free: int = DIAS_FREE_DEFAULT):
     """
     Crea o renueva token para un usuario Premium.
-    Guarda token en tokens.json y usuario en usuarios.json
+    Guarda token y usuario en el ALMACEN (una fila cada uno)
     """
     ahora = datetime.now()
+    vencimiento = ahora + timedelta(days=dias_premium)
 
     # Si ya existe token, renovar fechas
-    for tok, info in TOKENS.items():
-        if str(info.get("usuario")) == str(usuario):
-            info["fecha_activacion"] = ahora
-            info["fecha_vencimiento"] = ahora + timedelta(days=dias_premium)
-            info["dias_free"] = dias_free
-            _save_tokens()
-            _guardar_usuario_premium(usuario, ahora, dias_premium)
-            return {
-                "estado": "✅",
-                "mensaje": "Token renovado correctamente",
-                "token": tok,
-                "nivel": "Premium",
-                "vencimiento": info["fecha_vencimiento"].strftime("%Y-%m-%d %H:%M:%S")
-            }
-
-    # Si no existe, crear nuevo
-    nuevo = uuid.uuid4().hex[:16].upper()
-    TOKENS[nuevo] = {
-        "usuario": str(usuario),
-        "fecha_activacion": ahora,
-        "fecha_vencimiento": ahora + timedelta(days=dias_premium),
-        "dias_free": dias_free
-    }
-    _save_tokens()
+    existentes = REGISTRO_TOKENS.tokens_de(usuario)
+    if existentes:
+        tok = existentes[0]
+        mensaje = "Token renovado correctamente"
+    else:
+        tok = uuid.uuid4().hex[:16].upper()
+        mensaje = "Token creado correctamente"
+
+    entrada = REGISTRO_TOKENS.guardar(tok, usuario, ahora, vencimiento, dias_free)
+    ALMACEN.guardar_token(tok, RegistroTokens.a_json(entrada))
     _guardar_usuario_premium(usuario, ahora, dias_premium)
     return {
         "estado": "✅",
-        "mensaje": "Token creado correctamente",
-        "token": nuevo,
+        "mensaje": mensaje,
+        "token": tok,
         "nivel": "Premium",
-        "vencimiento": (ahora + timedelta(days=dias_premium)).strftime("%Y-%m-%d %H:%M:%S")
+        "vencimiento": entrada["expira"],
     }
 
 # ============================================================
@@ -290,25 +234,16 @@ def generar_token(usuario: str, dias_premium: int = 30, dias_free: int = 10):
 # ============================================================
 def _guardar_usuario_premium(usuario: str, fecha_inicio: datetime, dias_premium: int):
     """
-    Registra o actualiza un usuario Premium en /app/data/usuarios.json
+    Registra o actualiza un usuario Premium en el ALMACEN
     """
     try:
-        os.makedirs(os.path.dirname(USERS_FILE), exist_ok=True)
-        usuarios = {}
-        if os.path.exists(USERS_FILE):
-            with open(USERS_FILE, "r", encoding="utf-8") as f:
-                usuarios = json.load(f)
-
-        usuarios[str(usuario)] = {
+        ALMACEN.guardar_usuario(usuario, {
             "nivel": "Premium",
-            "fecha_activacion": fecha_inicio.strftime("%Y-%m-%d %H:%M:%S"),
-            "fecha_vencimiento": (fecha_inicio + timedelta(days=dias_premium)).strftime("%Y-%m-%d %H:%M:%S")
-        }
-
-        with open(USERS_FILE, "w", encoding="utf-8") as f:
-            json.dump(usuarios, f, indent=2, ensure_ascii=False)
+            "fecha_activacion": fecha_inicio.strftime(FORMATO_FECHA),
+            "fecha_vencimiento": (fecha_inicio + timedelta(days=dias_premium)).strftime(FORMATO_FECHA)
+        })
 
-        print(f"✅ Usuario {usuario} guardado/actualizado en usuarios.json")
+        print(f"✅ Usuario {usuario} guardado/actualizado")
 
     except Exception as e:
         print(f"⚠️ Error guardando usuario Premium: {e}")
@@ -317,69 +252,72 @@ def _guardar_usuario_premium(usuario: str, fecha_inicio: datetime, dias_premium:
 # 🔎 Validar token
 # ============================================================
 def validar_token(token: str):
-    ahora = datetime.now()
-    data = TOKENS.get(token)
+    data = REGISTRO_TOKENS.obtener(token)
     if not data:
         return {"estado": "❌", "nivel": "Free", "mensaje": "Token inválido o inexistente."}
 
-    vto = data["fecha_vencimiento"]
-    dias_free = data.get("dias_free", 10)
-
-    if ahora <= vto:
+    ahora = time.time()
+    if ahora <= data["vence_ts"]:
         return {
             "estado": "✅",
             "nivel": "Premium",
             "usuario": data["usuario"],
-            "expira": vto.strftime("%Y-%m-%d %H:%M:%S")
+            "expira": data["expira"]
         }
 
-    if vto < ahora <= (vto + timedelta(days=dias_free)):
+    if ahora <= data["gracia_ts"]:
         return {
             "estado": "✅",
             "nivel": "Free",
             "usuario": data["usuario"],
-            "expira": vto.strftime("%Y-%m-%d %H:%M:%S"),
+            "expira": data["expira"],
             "mensaje": "Token en periodo Free post-premium (gracia)."
         }
 
-    # Expirado definitivo
-    TOKENS.pop(token, None)
-    _save_tokens()
+    # Expirado definitivo (el barrido de vencimientos lo borra)
     return {"estado": "❌", "nivel": "Free", "mensaje": "Token expirado definitivo."}
 
 # ============================================================
 # ♻️ Liberar token
 # ============================================================
 def liberar_token(token: str):
-    if token in TOKENS:
-        TOKENS.pop(token, None)
-        _save_tokens()
+    if REGISTRO_TOKENS.eliminar(token) is not None:
+        _persistir_borrados([token])
         return {"estado": "✅", "mensaje": "Token liberado"}
     return {"estado": "⚠️", "mensaje": "Token no encontrado"}
 
+def liberar_usuario(usuario: str) -> List[str]:
+    """Borra todos los tokens del usuario (logout / baja). Devuelve los tokens borrados."""
+    borrados = REGISTRO_TOKENS.eliminar_usuario(usuario)
+    if borrados:
+        _persistir_borrados(borrados)
+    return borrados
+
 # ============================================================
 # 📋 Listar tokens
 # ============================================================
 def listar_tokens():
-    return {
-        t: {
-            **d,
-            "fecha_activacion": d["fecha_activacion"].isoformat(),
-            "fecha_vencimiento": d["fecha_vencimiento"].isoformat()
-        }
-        for t, d in TOKENS.items()
-    }
+    return REGISTRO_TOKENS.serializar()
 
 # ============================================================
 # ⏰ Verificar vencimientos
 # ============================================================
 def verificar_vencimientos():
-    ahora = datetime.now()
-    expirados = []
-    for t, d in list(TOKENS.items()):
-        if ahora > d["fecha_vencimiento"] + timedelta(days=d.get("dias_free", 10)):
-            expirados.append(t)
-            TOKENS.pop(t, None)
+    expirados = REGISTRO_TOKENS.extraer_vencidos(time.time())
     if expirados:
-        _save_tokens()
-    return expirados
\ No newline at end of file
+        _persistir_borrados(expirados)
+    return expirados
+
+async def barrido_vencimientos_loop():
+    """
+    Duerme hasta el próximo vencimiento definitivo (+ BARRIDO_LOTE_S, como
+    mucho BARRIDO_MAX_S) y borra en un solo lote todos los tokens vencidos. La escritura a disco
+    va al pool por defecto: ni las peticiones ni el loop tocan el disco.
+    """
+    while True:
+        proximo = REGISTRO_TOKENS.proximo_vencimiento()
+        espera = BARRIDO_MAX_S if proximo is None else proximo - time.time()
+        await asyncio.sleep(min(max(espera, 0.0) + BARRIDO_LOTE_S, BARRIDO_MAX_S))
+        expirados = await asyncio.to_thread(verificar_vencimientos)
+        if expirados:
+            print(f"🧹 {len(expirados)} token(s) vencidos eliminados")
@@ -1,20 +1,37 @@
-import json
-import os
+import threading
 
-DB_PATH = "/app/data/usuarios.json"
+from utils.token_store import ALMACEN
+
+# Índice token → nivel, construido desde el ALMACEN (antes
+# /app/data/usuarios.json) y reconstruido sólo cuando cambia
+# ALMACEN.version_usuarios(). Los lectores usan la referencia vigente
+# del dict: la reconstrucción lo sustituye entero, nunca lo muta.
+_INDICE = {"version": None, "por_token": {}}
+_LOCK = threading.Lock()
 
 def cargar_usuarios():
-    if not os.path.exists(DB_PATH):
-        return {}
-    with open(DB_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return ALMACEN.usuarios()
+
+def _indice_por_token():
+    version = ALMACEN.version_usuarios()
+    if _INDICE["version"] == version:
+        return _INDICE["por_token"]
+    with _LOCK:
+        if _INDICE["version"] != version:
+            por_token = {}
+            for uid, info in cargar_usuarios().items():
+                token = info.get("token")
+                if token is not None:
+                    por_token.setdefault(token, info.get("nivel"))
+            _INDICE["por_token"] = por_token
+            _INDICE["version"] = version
+        return _INDICE["por_token"]
 
 def validar_token_api(token):
-    usuarios = cargar_usuarios()
-    for uid, info in usuarios.items():
-        if info.get("token") == token:
-            if info.get("nivel") == "Premium":
-                return {"valido": True, "nivel": "Premium"}
-            else:
-                return {"valido": True, "nivel": "Free"}
+    por_token = _indice_por_token()
+    if token in por_token:
+        if por_token[token] == "Premium":
+            return {"valido": True, "nivel": "Premium"}
+        else:
+            return {"valido": True, "nivel": "Free"}
     return {"valido": False, "nivel": "Free"}
@@ -0,0 +1,106 @@
+# ============================================================
+# 🕯️ TESLABTC.KG — utils/velas.py
+# ============================================================
+# Contenedor columnar de velas OHLCV:
+#   - Columnas contiguas: open_time (int64) y open/high/low/close/volume (float64)
+#   - Los cortes (velas[-30:]) son vistas (memoryview), no copias
+#   - velas[i] devuelve un dict como los klines clásicos (compatibilidad)
+# a_velas() acepta Velas, lista de dicts o lista de listas (formato Binance);
+# con `ultimas` recorta ANTES de convertir.
+# ============================================================
+from __future__ import annotations
+
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+COLUMNAS = ("open_time", "open", "high", "low", "close", "volume")
+
+
+def _ms(t: Any) -> int:
+    if isinstance(t, datetime):
+        if t.tzinfo is None:
+            t = t.replace(tzinfo=timezone.utc)
+        return int(t.timestamp() * 1000)
+    return int(t)
+
+
+class Velas:
+    __slots__ = COLUMNAS
+
+    def __init__(
+        self,
+        open_time: Sequence[int],
+        open: Sequence[float],
+        high: Sequence[float],
+        low: Sequence[float],
+        close: Sequence[float],
+        volume: Sequence[float],
+    ):
+        # memoryview: los cortes comparten memoria con el buffer original
+        self.open_time = memoryview(open_time) if isinstance(open_time, array) else open_time
+        self.open = memoryview(open) if isinstance(open, array) else open
+        self.high = memoryview(high) if isinstance(high, array) else high
+        self.low = memoryview(low) if isinstance(low, array) else low
+        self.close = memoryview(close) if isinstance(close, array) else close
+        self.volume = memoryview(volume) if isinstance(volume, array) else volume
+
+    @classmethod
+    def desde_klines(cls, klines: Sequence[Any]) -> "Velas":
+        """Construye desde klines en formato dict o lista (una sola conversión)."""
+        ot, o, h, l, c, v = (array("q"), array("d"), array("d"), array("d"), array("d"), array("d"))
+        if klines and isinstance(klines[0], dict):
+            for k in klines:
+                ot.append(_ms(k["open_time"]))
+                o.append(float(k["open"]))
+                h.append(float(k["high"]))
+                l.append(float(k["low"]))
+                c.append(float(k["close"]))
+                v.append(float(k.get("volume", k.get("vol", 0.0))))
+        else:
+            for k in klines or ():
+                ot.append(_ms(k[0]))
+                o.append(float(k[1]))
+                h.append(float(k[2]))
+                l.append(float(k[3]))
+                c.append(float(k[4]))
+                v.append(float(k[5]) if len(k) > 5 else 0.0)
+        return cls(ot, o, h, l, c, v)
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return Velas(
+                self.open_time[idx], self.open[idx], self.high[idx],
+                self.low[idx], self.close[idx], self.volume[idx],
+            )
+        return {
+            "open_time": self.open_time[idx],
+            "open": self.open[idx],
+            "high": self.high[idx],
+            "low": self.low[idx],
+            "close": self.close[idx],
+            "volume": self.volume[idx],
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def a_klines(self) -> list:
+        """Vuelve al formato lista de dicts (respuestas JSON)."""
+        return list(self)
+
+
+def a_velas(klines: Any, ultimas: Optional[int] = None) -> Velas:
+    """
+    Velas desde cualquier formato. Con `ultimas`, sólo se convierten las
+    últimas N velas (una lista de 1000 dicts no se parsea entera para usar 20).
+    """
+    if ultimas is not None:
+        klines = klines[-ultimas:]
+    if isinstance(klines, Velas):
+        return klines
+    return Velas.desde_klines(klines)
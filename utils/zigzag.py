@@ -0,0 +1,161 @@
+# ============================================================
+# 〽️ TESLABTC.KG — utils/zigzag.py
+# ============================================================
+# ZigZag en streaming (una vela a la vez, O(1) amortizado):
+#   - Candidato HIGH/LOW en i = j - depth cuando llega la vela j
+#     (fractal estricto de `depth` velas a cada lado, deques monótonas)
+#   - Mismo tipo que el último pivote → repinta si es más extremo
+#   - Tipo opuesto con desviación ≥ deviation % → nuevo pivote; el
+#     anterior queda confirmado (ya no puede repintarse)
+# Estado: últimos 6 pivotes (alternan H/L) + total → HH/HL/LH/LL en O(1).
+# Eventos devueltos por actualizar():
+#   ("pivote", p) · ("repintado", p) · ("confirmado", p),  p = (idx, "H"|"L", precio)
+# ============================================================
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+
+Pivote = Tuple[int, str, float]
+Evento = Tuple[str, Pivote]
+
+MAX_PIVOTES = 6
+
+
+class ZigZag:
+    def __init__(self, depth: int = 12, deviation: float = 5.0, backstep: int = 2):
+        self.depth = depth
+        self.deviation = deviation
+        self.backstep = backstep   # se conserva por compatibilidad: no cambia la regla
+        self.n = 0
+        self.total = 0
+        self.pivotes: Deque[Pivote] = deque(maxlen=MAX_PIVOTES)
+        # Últimas 2*depth+1 velas y máx/mín móvil de `depth` velas
+        self._highs: Deque[float] = deque(maxlen=2 * depth + 1)
+        self._lows: Deque[float] = deque(maxlen=2 * depth + 1)
+        self._dq_max: Deque[Tuple[int, float]] = deque()
+        self._dq_min: Deque[Tuple[int, float]] = deque()
+        self._max_mov: Deque[float] = deque(maxlen=depth + 2)
+        self._min_mov: Deque[float] = deque(maxlen=depth + 2)
+
+    # --------------------------------------------------------
+    # Entrada
+    # --------------------------------------------------------
+    def actualizar(self, high: float, low: float) -> List[Evento]:
+        j = self.n
+        self.n += 1
+        d = self.depth
+        high = float(high)
+        low = float(low)
+        self._highs.append(high)
+        self._lows.append(low)
+
+        while self._dq_max and self._dq_max[-1][1] <= high:
+            self._dq_max.pop()
+        self._dq_max.append((j, high))
+        if self._dq_max[0][0] <= j - d:
+            self._dq_max.popleft()
+        while self._dq_min and self._dq_min[-1][1] >= low:
+            self._dq_min.pop()
+        self._dq_min.append((j, low))
+        if self._dq_min[0][0] <= j - d:
+            self._dq_min.popleft()
+        self._max_mov.append(self._dq_max[0][1])
+        self._min_mov.append(self._dq_min[0][1])
+
+        if j < 2 * d:
+            return []
+
+        # Vela central i = j - d: ventana izquierda [i-d, i-1], derecha [i+1, j]
+        i = j - d
+        eventos: List[Evento] = []
+        h = self._highs[d]
+        if h > self._max_mov[0] and h > self._max_mov[-1]:
+            self._candidato(i, "H", h, eventos)
+        l = self._lows[d]
+        if l < self._min_mov[0] and l < self._min_mov[-1]:
+            self._candidato(i, "L", l, eventos)
+        return eventos
+
+    def consumir(self, velas) -> List[Evento]:
+        """Procesa un bloque de velas (Velas o columnas high/low)."""
+        eventos: List[Evento] = []
+        for h, l in zip(velas.high, velas.low):
+            eventos.extend(self.actualizar(h, l))
+        return eventos
+
+    def _candidato(self, i: int, t: str, p: float, eventos: List[Evento]) -> None:
+        if not self.pivotes:
+            self._agregar((i, t, p), eventos)
+            return
+
+        li, lt, lp = self.pivotes[-1]
+        if t == lt:
+            if (t == "H" and p > lp) or (t == "L" and p < lp):
+                self.pivotes[-1] = (i, t, p)
+                eventos.append(("repintado", (i, t, p)))
+            return
+
+        move_pct = abs((p - lp) / lp) * 100.0 if lp != 0 else 999.0
+        if move_pct >= self.deviation:
+            eventos.append(("confirmado", self.pivotes[-1]))
+            self._agregar((i, t, p), eventos)
+
+    def _agregar(self, piv: Pivote, eventos: List[Evento]) -> None:
+        self.pivotes.append(piv)
+        self.total += 1
+        eventos.append(("pivote", piv))
+
+    # --------------------------------------------------------
+    # Lectura O(1)
+    # --------------------------------------------------------
+    def tendencia(self) -> Dict[str, Any]:
+        """HH/HL vs LH/LL con los últimos pivotes (formato del análisis premium)."""
+        piv = list(self.pivotes)
+        if self.total < 3:
+            return {"estado": "lateral", "BOS": "—"}
+
+        if self.total < 4:
+            # Alternan: con 3 pivotes hay un solo pivote de uno de los tipos
+            idx_prev, tipo_prev, price_prev = piv[-2]
+            idx_last, tipo_last, price_last = piv[-1]
+            if tipo_prev == "L" and tipo_last == "H":
+                estado = "alcista"
+            elif tipo_prev == "H" and tipo_last == "L":
+                estado = "bajista"
+            else:
+                estado = "lateral"
+            return {
+                "estado": estado,
+                "BOS": "—",
+                "ultimo_pivote": price_last,
+                "pivotes": [
+                    (idx_prev, tipo_prev, price_prev),
+                    (idx_last, tipo_last, price_last),
+                ],
+            }
+
+        ult4 = piv[-4:]
+        (_, h1), (_, h2) = [(i, p) for (i, t, p) in ult4 if t == "H"]
+        (_, l1), (_, l2) = [(i, p) for (i, t, p) in ult4 if t == "L"]
+
+        if h2 > h1 and l2 > l1:
+            estado = "alcista"
+            bos = "✔️"
+        elif h2 < h1 and l2 < l1:
+            estado = "bajista"
+            bos = "✔️"
+        else:
+            estado = "lateral"
+            bos = "—"
+
+        return {
+            "estado": estado,
+            "BOS": bos,
+            "HH": h2,
+            "LH": h1,
+            "LL": l2,
+            "HL": l1,
+            "ultimo_pivote": piv[-1][2],
+            "pivotes": piv,
+        }